@@ -123,6 +123,30 @@ doc: str = HTML5Document(
 )
 ```
 
+For pages which share a layout, `Layout` renders everything outside of its
+slots once, so a request only renders the slot contents:
+
+```python
+from html_compose import Layout, layout_slot, main, nav, p
+
+site = Layout("Site", lang="en", body=[nav[...], main[layout_slot("body")]])
+
+site.stream(title="Home", body=[p["Hello, world!"]])
+```
+
+Components can declare their own CSS/JS with `component_assets`. A page only
+includes the assets of the components it renders, each once:
+
+```python
+from html_compose import component_assets, div
+
+card_css = component_assets(css=".card { padding: 1em }")
+
+
+def card(*content):
+    return div(class_="card")[card_css, content]
+```
+
 ### Composing Elements
 
 The constructor for an element defines attributes, so if it has none the call
@@ -173,6 +197,17 @@ Attributes support multiple input formats:
 img([img.hint.src("..."), {"@click": "..."}, onmouseleave="..."])
 ```
 
+Attribute sets used on many elements can be resolved once with
+`attr_bundle`:
+
+```python
+from html_compose import attr_bundle, button
+
+primary = attr_bundle(class_=["btn", "btn-primary"], type="button")
+button(attrs=primary, class_="wide")["Save"]
+# <button class="btn btn-primary wide" type="button">Save</button>
+```
+
 ### Extensions
 
 Custom attributes for frameworks can be packaged as reusable modules:
@@ -267,15 +302,21 @@ def doctype(dtype: str = "html"):
 # ruff: noqa: E402
 
 # Library primitives
+from .attr_bundle import attr_bundle as attr_bundle
 from .base_attribute import BaseAttribute as BaseAttribute
 from .base_element import BaseElement as BaseElement
 from .custom_element import CustomElement as CustomElement
 
 create_element = CustomElement.create
+from .component import component_assets as component_assets
+
 # Document features
 from .document import HTML5Document as HTML5Document
+from .document import Layout as Layout
 from .document import document_generator as document_generator
 from .document import document_streamer as document_streamer
+from .document import document_streamer_bytes as document_streamer_bytes
+from .document import layout_slot as layout_slot
 
 # Elements
 from .elements import a as a
@@ -391,9 +432,11 @@ from .elements import ul as ul
 from .elements import var as var
 from .elements import video as video
 from .elements import wbr as wbr
+from .json_island import json_island as json_island
 
 # Resource features
 from .resource import css_import as css_import
 from .resource import font_import_manual as font_import_manual
 from .resource import font_import_provider as font_import_provider
+from .resource import img_import as img_import
 from .resource import js_import as js_import
@@ -0,0 +1,216 @@
+"""
+Loading priorities for images and iframes
+
+Browsers start loading every image in a document at once and find out late
+which one is the Largest Contentful Paint. `above_the_fold` walks an element
+tree once, in document order, and marks the first `count` images/iframes as
+above the fold, and everything after as below it:
+
+* above: `fetchpriority="high"` (images) and `loading="eager"`
+* below: `loading="lazy"` and `decoding="async"` (images)
+
+It returns preload links for the images above the fold, for the head:
+
+```python
+from html_compose.above_fold import above_the_fold
+from html_compose.document import generate_head
+
+page = body[header[img(src="/hero.jpg")], main[...]]
+head = generate_head(title="Home", preload=above_the_fold(page))
+```
+
+`above_the_fold` changes the elements in place. `above_the_fold_copy` returns
+a changed copy instead and leaves the input alone, so elements shared between
+pages keep their own attributes.
+
+`HTML5Document(above_fold=1)` and `Layout(above_fold=1)` use the copy and the
+preload links. A `Layout` runs the pass once, when it is created, so it costs
+nothing per request.
+
+Attributes set explicitly are kept, i.e. an image with `loading="lazy"`
+stays lazy, but it still counts as one of the first `count`.
+Only children known when the pass runs are visited: callables,
+generators and layout slots are rendered later and are left as they are.
+`img_import`s are counted too and get `priority=True` above the fold.
+"""
+
+import copy
+from typing import Iterable
+
+from . import elements as el
+from .base_element import BaseElement
+from .base_types import Node
+from .resource.img_import import img_import
+
+# Elements which take the loading attribute
+_LOADING_TAGS = ("img", "iframe")
+
+
+def _is_set(element: BaseElement, name: str) -> bool:
+    return name in element._attrs or any(
+        item[0] == name for item in element._lazy_attrs or ()
+    )
+
+
+def _copy_element(element: BaseElement) -> BaseElement:
+    """
+    Shallow copy of an element which can be changed without
+    affecting the original
+    """
+    new = copy.copy(element)
+    new._digest = None
+    new._children = list(element._children)
+    if element._lazy_attrs is not None:
+        new._lazy_attrs = list(element._lazy_attrs)
+    if element._attr_string is None:
+        # Not a shared set, it belongs to the original
+        new._attrs = dict(element._attrs)
+    return new
+
+
+def _preload_link(image: BaseElement) -> el.link | None:
+    """
+    Return a preload link for an img element, if its source is known
+    """
+    attrs = image._attrs
+    if "src" not in attrs and "srcset" not in attrs:
+        return None
+    link_attrs = {"fetchpriority": "high"}
+    if "src" in attrs:
+        link_attrs["href"] = attrs["src"]
+    if "srcset" in attrs:
+        link_attrs["imagesrcset"] = attrs["srcset"]
+        if "sizes" in attrs:
+            link_attrs["imagesizes"] = attrs["sizes"]
+    if "crossorigin" in attrs:
+        link_attrs["crossorigin"] = attrs["crossorigin"]
+    return el.link(attrs=link_attrs, rel="preload", as_="image")
+
+
+class _Pass:
+    """
+    One walk over a tree in document order
+
+    With `copy` every changed element, and each element or list on the way
+    to it, is replaced by a copy and the input tree is left as it is.
+    """
+
+    def __init__(self, count: int, preload: bool, copy: bool):
+        self.count = count
+        self.preload = preload
+        self.copy = copy
+        self.seen = 0
+        self.links: list[el.link] = []
+
+    def visit(self, node: Node, in_picture: bool) -> Node:
+        if isinstance(node, BaseElement):
+            if node.tag in _LOADING_TAGS:
+                return self._loading(node, in_picture)
+            if not node._children:
+                return node
+            in_picture = in_picture or node.tag == "picture"
+            children = self._visit_all(node._children, in_picture)
+            if children is None:
+                return node
+            new = _copy_element(node)
+            new._children = children
+            return new
+
+        if isinstance(node, img_import):
+            return self._img_import(node)
+
+        if isinstance(node, (list, tuple)):
+            children = self._visit_all(node, in_picture)
+            if children is None:
+                return node
+            return children if isinstance(node, list) else tuple(children)
+
+        # Callables, generators and slots are rendered later
+        return node
+
+    def _visit_all(self, nodes: Iterable[Node], in_picture: bool):
+        """
+        :return: The visited nodes if any of them was copied, else None
+        """
+        result = []
+        changed = False
+        for node in nodes:
+            new = self.visit(node, in_picture)
+            changed = changed or new is not node
+            result.append(new)
+        return result if changed else None
+
+    def _loading(self, element: BaseElement, in_picture: bool) -> BaseElement:
+        is_img = element.tag == "img"
+        if self.seen < self.count:
+            defaults = {"loading": "eager"}
+            if is_img:
+                defaults["fetchpriority"] = "high"
+                if self.preload and not in_picture:
+                    link = _preload_link(element)
+                    if link is not None:
+                        self.links.append(link)
+        else:
+            defaults = {"loading": "lazy"}
+            if is_img:
+                defaults["decoding"] = "async"
+        self.seen += 1
+
+        # Attributes set explicitly are kept
+        missing = {k: v for k, v in defaults.items() if not _is_set(element, k)}
+        if not missing:
+            return element
+        target = _copy_element(element) if self.copy else element
+        target._own_attrs().update(missing)
+        target._share_attrs()
+        return target
+
+    def _img_import(self, image: img_import) -> img_import:
+        if self.seen < self.count:
+            if self.copy:
+                image = copy.copy(image)
+            image.priority = True
+            # Variants in other formats render a picture
+            same_format = image.variants_of(image.src)
+            if self.preload and len(same_format) == len(image.variants):
+                self.links.append(image.preload_link())
+        self.seen += 1
+        return image
+
+
+def above_the_fold(
+    tree: Node | Iterable[Node], count: int = 1, preload: bool = True
+) -> list[el.link]:
+    """
+    Set loading attributes on the img/iframe elements of a tree, in place
+
+    The elements are changed for every later render, including in other
+    documents they are shared with. Use `above_the_fold_copy` to keep the
+    tree as it is.
+
+    :param tree: An element, or an iterable of nodes, i.e. the body
+    :param count: Number of images/iframes treated as above the fold
+    :param preload: Return preload links for the images above the fold.
+                    Images inside a picture, which the browser picks a
+                    source for, are not preloaded.
+    :return: Preload links for the head
+    """
+    walk = _Pass(count, preload, copy=False)
+    walk.visit(tree, False)  # type: ignore[arg-type]
+    return walk.links
+
+
+def above_the_fold_copy(
+    tree: Node, count: int = 1, preload: bool = True
+) -> tuple[Node, list[el.link]]:
+    """
+    `above_the_fold` without changing the input.
+
+    Elements which get loading attributes, and the elements and lists
+    holding them, are copied. Everything else is shared with the input.
+
+    :return: (the tree with loading attributes, preload links for the head)
+    """
+    walk = _Pass(count, preload, copy=True)
+    result = walk.visit(tree, False)
+    return result, walk.links
@@ -0,0 +1,105 @@
+"""
+Reusable attribute sets
+
+An `attr_bundle` resolves its attributes once, when it is created,
+and can then be passed as `attrs=` to any number of elements.
+
+```python
+from html_compose import attr_bundle, button
+
+primary = attr_bundle(
+    {"hx-post": "/save"}, class_=["btn", "btn-primary"], type="button"
+)
+
+button(attrs=primary)["Save"]
+# <button hx-post="/save" class="btn btn-primary" type="button">Save</button>
+button(attrs=primary, class_="wide")["Save"]
+# <button hx-post="/save" class="btn btn-primary wide" type="button">...
+```
+
+Merging with the element's other attributes is the same as for a dict
+passed in `attrs=`: keyword attributes combine "class" and "style" and
+raise ValueError for any other attribute set twice.
+
+Callable values are kept as they are and evaluated when each element
+renders, see `BaseElement.deferred_resolve`.
+"""
+
+from typing import Iterable, Iterator, Mapping
+
+from .attributes import BaseAttribute
+from .base_types import LazyAttr, Resolvable
+
+
+class attr_bundle(Mapping[str, str]):
+    """
+    Pre-resolved, immutable set of attributes
+    """
+
+    __slots__ = ("_attrs", "_lazy_attrs")
+
+    def __init__(
+        self,
+        attrs: Iterable[BaseAttribute]
+        | Mapping[str, Resolvable]
+        | Iterable[
+            BaseAttribute | Iterable[BaseAttribute] | Mapping[str, Resolvable]
+        ]
+        | None = None,
+        **kwargs: Resolvable,
+    ):
+        """
+        :param attrs: Attributes in any form accepted by an element's
+                      `attrs=`, including another bundle
+        :param kwargs: Attributes by name, resolved like element keyword
+                       arguments. A trailing underscore is dropped and other
+                       underscores become dashes: class_ -> class,
+                       aria_label -> aria-label
+        """
+        # Lazy import: base_element checks for bundles
+        from .base_element import BaseElement, merge_attr
+
+        lazy_attrs: list[LazyAttr] = []
+        resolved = BaseElement._resolve_attrs(attrs, lazy_attrs)
+        for name, value in kwargs.items():
+            name = name.removesuffix("_").replace("_", "-")
+            merge_attr(resolved, name, value, lazy_attrs)
+        self._attrs: dict[str, str] = resolved
+        # Callable values, evaluated by each element at render
+        self._lazy_attrs = lazy_attrs or None
+
+    def to_dict(self) -> dict[str, str]:
+        """
+        Return a copy of the resolved attributes,
+        without callable values
+        """
+        return self._attrs.copy()
+
+    def __getitem__(self, key: str) -> str:
+        return self._attrs[key]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._attrs)
+
+    def __len__(self) -> int:
+        return len(self._attrs)
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, attr_bundle):
+            return (
+                self._attrs == other._attrs
+                and self._lazy_attrs == other._lazy_attrs
+            )
+        if isinstance(other, Mapping):
+            # A mapping has no callable values
+            return self._lazy_attrs is None and self._attrs == dict(other)
+        return NotImplemented
+
+    def __hash__(self) -> int:
+        # Consistent with __eq__, which ignores the order of static values
+        return hash(
+            (frozenset(self._attrs.items()), tuple(self._lazy_attrs or ()))
+        )
+
+    def __repr__(self) -> str:
+        return f"attr_bundle({self._attrs})"
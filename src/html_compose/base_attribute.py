@@ -9,6 +9,55 @@ def unsafe_text(value) -> str:
     return Markup(str(value))
 
 
+def resolve_attr_value(
+    name: str, data: Resolvable, delimiter: str = " "
+) -> str | None:
+    """
+    Resolve attribute data into its string value.
+
+    Same result as BaseAttribute(name, data, delimiter).evaluate(),
+    without creating the attribute. None if the attribute is not rendered.
+    """
+    if data is None or data is False:
+        return None
+
+    data_type = type(data)
+    if data_type is str:
+        return data  # type: ignore[return-value]
+
+    if data is True:
+        return "true"
+
+    if isinstance(data, str):
+        return data
+
+    if isinstance(data, int):
+        return str(data)
+
+    if isinstance(data, list):
+        for item in data:
+            if not isinstance(item, str):
+                raise ValueError(
+                    f"Input data must be a string, got {type(item)}"
+                )
+        return delimiter.join(data)
+
+    if isinstance(data, dict):
+        if name == "style":
+            return delimiter.join(
+                [f"{key}: {value}" for key, value in data.items()]
+            )
+        return delimiter.join(
+            [
+                key if isinstance(key, str) else str(key)
+                for key, value in data.items()
+                if value
+            ]
+        )
+
+    raise ValueError(f"Input data type {data} not supported")
+
+
 class BaseAttribute:
     """
     Base class for all HTML element attributes. It resolves to a string.
@@ -1,11 +1,272 @@
 from abc import ABCMeta
-from typing import Any, Callable, Generator, Iterable, Mapping, TypeVar, cast
+from hashlib import blake2b
+from itertools import zip_longest
+from typing import (
+    Any,
+    Callable,
+    Generator,
+    Iterable,
+    Mapping,
+    MutableMapping,
+    TypeVar,
+    cast,
+)
 
 from . import escape_text, unsafe_text, util_funcs
-from .attributes import BaseAttribute, GlobalAttrs
-from .base_types import ElementBase, Node, Resolvable, _HasHtml
+from .attr_bundle import attr_bundle
+from .attributes import BaseAttribute
+from .base_attribute import resolve_attr_value
+from .base_types import (
+    AttrResolver,
+    ElementBase,
+    LazyAttr,
+    Node,
+    Resolvable,
+    _HasHtml,
+)
+
+# Join delimiters of attributes passed by keyword, see GlobalAttrs.style
+ATTR_DELIMITERS = {"style": "; "}
+# Attributes which may be set more than once and their separator
+ATTR_MERGE = {"class": " ", "style": "; "}
+
+
+def _merge_text(nodes: Iterable) -> Generator[Any, None, None]:
+    """
+    Join adjacent text from BaseElement._child_nodes so that
+    div["a", "b"] and div["ab"] compare equal, as they render equal.
+    """
+    text: list[str] = []
+    for node in nodes:
+        if isinstance(node, str):
+            text.append(node)
+            continue
+        if text:
+            yield "".join(text)
+            text.clear()
+        yield node
+    if text:
+        yield "".join(text)
+
+
+# Bumped when an element with a cached content digest changes, which
+# invalidates every cached digest. Trees are usually hashed once built.
+_digest_generation = 0
+
+
+def _digest_changed():
+    global _digest_generation
+    _digest_generation += 1
+
+
+# Maximum number of distinct attribute sets shared between elements
+ATTR_INTERN_SIZE = 4096
+
+# Resolved attribute items -> (shared attrs dict, escaped attribute string)
+_interned_attrs: util_funcs.BoundedCache[tuple, tuple[dict[str, str], str]] = (
+    util_funcs.BoundedCache()
+)
+# Attribute sets rendered once. Most are unique, i.e. hold an id, and are
+# never interned. Cleared when full, which is cheaper than evicting.
+_attr_sightings: dict[tuple, None] = {}
+
+
+def _intern_attrs(attrs: dict[str, str]) -> tuple[dict[str, str], str] | None:
+    """
+    Return the shared copy of an attribute set with its pre-escaped
+    key="value" string, or None the first time a set is seen
+
+    Raises TypeError if a value is unhashable.
+    """
+    key = tuple(attrs.items())
+    entry = _interned_attrs.get(key)
+    if entry is None:
+        if key not in _attr_sightings:
+            if len(_attr_sightings) >= ATTR_INTERN_SIZE:
+                _attr_sightings.clear()
+            _attr_sightings[key] = None
+            return None
+        # Magic: Security: Escape all attr values
+        attr_string = " ".join(
+            util_funcs.join_attrs(k, escape_text(v)) for k, v in key
+        )
+        entry = (attrs, attr_string)
+        # Evicted sets stay with the elements holding them
+        _interned_attrs.put(key, entry, ATTR_INTERN_SIZE)
+    return entry
+
+
+def _is_stable(child: Any) -> bool:
+    """
+    Whether a child renders the same until an element changes,
+    see BaseElement.content_hash
+    """
+    child_type = type(child)
+    if child_type is str or child_type is int or child is None:
+        return True
+    if child_type is tuple:
+        return all(_is_stable(item) for item in child)
+    # Nested elements report their own stability, classes are instantiated
+    return isinstance(child, (BaseElement, ElementMeta))
+
+
+class _AttrsView(MutableMapping[str, str]):
+    """
+    Resolved attributes of an element, name to unescaped value
+
+    Reads go to the element's attribute dict, which may be shared with
+    other elements. The first write gives the element its own copy.
+    Use `dict(element.attrs)` or `.copy()` where a dict is needed,
+    i.e. for `json.dumps`.
+    """
+
+    __slots__ = ("_element",)
+
+    def __init__(self, element: "BaseElement"):
+        self._element = element
+
+    def __getitem__(self, key: str) -> str:
+        return self._element._attrs[key]
+
+    def __setitem__(self, key: str, value: str):
+        self._element._own_attrs()[key] = value
+
+    def __delitem__(self, key: str):
+        del self._element._own_attrs()[key]
+
+    def __iter__(self):
+        return iter(self._element._attrs)
+
+    def __len__(self) -> int:
+        return len(self._element._attrs)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._element._attrs
 
-SPECIAL_ATTRS = {"class": GlobalAttrs.class_, "style": GlobalAttrs.style}
+    def copy(self) -> dict[str, str]:
+        return dict(self._element._attrs)
+
+    def __or__(self, other: Mapping[str, str]) -> dict[str, str]:
+        return {**self._element._attrs, **other}
+
+    def __ror__(self, other: Mapping[str, str]) -> dict[str, str]:
+        return {**other, **self._element._attrs}
+
+    def __ior__(self, other: Mapping[str, str]) -> "_AttrsView":
+        self._element._own_attrs().update(other)
+        return self
+
+    def __repr__(self) -> str:
+        return repr(self._element._attrs)
+
+
+def _check_duplicate(
+    attrs: dict[str, str], lazy_attrs: list[LazyAttr] | None, attr_name: str
+):
+    if attr_name in ATTR_MERGE:
+        return
+    if attr_name in attrs or (
+        lazy_attrs and any(item[0] == attr_name for item in lazy_attrs)
+    ):
+        raise ValueError(
+            f"Attribute {attr_name} was passed twice. "
+            "We don't know how to merge it."
+        )
+
+
+def merge_attr(
+    attrs: dict[str, str],
+    attr_name: str,
+    attr_data: str | Resolvable | BaseAttribute | None,
+    lazy_attrs: list[LazyAttr] | None = None,
+):
+    """
+    Resolve an attribute into a dict of resolved attributes.
+    "class" and "style" are combined with existing values, any other
+    attribute which is already set raises ValueError.
+
+    :param attrs: Resolved attributes, updated in place
+    :param attr_name: The name of the attribute
+    :param attr_data: The data for the attribute
+    :param lazy_attrs: Callable values are added to this list of
+                       (name, callable, anchor) to be evaluated at render
+    """
+    if attr_data is None or attr_data is False:
+        return  # noop
+
+    if isinstance(attr_data, BaseAttribute):
+        result = attr_data.evaluate()
+        resolved_value = result[1] if result is not None else None
+    elif callable(attr_data):
+        if lazy_attrs is None:
+            raise ValueError(f"Attribute {attr_name} can't be a callable here")
+        _check_duplicate(attrs, lazy_attrs, attr_name)
+        lazy_attrs.append((attr_name, attr_data, next(reversed(attrs), None)))
+        return
+    else:
+        resolved_value = resolve_attr_value(
+            attr_name, attr_data, ATTR_DELIMITERS.get(attr_name, " ")
+        )
+
+    if resolved_value is not None:
+        if attr_name in attrs:
+            separator = ATTR_MERGE.get(attr_name)
+            if separator is None:
+                raise ValueError(
+                    f"Attribute {attr_name} was passed twice. "
+                    "We don't know how to merge it."
+                )
+            attrs[attr_name] = f"{attrs[attr_name]}{separator}{resolved_value}"
+        else:
+            if lazy_attrs:
+                _check_duplicate(attrs, lazy_attrs, attr_name)
+            attrs[attr_name] = resolved_value
+
+
+def _put_attr(
+    attr_dict: dict[str, str],
+    lazy_attrs: list[LazyAttr] | None,
+    key: str,
+    value: str,
+):
+    attr_dict[key] = value
+    if lazy_attrs:
+        lazy_attrs[:] = [item for item in lazy_attrs if item[0] != key]
+
+
+def _put_lazy_attr(
+    attr_dict: dict[str, str],
+    lazy_attrs: list[LazyAttr] | None,
+    key: str,
+    func: AttrResolver,
+):
+    if lazy_attrs is None:
+        raise ValueError(f"Attribute {key} can't be a callable here")
+    attr_dict.pop(key, None)
+    lazy_attrs[:] = [item for item in lazy_attrs if item[0] != key]
+    lazy_attrs.append((key, func, next(reversed(attr_dict), None)))
+
+
+def _put_bundle(
+    attr_dict: dict[str, str],
+    lazy_attrs: list[LazyAttr] | None,
+    bundle: attr_bundle,
+):
+    # Callables go back between the static values they were declared among
+    after: dict[str | None, list[tuple[str, AttrResolver]]] = {}
+    for key, func, anchor in bundle._lazy_attrs or ():
+        if anchor is not None and anchor not in bundle._attrs:
+            anchor = ""  # placed last
+        after.setdefault(anchor, []).append((key, func))
+
+    for key, func in after.get(None, ()):
+        _put_lazy_attr(attr_dict, lazy_attrs, key, func)
+    for key, value in bundle._attrs.items():
+        _put_attr(attr_dict, lazy_attrs, key, value)
+        for name, func in after.get(key, ()):
+            _put_lazy_attr(attr_dict, lazy_attrs, name, func)
+    for key, func in after.get("", ()):
+        _put_lazy_attr(attr_dict, lazy_attrs, key, func)
 
 
 T = TypeVar("T", bound="BaseElement")
@@ -36,7 +297,15 @@ class BaseElement(ElementBase, metaclass=ElementMeta):
     All elements derive from this class
     """
 
-    __slots__ = ("tag", "attrs", "_children", "is_void_element")
+    __slots__ = (
+        "tag",
+        "_attrs",
+        "_attr_string",
+        "_lazy_attrs",
+        "_children",
+        "is_void_element",
+        "_digest",
+    )
 
     def __getitem__(self, key):
         """
@@ -70,7 +339,7 @@ class BaseElement(ElementBase, metaclass=ElementMeta):
             BaseAttribute | Iterable[BaseAttribute] | Mapping[str, Resolvable]
         ]
         | None = None,
-        children: list | None = None,
+        children: Iterable[Node] | None = None,
     ) -> None:
         """
         Initialize an HTML element
@@ -81,23 +350,268 @@ class BaseElement(ElementBase, metaclass=ElementMeta):
             attrs: A list of attributes for the element.
                 It can also be a dictionary of key,value strings.
                 Defaults to None.
-            children: A list of child elements. Defaults to None.
+            children: A list or iterable of child elements. Defaults to None.
+                It is adopted without copying, see `extend`.
         """
         self.tag: str = tag
-        self.attrs: dict[str, str] = self._resolve_attrs(attrs)
-
-        self._children: list[Node] = children if children else []
+        # Set when _attrs is a shared (interned) attribute set
+        self._attr_string: str | None = None
+        # Callable attribute values, evaluated at render
+        lazy_attrs: list[LazyAttr] | None = [] if attrs is not None else None
+        self._attrs: dict[str, str] = self._resolve_attrs(attrs, lazy_attrs)
+        self._lazy_attrs = lazy_attrs or None
+
+        # The caller's list is held as one segment rather than used as
+        # our own child list so later appends never mutate it.
+        self._children: list[Node] = [children] if children else []
         self.is_void_element: bool = void_element
+        # (generation, digest) from content_hash, see _digest_generation
+        self._digest: tuple[int, bytes] | None = None
+
+    @property
+    def attrs(self) -> MutableMapping[str, str]:
+        """
+        Resolved attributes, name to unescaped value
+
+        Elements with identical attributes share one dict once rendered.
+        Reading never copies it; the first change gives this element its
+        own copy. This is a mapping rather than the dict itself, use
+        `dict(element.attrs)` for a dict.
+        """
+        return _AttrsView(self)
+
+    @attrs.setter
+    def attrs(self, value: dict[str, str] | _AttrsView):
+        if isinstance(value, _AttrsView):
+            if value._element is self:
+                return  # element.attrs |= {...}
+            value = value.copy()
+        if self._digest is not None:
+            _digest_changed()
+        self._attrs = value
+        self._attr_string = None
+
+    def _own_attrs(self) -> dict[str, str]:
+        """
+        Return our attribute dict for changes, copying a shared one
+        """
+        if self._digest is not None:
+            _digest_changed()
+        if self._attr_string is not None:
+            self._attrs = dict(self._attrs)
+            self._attr_string = None
+        return self._attrs
+
+    def _share_attrs(self):
+        """
+        Swap our attributes for the shared copy of an identical set,
+        once such a set has been seen before
+
+        Called at render, so elements which are only built cost nothing.
+        """
+        if self._attr_string is None:
+            try:
+                entry = _intern_attrs(self._attrs)
+            except TypeError:
+                return  # unhashable value set by a custom element
+            if entry is not None:
+                # Marked shared before the swap so a change never reaches it
+                self._attr_string = entry[1]
+                self._attrs = entry[0]
 
     def __eq__(self, other: Any):
-        """Compare rendered HTML instead of class data"""
-        if isinstance(other, self.__class__):
-            return self.render() == other.render()
+        """
+        Compare elements structurally: tag, attributes and children.
+
+        Adjacent text children are compared joined, so equality follows
+        the rendered output except that attribute order is ignored.
+        Comparison stops at the first difference.
+        Strings are compared to the rendered HTML.
+        """
+        if isinstance(other, BaseElement):
+            mine, theirs = self._cached_digest(), other._cached_digest()
+            if mine is not None and theirs is not None and mine != theirs:
+                return False
+            return self._structural_eq(other, None, None)
 
         if isinstance(other, str):
             return self.render() == other
 
-        return False
+        return NotImplemented
+
+    # Elements are mutable and compare equal by content
+    __hash__ = None  # type: ignore[assignment]
+
+    def content_hash(self) -> str:
+        """
+        Hex digest of the element's structure, consistent with `==`.
+
+        The digest of each element in the tree is cached until an element
+        which was hashed changes, so hashing a subtree or hashing again is
+        O(1). Trees with callables, iterators, lists passed as children or
+        other nodes which may differ per render are hashed again each time.
+        """
+        return self._content_digest(None)[0].hex()
+
+    def _cached_digest(self) -> bytes | None:
+        cached = self._digest
+        if cached is not None and cached[0] == _digest_generation:
+            return cached[1]
+        return None
+
+    def _content_digest(self, parent: ElementBase | None) -> tuple[bytes, bool]:
+        """
+        Returns the digest and whether it may be cached
+        """
+        cached = self._cached_digest()
+        if cached is not None:
+            return cached, True
+
+        generation = _digest_generation
+        stable = self._lazy_attrs is None
+        h = blake2b(digest_size=16)
+        void = "/" if self.is_void_element else ""
+        h.update(f"<{self.tag}{void}>".encode())
+        for key, value in sorted(self._final_attrs(parent).items()):
+            h.update(f"{len(key)}:{key}{len(value)}:{value}".encode())
+
+        for child in self._children:
+            if not _is_stable(child):
+                stable = False
+        for node in _merge_text(self._child_nodes(self._children, parent)):
+            if isinstance(node, str):
+                data = node.encode("utf-8", "surrogatepass")
+                h.update(b"t%d:" % len(data))
+                h.update(data)
+            else:
+                digest, node_stable = node._content_digest(self)
+                stable = stable and node_stable
+                h.update(b"e")
+                h.update(digest)
+
+        digest = h.digest()
+        if stable:
+            self._digest = (generation, digest)
+        return digest, stable
+
+    def _structural_eq(
+        self,
+        other: "BaseElement",
+        parent: ElementBase | None,
+        other_parent: ElementBase | None,
+    ) -> bool:
+        if self is other:
+            return True
+        if (
+            self.tag != other.tag
+            or self.is_void_element != other.is_void_element
+            or self._final_attrs(parent) != other._final_attrs(other_parent)
+        ):
+            return False
+
+        mine = _merge_text(self._child_nodes(self._children, parent))
+        theirs = _merge_text(other._child_nodes(other._children, other_parent))
+        for a, b in zip_longest(mine, theirs):
+            if isinstance(a, str) or isinstance(b, str):
+                if not (isinstance(a, str) and isinstance(b, str) and a == b):
+                    return False
+            elif a is None or b is None:
+                return False
+            elif not a._structural_eq(b, self, other):
+                return False
+        return True
+
+    def _child_nodes(
+        self, children: Iterable, parent: ElementBase | None
+    ) -> Generator[Any, None, None]:
+        """
+        Walk children for comparison and hashing, like _resolve_child but
+        yielding nested BaseElements instead of resolving them.
+
+        Yields escaped text and BaseElement instances.
+        """
+        for child in children:
+            child_type = type(child)
+            if child_type is str or child_type is int:
+                yield escape_text(child)
+
+            elif child is None:
+                continue
+
+            elif isinstance(child, BaseElement):
+                yield child
+
+            elif isinstance(child, ElementMeta) and not hasattr(
+                child, "__self__"
+            ):
+                yield child()
+
+            elif isinstance(child, (ElementBase, _HasHtml, str, int, float)):
+                yield "".join(self._resolve_child(child, True, parent))
+
+            elif util_funcs.is_iterable_but_not_str(child):
+                yield from self._child_nodes(child, parent)  # type: ignore[arg-type]
+
+            elif callable(child):
+                result: Node = child
+                while callable(result) and not isinstance(result, ElementMeta):
+                    result = self._call_callable(result, parent)
+                yield from self._child_nodes((result,), parent)
+
+            else:
+                raise ValueError(f"Unknown child type: {type(child)}")
+
+    def _lazy_attr_values(self, parent: ElementBase | None) -> dict[str, str]:
+        """
+        Evaluate callable attribute values
+        """
+        values: dict[str, str] = {}
+        for name, func, _ in self._lazy_attrs or ():
+            value = resolve_attr_value(
+                name,
+                cast(Resolvable, self._call_callable(func, parent)),
+                ATTR_DELIMITERS.get(name, " "),
+            )
+            if value is None:
+                continue
+            if name in values:
+                values[name] = f"{values[name]}{ATTR_MERGE[name]}{value}"
+            else:
+                values[name] = value
+        return values
+
+    def _final_attrs(self, parent: ElementBase | None) -> dict[str, str]:
+        """
+        Attributes as rendered, including callable values
+        """
+        if self._lazy_attrs is None:
+            return self._attrs
+        return self._merge_lazy_attrs(self._lazy_attr_values(parent))
+
+    def _merge_lazy_attrs(self, values: dict[str, str]) -> dict[str, str]:
+        """
+        Static and callable attribute values in declaration order
+        """
+        static = self._attrs
+        after: dict[str | None, list[str]] = {}
+        for name, _, anchor in self._lazy_attrs or ():
+            if name in values and name not in static:
+                after.setdefault(anchor, []).append(name)
+
+        attrs: dict[str, str] = {}
+        for name in after.get(None, ()):
+            attrs[name] = values[name]
+        for key, value in static.items():
+            if key in values:
+                # A callable class/style adds to the static value
+                value = f"{value}{ATTR_MERGE[key]}{values[key]}"
+            attrs[key] = value
+            for name in after.get(key, ()):
+                attrs.setdefault(name, values[name])
+        # Declared after a static value which was since replaced
+        for name, value in values.items():
+            attrs.setdefault(name, value)
+        return attrs
 
     def _process_attr(
         self, attr_name: str, attr_data: str | Resolvable | BaseAttribute | None
@@ -114,81 +628,72 @@ class BaseElement(ElementBase, metaclass=ElementMeta):
         if attr_data is None or attr_data is False:
             return  # noop
 
-        if isinstance(attr_data, BaseAttribute):
-            attr = attr_data
-        else:
-            attr_class = SPECIAL_ATTRS.get(attr_name, None)
-            if attr_class:
-                attr = attr_class(attr_data)
-            else:
-                attr = BaseAttribute(attr_name, attr_data)
-
-        result = attr.evaluate()
-        if result is not None:
-            _, resolved_value = result
-            if attr_name in self.attrs:
-                if attr_name == "class":
-                    self.attrs[attr_name] = (
-                        f"{self.attrs[attr_name]} {resolved_value}"
-                    )
-                elif attr_name == "style":
-                    self.attrs[attr_name] = (
-                        f"{self.attrs[attr_name]}; {resolved_value}"
-                    )
-                else:
-                    raise ValueError(
-                        f"Attribute {attr_name} was passed twice. "
-                        "We don't know how to merge it."
-                    )
-            else:
-                self.attrs[attr_name] = resolved_value
+        lazy_attrs = self._lazy_attrs
+        if lazy_attrs is None and callable(attr_data):
+            lazy_attrs = self._lazy_attrs = []
+        merge_attr(self._own_attrs(), attr_name, attr_data, lazy_attrs)
 
+    @staticmethod
     def _resolve_attrs(
-        self,
         attrs: Iterable[BaseAttribute]
         | Mapping[str, Resolvable]
         | Iterable[
             BaseAttribute | Iterable[BaseAttribute] | Mapping[str, Resolvable]
         ]
         | None,
+        lazy_attrs: list[LazyAttr] | None = None,
     ) -> dict[str, str]:
         """
         Resolve attributes into key/value pairs
+
+        Callable values are added to lazy_attrs as (name, callable, anchor).
+        As with dict entries, a later value replaces an earlier one.
         """
-        if not attrs:
+        if isinstance(attrs, attr_bundle):
+            if not attrs._lazy_attrs:
+                # Resolved once when the bundle was created
+                return attrs.to_dict()
+        elif not attrs:
             return {}
 
         attr_dict: dict[str, str] = {}
+
         # These are sent to us in format:
         # key, value (unescaped)
-        if isinstance(attrs, (list, tuple)):
+        if isinstance(attrs, attr_bundle):
+            _put_bundle(attr_dict, lazy_attrs, attrs)
+
+        elif isinstance(attrs, (list, tuple)):
             for item in attrs:
-                if isinstance(item, BaseAttribute):
+                if isinstance(item, attr_bundle):
+                    _put_bundle(attr_dict, lazy_attrs, item)
+                elif isinstance(item, BaseAttribute):
                     result = item.evaluate()
                     if not result:
                         continue
                     key, value = result
-                    attr_dict[key] = value
+                    _put_attr(attr_dict, lazy_attrs, key, value)
                 elif isinstance(item, tuple) and len(item) == 2:
                     # no runtime checking here, but hint the type checker
                     item = cast(tuple[str, Resolvable], item)
-
-                    attr = BaseAttribute(name=item[0], data=item[1]).evaluate()
-                    if not attr:
+                    if callable(item[1]):
+                        _put_lazy_attr(attr_dict, lazy_attrs, item[0], item[1])
                         continue
 
-                    a_name, a_value = attr
-                    attr_dict[a_name] = a_value
+                    a_value = resolve_attr_value(item[0], item[1])
+                    if a_value is not None:
+                        _put_attr(attr_dict, lazy_attrs, item[0], a_value)
                 elif isinstance(item, Mapping):
                     # no runtime checking here, but hint the type checker
                     item = cast(Mapping[str, Resolvable], item)
 
                     for key, value in item.items():  # type: ignore[assignment]
-                        attr = BaseAttribute(key, value).evaluate()
-                        if not attr:
+                        if callable(value):
+                            _put_lazy_attr(attr_dict, lazy_attrs, key, value)
                             continue
-                        a_name, a_value = attr
-                        attr_dict[a_name] = a_value
+                        a_value = resolve_attr_value(key, value)
+                        if a_value is not None:
+                            _put_attr(attr_dict, lazy_attrs, key, a_value)
                 else:
                     raise ValueError(
                         f"Unknown type for attr value: {type(item)}."
@@ -199,10 +704,12 @@ class BaseElement(ElementBase, metaclass=ElementMeta):
             attrs = cast(Mapping[str, Resolvable], attrs)
 
             for key, value in attrs.items():  # type: ignore[assignment]
-                attr = BaseAttribute(key, value).evaluate()
-                if attr:
-                    a_name, a_value = attr
-                    attr_dict[a_name] = a_value
+                if callable(value):
+                    _put_lazy_attr(attr_dict, lazy_attrs, key, value)
+                    continue
+                a_value = resolve_attr_value(key, value)
+                if a_value is not None:
+                    attr_dict[key] = a_value
 
         else:
             raise ValueError(f"Unknown: {type(attrs)}")
@@ -251,8 +758,14 @@ class BaseElement(ElementBase, metaclass=ElementMeta):
 
         If call_callables is false, callables are yielded.
         """
+        child_type = type(child)
+        if child_type is str or child_type is int:
+            # Fast path for the most common leaves.
+            # The checks below include a Protocol isinstance (_HasHtml)
+            # which is slow, and plain str/int never match it.
+            yield escape_text(child)
 
-        if child is None:
+        elif child is None:
             # null child, possibly from the callable.
             # Magic: We ignore null children for things like
             # div[
@@ -307,9 +820,12 @@ class BaseElement(ElementBase, metaclass=ElementMeta):
                 # callables are yielded instead of resolved
                 yield child  # type: ignore[misc]
             else:
-                result = child
-                while callable(result):
-                    result = self._call_callable(child, parent)  # type: ignore[assignment]
+                # Feature: a callable may return another callable,
+                # which is called in turn until we reach a node.
+                # Uninstantiated elements are left to the resolver.
+                result: Node = child
+                while callable(result) and not isinstance(result, ElementMeta):
+                    result = self._call_callable(result, parent)
 
                 yield from self._resolve_child(result, call_callables, parent)
         else:
@@ -354,6 +870,8 @@ class BaseElement(ElementBase, metaclass=ElementMeta):
         """
         if self.is_void_element:
             raise ValueError(f"Void element {self.tag} cannot have children")
+        if self._digest is not None:
+            _digest_changed()
 
         args = child_or_childs
         # Special case: We may have been passed a literal tuple
@@ -374,6 +892,32 @@ class BaseElement(ElementBase, metaclass=ElementMeta):
             # Applies to iterables, callables, literal elements
             self._children.append(args)
 
+    def extend(self, children: Iterable[Node], adopt: bool = True):
+        """
+        Append every child of an iterable to this element.
+
+        With `adopt` the iterable is stored as a single child segment
+        without copying, which is cheap for large prebuilt lists.
+        The element takes ownership: changes made to an adopted list
+        before render are visible in the output. Later `append`/`extend`
+        calls add after the segment and never modify the adopted list.
+        Generators are consumed at render, so they render once.
+
+        With `adopt=False` the children are copied in immediately.
+
+        :param children: Iterable of any acceptable children
+        :param adopt: Store the iterable itself instead of a copy
+        """
+        if self.is_void_element:
+            raise ValueError(f"Void element {self.tag} cannot have children")
+        if self._digest is not None:
+            _digest_changed()
+
+        if adopt:
+            self._children.append(children)
+        else:
+            self._children.extend(children)
+
     def deferred_resolve(
         self, parent: ElementBase | None = None
     ) -> Generator[Node, None, None]:
@@ -398,25 +942,53 @@ class BaseElement(ElementBase, metaclass=ElementMeta):
             - Callable children are not resolved in this method.
         """
 
-        # attrs is a defaultdict of strings.
-        # The key is the attr name, the value is the attr value unescaped.
-        attrs = self.attrs
-
         children = None
 
         if not self.is_void_element:
             children = [child for child in self._resolve_tree(parent)]
 
-        # join_attrs has a configurable lru_cache
-        join_attrs = self.get_attr_join()
+        # Shared attribute sets carry their key="value" string
+        if self._attr_string is None and self._attrs:
+            self._share_attrs()
+        attr_string = self._attr_string
+        attrs = self._attrs
+        dynamic = None
+        if self._lazy_attrs is not None:
+            dynamic = self._lazy_attr_values(parent)
+            last = next(reversed(attrs), None)
+            if not dynamic.keys().isdisjoint(attrs) or any(
+                anchor != last for _, _, anchor in self._lazy_attrs
+            ):
+                # Merged with static values or placed among them,
+                # in declaration order
+                attrs = self._merge_lazy_attrs(dynamic)
+                attr_string = None
+                dynamic = None
+
+        if attr_string is None:
+            # attrs is a dict of strings.
+            # The key is the attr name, the value is the attr value unescaped.
+            # join_attrs has a configurable lru_cache
+            join_attrs = self.get_attr_join()
+
+            # Generate the key="value" pairs for the attributes
+            # The value escape step lives here because we trust no
+            # previous step in the pipeline.
+            # Magic: Security: Escape all attr values
+            attr_string = " ".join(
+                (join_attrs(k, escape_text(v)) for k, v in attrs.items())
+            )
 
-        # Generate the key="value" pairs for the attributes
-        # The value escape step lives here because we trust no
-        # previous step in the pipeline.
-        # Magic: Security: Escape all attr values
-        attr_string = " ".join(
-            (join_attrs(k, escape_text(v)) for k, v in attrs.items())
-        )
+        if dynamic:
+            # Per-render values would only churn the join_attrs cache
+            dynamic_string = " ".join(
+                util_funcs.join_attrs(k, escape_text(v))
+                for k, v in dynamic.items()
+            )
+            if attr_string:
+                attr_string = f"{attr_string} {dynamic_string}"
+            else:
+                attr_string = dynamic_string
 
         if self.is_void_element:
             if attr_string:
@@ -466,8 +1038,8 @@ class BaseElement(ElementBase, metaclass=ElementMeta):
             for child in children
         )
         astring = ""
-        if self.attrs:
-            astring = f"{self.attrs}"
+        if self._attrs:
+            astring = f"{self._attrs}"
         cstring = ""
         if children:
             cstring = f"[{children_info}]"
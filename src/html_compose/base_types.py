@@ -56,6 +56,34 @@ class ElementBase:
     def render(self, parent=None) -> str:
         return "".join(self.resolve(parent))
 
+    def render_with_digest(self, parent=None) -> tuple[str, str]:
+        """
+        Render, also returning the hex content digest of the output.
+
+        See `html_compose.stream.render_with_digest`
+        """
+        from .stream import render_with_digest
+
+        return render_with_digest(self, parent)
+
+    def render_bytes(self, parent=None) -> bytes:
+        """
+        Render to UTF-8 bytes without building an intermediate string
+        """
+        from .stream import render_bytes
+
+        return render_bytes(self, parent)
+
+    def resolve_bytes(self, parent=None) -> Iterable[bytes]:
+        """
+        Yield the HTML as buffered chunks of UTF-8 bytes
+
+        See `html_compose.stream.encode_stream`
+        """
+        from .stream import encode_stream
+
+        return encode_stream(self.resolve(parent))
+
     def resolve(self, parent=None) -> Iterable[str]:
         """
         Yield all html as a generator of strings
@@ -94,4 +122,18 @@ Resolvable = (
     | StrLike
     | Iterable[StrLike]
     | Mapping[StrLike, bool]  # key-value pairs which resolve if .value is True
+    | Callable[..., "Resolvable"]  # evaluated at render, see AttrResolver
+)
+
+# An attribute value computed at render time,
+# possibly taking the element and parent element as arguments.
+AttrResolver = (
+    Callable[[], Resolvable]
+    | Callable[[ElementBase], Resolvable]
+    | Callable[[ElementBase, ElementBase], Resolvable]
 )
+
+# A callable attribute value of an element: (name, resolver, anchor).
+# The anchor is the static attribute declared just before it, or None if it
+# was declared first, so it renders in its declared position.
+LazyAttr = tuple[str, AttrResolver, str | None]
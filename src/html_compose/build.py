@@ -0,0 +1,561 @@
+"""
+Static site builder
+
+Pre-render pages to files with `html-compose build`.
+
+Pages are functions marked with `page` in a module of your choosing.
+A page returns anything renderable: an element, an `HTML5Document`,
+a string or bytes.
+
+```python
+# site.py
+from html_compose import HTML5Document, p
+from html_compose.build import page
+
+
+@page("index.html")
+def index():
+    return HTML5Document("Home", body=[p["Hello"]])
+
+
+@page(
+    "posts/{slug}.html",
+    params=lambda: [{"slug": s} for s in list_slugs()],
+    depends=lambda slug: [f"content/{slug}.md"],
+)
+def post(slug):
+    ...
+```
+
+```sh
+html-compose build site.py --out public --workers 8
+```
+
+Pages are rendered across a process pool. A file is only written when its
+content hash changed, and a page is only rendered again when one of its
+dependencies changed. Dependencies are the files named by `depends` and the
+project modules (source files below the working directory) the page function
+refers to, directly or through other project code, or imports while it
+renders. Outputs of pages which no longer exist are removed.
+Build state lives in `.html-compose-build.json` in the output directory;
+`--force` renders every page regardless.
+"""
+
+import functools
+import glob
+import hashlib
+import importlib
+import importlib.util
+import json
+import os
+import sys
+import sysconfig
+import types
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from time import perf_counter
+from typing import Any, Callable, Iterable
+
+from .base_types import _HasHtml
+
+STATE_FILE = ".html-compose-build.json"
+STATE_VERSION = 1
+
+_PAGE_ATTR = "__html_compose_page__"
+
+
+class PageSpec:
+    """
+    Build metadata attached to a page function by `page`
+    """
+
+    def __init__(
+        self,
+        path: str,
+        params: Callable[[], Iterable[dict[str, Any]]] | None = None,
+        depends: Iterable[str] | Callable[..., Iterable[str]] | None = None,
+    ):
+        self.path = path
+        self.params = params
+        self.depends = depends
+
+
+def page(
+    path: str,
+    params: Callable[[], Iterable[dict[str, Any]]] | None = None,
+    depends: Iterable[str] | Callable[..., Iterable[str]] | None = None,
+):
+    """
+    Mark a function as a page for `html-compose build`.
+
+    :param path: Output path relative to the output directory.
+                 It is formatted with each set of params, i.e.
+                 "posts/{slug}.html"
+    :param params: Returns one dict of keyword arguments per page to render.
+                   Values must be picklable.
+                   When unset the function renders one page with no arguments.
+    :param depends: Glob patterns of data files the page reads, or a function
+                    which receives the page params and returns them.
+    """
+
+    def decorator(func):
+        setattr(func, _PAGE_ATTR, PageSpec(path, params, depends))
+        return func
+
+    return decorator
+
+
+class BuildResult:
+    """
+    Pages and timing for one build
+    """
+
+    def __init__(self) -> None:
+        self.written: list[str] = []
+        self.unchanged: list[str] = []
+        self.skipped: list[str] = []
+        self.removed: list[str] = []
+        self.discover_time = 0.0
+        self.render_time = 0.0
+
+    @property
+    def rendered(self) -> int:
+        return len(self.written) + len(self.unchanged)
+
+    def summary(self) -> str:
+        total = self.discover_time + self.render_time
+        rate = self.rendered / self.render_time if self.render_time else 0.0
+        return (
+            f"Rendered {self.rendered} pages in {self.render_time:.2f}s "
+            f"({rate:.1f} pages/s): {len(self.written)} written, "
+            f"{len(self.unchanged)} unchanged, {len(self.skipped)} skipped, "
+            f"{len(self.removed)} removed. "
+            f"Total {total:.2f}s"
+        )
+
+
+def load_module(target: str):
+    """
+    Import a module by file path or dotted name
+
+    The working directory is importable so sibling modules resolve.
+    """
+    cwd = os.getcwd()
+    if cwd not in sys.path:
+        sys.path.insert(0, cwd)
+
+    if target.endswith(".py") or os.path.sep in target:
+        file_path = Path(target).resolve()
+        name = file_path.stem
+        existing = sys.modules.get(name)
+        if existing is not None:
+            existing_file = getattr(existing, "__file__", None)
+            if existing_file and Path(existing_file).resolve() == file_path:
+                return existing
+            # Don't shadow an unrelated module, i.e. the stdlib `site`
+            name = f"_html_compose_build_{name}"
+        spec = importlib.util.spec_from_file_location(name, file_path)
+        if spec is None or spec.loader is None:
+            raise ImportError(f"Cannot import {target}")
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[name] = module
+        spec.loader.exec_module(module)
+        return module
+
+    return importlib.import_module(target)
+
+
+def discover_pages(module) -> dict[str, Callable]:
+    """
+    Return page functions of a module by name
+    """
+    return {
+        name: obj
+        for name, obj in vars(module).items()
+        if callable(obj) and hasattr(obj, _PAGE_ATTR)
+    }
+
+
+def _dependency_files(spec: PageSpec, params: dict) -> list[str]:
+    depends = spec.depends
+    if depends is None:
+        return []
+    if callable(depends):
+        patterns = depends(**params)
+    elif isinstance(depends, str):
+        patterns = [depends]
+    else:
+        patterns = depends
+
+    files: set[str] = set()
+    for pattern in patterns:
+        matches = glob.glob(pattern, recursive=True)
+        # A missing file is still a dependency, it may appear later
+        files.update(matches if matches else [pattern])
+    return sorted(files)
+
+
+def _file_stamp(file: str) -> list[int] | None:
+    try:
+        st = os.stat(file)
+    except OSError:
+        return None
+    return [st.st_mtime_ns, st.st_size]
+
+
+_EXCLUDED_PREFIXES = tuple(
+    {
+        os.path.realpath(p)
+        for p in (
+            sys.prefix,
+            sys.base_prefix,
+            sysconfig.get_paths()["purelib"],
+            sysconfig.get_paths()["platlib"],
+        )
+    }
+)
+
+
+def _project_file(module) -> str | None:
+    """
+    Source file of a module relative to the working directory,
+    or None when the module is not part of the project
+    """
+    file = getattr(module, "__file__", None)
+    if not file:
+        return None
+    real = os.path.realpath(file)
+    root = os.getcwd() + os.path.sep
+    if not real.startswith(root) or real.startswith(_EXCLUDED_PREFIXES):
+        return None
+    return os.path.relpath(real)
+
+
+def _code_names(code: types.CodeType) -> set[str]:
+    # Global, attribute and import names, including nested functions
+    names = set(code.co_names)
+    for const in code.co_consts:
+        if isinstance(const, types.CodeType):
+            names |= _code_names(const)
+    return names
+
+
+def _touched_modules(func: Callable) -> set[str]:
+    """
+    Source files of the project modules a page function can reach
+
+    Starting at the page function, every global, module attribute or import
+    name its code refers to is followed into the project's functions,
+    classes and modules. Code outside the project is not followed.
+    """
+    files: set[str] = set()
+    seen: set[int] = set()
+    seen_attrs: set[tuple[int, str]] = set()
+    stack: list[tuple[Any, set[str]]] = [(func, set())]
+
+    def module_file(name: str | None) -> str | None:
+        module = sys.modules.get(name) if name else None
+        return _project_file(module) if module is not None else None
+
+    while stack:
+        obj, names = stack.pop()
+        if isinstance(obj, types.ModuleType):
+            file = _project_file(obj)
+            if file is None:
+                continue
+            files.add(file)
+            # Only the attributes the referring code uses
+            for name in names:
+                if (id(obj), name) in seen_attrs:
+                    continue
+                seen_attrs.add((id(obj), name))
+                attr = getattr(obj, name, None)
+                if attr is not None:
+                    stack.append((attr, names))
+            continue
+
+        if id(obj) in seen:
+            continue
+        seen.add(id(obj))
+
+        if isinstance(obj, type):
+            file = module_file(obj.__module__)
+            if file is None:
+                continue
+            files.add(file)
+            for attr in vars(obj).values():
+                attr = getattr(attr, "__func__", attr)
+                if isinstance(attr, (types.FunctionType, property)):
+                    stack.append((attr, set()))
+            continue
+
+        if isinstance(obj, property):
+            for accessor in (obj.fget, obj.fset, obj.fdel):
+                if accessor is not None:
+                    stack.append((accessor, set()))
+            continue
+
+        if isinstance(obj, functools.partial):
+            stack.append((obj.func, set()))
+            continue
+
+        wrapped = getattr(obj, "__wrapped__", None)
+        if wrapped is not None:
+            stack.append((wrapped, set()))
+
+        if not isinstance(obj, types.FunctionType):
+            continue
+        file = module_file(obj.__module__)
+        if file is None:
+            continue
+        files.add(file)
+
+        code_names = _code_names(obj.__code__)
+        scope = obj.__globals__
+        for name in code_names:
+            if name in scope:
+                stack.append((scope[name], code_names))
+            elif name in sys.modules:
+                # import statements inside the function
+                stack.append((sys.modules[name], code_names))
+        for cell in obj.__closure__ or ():
+            try:
+                stack.append((cell.cell_contents, code_names))
+            except ValueError:  # empty cell
+                pass
+        for default in obj.__defaults__ or ():
+            stack.append((default, set()))
+
+    return files
+
+
+def _to_bytes(result: Any) -> bytes:
+    if isinstance(result, bytes):
+        return result
+    if isinstance(result, str):
+        return result.encode("utf-8")
+    render_bytes = getattr(result, "render_bytes", None)
+    if render_bytes is not None:
+        return render_bytes()
+    if isinstance(result, _HasHtml):
+        return result.__html__().encode("utf-8")
+
+    raise TypeError(f"Page returned unsupported type {type(result)}")
+
+
+# Worker process state
+_worker_pages: dict[str, Callable] = {}
+# Page function name -> project files it reaches. Sources don't change
+# during a build, so this is computed once per function per process.
+_worker_modules: dict[str, set[str]] = {}
+# Stamps of project source files, stat'd once per process
+_worker_stamps: dict[str, list[int] | None] = {}
+
+
+def _reset_worker(pages: dict[str, Callable]):
+    _worker_pages.clear()
+    _worker_modules.clear()
+    _worker_stamps.clear()
+    _worker_pages.update(pages)
+
+
+def _init_worker(target: str):
+    _reset_worker(discover_pages(load_module(target)))
+
+
+def _render_job(job: tuple) -> tuple[str, str, bool, dict]:
+    """
+    Render one page and write it if its content changed
+
+    :return: (output path, content hash, written, dependency stamps)
+    """
+    func_name, params, out_dir, rel_path, previous_hash, data_files = job
+    func = _worker_pages[func_name]
+    before = set(sys.modules)
+    content = _to_bytes(func(**params))
+    digest = hashlib.blake2b(content, digest_size=16).hexdigest()
+
+    target = os.path.join(out_dir, rel_path)
+    written = False
+    if digest != previous_hash or not os.path.exists(target):
+        os.makedirs(os.path.dirname(target) or ".", exist_ok=True)
+        with open(target, "wb") as f:
+            f.write(content)
+        written = True
+
+    modules = _worker_modules.get(func_name)
+    if modules is None:
+        modules = _worker_modules[func_name] = _touched_modules(func)
+    # Modules first imported by this render, i.e. through importlib
+    imported = {
+        file
+        for name in sys.modules.keys() - before
+        if (file := _project_file(sys.modules[name])) is not None
+    }
+
+    deps = {f: _file_stamp(f) for f in data_files}
+    for file in modules | imported:
+        if file not in _worker_stamps:
+            _worker_stamps[file] = _file_stamp(file)
+        deps[file] = _worker_stamps[file]
+    return rel_path, digest, written, deps
+
+
+def _load_state(out_dir: str) -> dict:
+    try:
+        with open(os.path.join(out_dir, STATE_FILE), encoding="utf-8") as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if state.get("version") != STATE_VERSION:
+        return {}
+    return state.get("pages", {})
+
+
+def _save_state(out_dir: str, pages: dict):
+    os.makedirs(out_dir, exist_ok=True)
+    path = os.path.join(out_dir, STATE_FILE)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"version": STATE_VERSION, "pages": pages}, f)
+    os.replace(tmp, path)
+
+
+def _is_fresh(
+    entry: dict | None,
+    data_files: list[str],
+    target: str,
+    stamps: dict[str, list[int] | None],
+) -> bool:
+    if not entry or not os.path.exists(target):
+        return False
+    deps: dict = entry["deps"]
+    # A new file matching a dependency glob invalidates the page
+    if not set(data_files).issubset(deps):
+        return False
+    for file, stamp in deps.items():
+        if file not in stamps:
+            stamps[file] = _file_stamp(file)
+        if stamps[file] != stamp:
+            return False
+    return True
+
+
+def _output_path(out_dir: str, rel_path: str) -> str:
+    """
+    Returns the real path of a page's output file,
+    which must be inside the output directory
+    """
+    root = os.path.realpath(out_dir)
+    target = os.path.realpath(os.path.join(out_dir, rel_path))
+    if not target.startswith(root + os.path.sep):
+        raise ValueError(f"Page path {rel_path!r} is outside {out_dir!r}")
+    return target
+
+
+def _remove_output(out_dir: str, rel_path: str):
+    """
+    Remove the output of a page which no longer exists,
+    and any directories left empty by it
+    """
+    root = os.path.realpath(out_dir)
+    try:
+        target = _output_path(out_dir, rel_path)
+    except ValueError:
+        return
+    try:
+        os.remove(target)
+    except FileNotFoundError:
+        pass
+    parent = os.path.dirname(target)
+    while parent != root:
+        try:
+            os.rmdir(parent)
+        except OSError:  # Not empty
+            break
+        parent = os.path.dirname(parent)
+
+
+def build(
+    target: str,
+    out_dir: str = "build",
+    workers: int | None = None,
+    force: bool = False,
+) -> BuildResult:
+    """
+    Render every page in a module to files.
+
+    :param target: Module path (site.py) or dotted name (mysite.pages)
+    :param out_dir: Directory to write pages to
+    :param workers: Size of the process pool. Defaults to the CPU count.
+                    1 renders in this process.
+    :param force: Render every page, even if its dependencies are unchanged
+
+    :return: BuildResult with the pages written, unchanged, skipped
+             and removed
+
+    :raises ValueError: A page path resolves outside out_dir
+    """
+    result = BuildResult()
+    start = perf_counter()
+
+    pages = discover_pages(load_module(target))
+    previous = _load_state(out_dir)
+    state: dict[str, dict] = {}
+    # Many pages share dependencies, stat each file once per build
+    stamps: dict[str, list[int] | None] = {}
+    jobs = []
+    for func_name, func in pages.items():
+        spec: PageSpec = getattr(func, _PAGE_ATTR)
+        param_sets = spec.params() if spec.params else [{}]
+        for params in param_sets:
+            rel_path = spec.path.format(**params)
+            # Params may come from data, i.e. a slug of "../x"
+            target_file = _output_path(out_dir, rel_path)
+            data_files = _dependency_files(spec, params)
+            entry = previous.get(rel_path)
+            if not force and _is_fresh(entry, data_files, target_file, stamps):
+                assert entry is not None
+                result.skipped.append(rel_path)
+                state[rel_path] = entry
+                continue
+            previous_hash = entry["hash"] if entry else None
+            jobs.append(
+                (
+                    func_name,
+                    params,
+                    out_dir,
+                    rel_path,
+                    previous_hash,
+                    data_files,
+                )
+            )
+
+    result.discover_time = perf_counter() - start
+    start = perf_counter()
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    if workers <= 1 or len(jobs) <= 1:
+        _reset_worker(pages)
+        outputs = [_render_job(job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(
+            max_workers=workers, initializer=_init_worker, initargs=(target,)
+        ) as pool:
+            chunksize = max(1, len(jobs) // (workers * 8))
+            outputs = list(pool.map(_render_job, jobs, chunksize=chunksize))
+
+    for rel_path, digest, written, deps in outputs:
+        (result.written if written else result.unchanged).append(rel_path)
+        state[rel_path] = {"hash": digest, "deps": deps}
+
+    for rel_path in previous.keys() - state.keys():
+        _remove_output(out_dir, rel_path)
+        result.removed.append(rel_path)
+    result.removed.sort()
+
+    result.render_time = perf_counter() - start
+    _save_state(out_dir, state)
+    return result
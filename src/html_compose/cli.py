@@ -62,6 +62,84 @@ def parse_html_translate(parser):
     )
 
 
+def parse_build(parser):
+    parser.add_argument(
+        "module", help="Module with page functions: a .py path or dotted name"
+    )
+    parser.add_argument(
+        "-o", "--out", default="build", help="Output directory (default: build)"
+    )
+    parser.add_argument(
+        "-j",
+        "--workers",
+        type=int,
+        default=None,
+        help="Render processes (default: CPU count)",
+    )
+    parser.add_argument(
+        "-f",
+        "--force",
+        action="store_true",
+        help="Render all pages, ignoring previous build state",
+    )
+
+
+def run_build(args):
+    from . import build
+
+    result = build.build(
+        args.module, out_dir=args.out, workers=args.workers, force=args.force
+    )
+    print(result.summary())
+
+
+def parse_manifest(parser):
+    parser.add_argument(
+        "base_dir",
+        nargs="?",
+        default=".",
+        help="Static files directory, resource.settings.base_dir",
+    )
+    parser.add_argument(
+        "-o",
+        "--out",
+        default=None,
+        help="Manifest file (default: manifest.json in base_dir)",
+    )
+    parser.add_argument(
+        "-j",
+        "--workers",
+        type=int,
+        default=None,
+        help="Hashing threads (default: CPU count)",
+    )
+    parser.add_argument(
+        "--sri",
+        action="store_true",
+        help='Also compute SRI hashes, as used by hash="auto"',
+    )
+
+
+def run_manifest(args):
+    import os
+
+    from .resource.manifest import AssetManifest
+
+    out = args.out or os.path.join(args.base_dir, "manifest.json")
+    try:
+        # Unchanged files keep their fingerprint
+        manifest = AssetManifest.load(out, args.base_dir, frozen=False)
+    except (OSError, ValueError):
+        manifest = AssetManifest(args.base_dir)
+    hashed = manifest.scan(
+        workers=args.workers,
+        exclude=[os.path.relpath(out, args.base_dir)],
+        sri=args.sri,
+    )
+    manifest.save(out)
+    print(f"{len(manifest.files)} files, {hashed} hashed: {out}")
+
+
 def html_convert():
     parser = argparse.ArgumentParser(description="HTML to python translator")
     parse_html_translate(parser)
@@ -71,11 +149,18 @@ def html_convert():
 
 def cli():
     """
-    Command-line tool to translate HTML to Python code using html_compose
+    Command-line tool for html_compose
+
+    `convert` translates HTML to Python code, reading from stdin by default
+    but accepting an optional filename as argument.
+
+    `build` renders the page functions of a module to static files.
 
-    This function reads from stdin by default, but accepts an optional filename as argument
+    `manifest` fingerprints static files for cache busting in production.
     """
     HTML_CONVERT = "convert"
+    BUILD = "build"
+    MANIFEST = "manifest"
     parser = argparse.ArgumentParser(description="html-compose cli")
     subparsers = parser.add_subparsers(dest="command")
 
@@ -83,8 +168,23 @@ def cli():
         HTML_CONVERT, help="Translate HTML to html-compose"
     )
     parse_html_translate(html_parser)
+
+    build_parser = subparsers.add_parser(
+        BUILD, help="Render page functions of a module to static files"
+    )
+    parse_build(build_parser)
+
+    manifest_parser = subparsers.add_parser(
+        MANIFEST, help="Write content fingerprints of static files"
+    )
+    parse_manifest(manifest_parser)
+
     args = parser.parse_args()
     if args.command == HTML_CONVERT:
         from_html(args)
+    elif args.command == BUILD:
+        run_build(args)
+    elif args.command == MANIFEST:
+        run_manifest(args)
     else:
         parser.print_help()
@@ -0,0 +1,172 @@
+"""
+CSS and JS scoped to components
+
+A component declares the styles and scripts it needs next to its markup,
+and a page only ships the ones of the components it actually renders:
+
+```python
+from html_compose import component_assets, div, h2
+
+card_assets = component_assets(
+    css=".card { border: 1px solid; padding: 1em }",
+    js="customElements.define('x-card', class extends HTMLElement {})",
+)
+
+
+def card(title, *content):
+    return div(class_="card")[card_assets, h2[title], content]
+```
+
+`component_assets` renders to nothing in place. While a document renders,
+`document_streamer` collects every one it meets and emits each once:
+
+* at the end of the body when the head is streamed first, since it was
+  sent before the body rendered
+* in the head when the whole document is rendered at once, i.e. by
+  `document_generator` or `HTML5Document.render`
+
+`Layout` collects the assets of its template once, when it is created,
+and puts them in its head. Assets of slot contents go at the end of the
+body.
+
+The `<style>`/`<script>` markup is rendered when the assets are declared,
+so collecting them on a page is a dictionary insert. Assets are told apart
+by a hash of their content, so equal declarations are emitted once.
+Assets inside a `static_fragment` are not collected.
+"""
+
+import hashlib
+from typing import Generator, Iterable
+
+from . import elements as el
+from . import unsafe_text
+from .base_types import ElementBase
+from .csp import NONCE
+from .stream import StreamMarker
+
+
+class _AssetsChunk(StreamMarker):
+    assets: "_PageAsset"
+
+
+class _PageAsset(ElementBase):
+    """
+    Pre-rendered markup collected once per page, see `collect_assets`
+
+    Assets with `sprite` set are SVG symbols for the page's icon sprite,
+    see `html_compose.icons`. Others are styles and scripts.
+    """
+
+    __slots__ = ("key", "html", "nonce_html", "_chunk")
+
+    sprite = False
+
+    def _set_html(self, html: str, nonce_html: str) -> None:
+        self.html = html
+        self.nonce_html = nonce_html
+        self.key = hashlib.blake2b(
+            html.encode("utf-8"), digest_size=16
+        ).hexdigest()
+        self._chunk = _AssetsChunk("")
+        self._chunk.assets = self
+
+    def resolve(self, parent=None) -> Generator[str, None, None]:
+        yield self._chunk
+
+
+def _escape_inline(text: str) -> str:
+    """
+    Keep inline code from closing its element early
+    """
+    return text.replace("</", "<\\/")
+
+
+class component_assets(_PageAsset):
+    """
+    Styles and scripts used by a component, emitted once per page.
+    """
+
+    __slots__ = ()
+
+    def __init__(
+        self,
+        css: str | None = None,
+        js: str | None = None,
+        module: bool = False,
+    ) -> None:
+        """
+        :param css: Stylesheet text, emitted as a `<style>` element
+        :param js: Script text, emitted as a `<script>` element
+        :param module: Emit the script as `type="module"`,
+                       which also defers it until the page is parsed
+        """
+        # The second with the csp.NONCE placeholder, for pages with a nonce
+        self._set_html(
+            self._render(css, js, module, None),
+            self._render(css, js, module, NONCE),
+        )
+
+    @staticmethod
+    def _render(
+        css: str | None, js: str | None, module: bool, nonce: str | None
+    ) -> str:
+        parts = []
+        if css:
+            style = el.style(nonce=nonce)
+            parts.append(style[unsafe_text(_escape_inline(css))].render())
+        if js:
+            script = el.script(type="module" if module else None, nonce=nonce)
+            parts.append(script[unsafe_text(_escape_inline(js))].render())
+        return "".join(parts)
+
+    def __repr__(self) -> str:
+        return f"component_assets({self.html!r})"
+
+
+def collect_assets(
+    chunks: Iterable[str], found: dict[str, _PageAsset]
+) -> Generator[str, None, None]:
+    """
+    Pass rendered chunks through, taking out component assets
+    and icon symbols
+
+    :param chunks: Rendered output, i.e. from `resolve()`
+    :param found: Assets by key, in order of first use.
+                  Assets already in it are not added again.
+    """
+    for chunk in chunks:
+        if type(chunk) is _AssetsChunk:
+            assets = chunk.assets
+            if assets.key not in found:
+                found[assets.key] = assets
+        else:
+            yield chunk
+
+
+def render_assets(assets: Iterable[_PageAsset], nonce: bool = False) -> str:
+    """
+    Return the markup of collected styles and scripts
+
+    :param nonce: With the `csp.NONCE` placeholder
+    """
+    if nonce:
+        return "".join(a.nonce_html for a in assets if not a.sprite)
+    return "".join(a.html for a in assets if not a.sprite)
+
+
+def render_sprite(assets: Iterable[_PageAsset]) -> str:
+    """
+    Return the hidden SVG sprite holding the collected icon symbols,
+    or "" if there are none
+
+    The sprite is sized to nothing and taken out of the layout instead of
+    `display:none`, which would stop browsers from rendering gradients,
+    clip paths, masks and filters defined in the symbols.
+    """
+    symbols = "".join(a.html for a in assets if a.sprite)
+    if not symbols:
+        return ""
+    return (
+        '<svg xmlns="http://www.w3.org/2000/svg" aria-hidden="true" '
+        f'width="0" height="0" style="position:absolute">{symbols}</svg>'
+    )
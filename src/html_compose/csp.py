@@ -0,0 +1,98 @@
+"""
+Content Security Policy nonces in cached markup
+
+A strict CSP allows inline `<script>`/`<style>` elements only if they carry
+the nonce of the response. The nonce changes per request, which would
+make every fragment with a script per-request content.
+
+Instead, markup carries the `NONCE` placeholder and the real nonce is
+substituted while the page streams:
+
+```python
+from html_compose import script
+from html_compose.csp import NONCE, apply_nonce, generate_nonce
+from html_compose.stream import static_fragment
+
+analytics = static_fragment(script(nonce=NONCE)["track()"])  # rendered once
+
+nonce = generate_nonce()
+headers["Content-Security-Policy"] = f"script-src 'nonce-{nonce}'"
+for chunk in apply_nonce(page.resolve(), nonce):
+    send(chunk)
+```
+
+Only a rendered ` nonce="<NONCE>"` attribute is substituted. The placeholder
+anywhere else, i.e. in escaped user text or another attribute's value, is
+left as it is, so the nonce never ends up in page content where CSS
+selectors or dangling markup could read it.
+
+A `static_fragment` is split at its placeholders once, the parts between
+them keep their cached encoded and compressed forms.
+
+`document_streamer(nonce=...)`, `HTML5Document.stream(nonce=...)` and
+`Layout(nonce=True)` with `Layout.stream(nonce=...)` add the placeholder
+to the scripts and styles they generate (resource imports, the import
+map, component assets and the livereload script) and substitute it.
+"""
+
+import re
+import secrets
+from typing import Generator, Iterable
+
+from .stream import StreamMarker, _FragmentChunk
+
+NONCE = "hc-csp-nonce-placeholder"
+"""Placeholder for the per-request nonce, i.e. `script(nonce=NONCE)`"""
+
+# The placeholder as rendered in a nonce attribute. Attribute values are
+# escaped, so text and other attributes can't contain the quotes.
+_NONCE_ATTR = f' nonce="{NONCE}"'
+
+# base64 and base64url characters, a nonce is inserted without escaping
+_VALID_NONCE = re.compile(r"[A-Za-z0-9+/_=-]+")
+
+
+def generate_nonce() -> str:
+    """
+    Return a new random nonce (128 bits, base64url)
+    """
+    return secrets.token_urlsafe(16)
+
+
+def apply_nonce(
+    chunks: Iterable[str], nonce: str
+) -> Generator[str, None, None]:
+    """
+    Substitute the nonce for `NONCE` in rendered nonce attributes
+
+    :param chunks: Output of `resolve()`, `document_streamer`
+                   or any iterable of str
+    :param nonce: The nonce of this response, as in the CSP header
+    """
+    if not _VALID_NONCE.fullmatch(nonce):
+        raise ValueError(f"Invalid CSP nonce {nonce!r}, expected base64")
+    return _apply_nonce(chunks, nonce)
+
+
+def _apply_nonce(
+    chunks: Iterable[str], nonce: str
+) -> Generator[str, None, None]:
+    nonce_attr = f' nonce="{nonce}"'
+    for chunk in chunks:
+        if isinstance(chunk, StreamMarker):
+            if isinstance(chunk, _FragmentChunk):
+                parts = chunk.fragment.split(_NONCE_ATTR)
+                if len(parts) > 1:
+                    for i, part in enumerate(parts):
+                        if i:
+                            yield nonce_attr
+                        if part.html:
+                            yield from part.resolve()
+                    continue
+            # Other markers carry meaning for later stages
+            yield chunk
+        elif _NONCE_ATTR in chunk:
+            # str.replace: Markup.replace would escape the attribute
+            yield str.replace(chunk, _NONCE_ATTR, nonce_attr)
+        else:
+            yield chunk
@@ -1,8 +1,22 @@
-from typing import Any, Generator, Iterable, Literal, TypeAlias
+from itertools import chain, islice
+from os import getenv
+from typing import Any, Callable, Generator, Iterable, Literal, TypeAlias, cast
 from urllib.parse import urlencode
 
 from . import base_types, doctype, pretty_print, resource, unsafe_text
 from . import elements as el
+from .above_fold import above_the_fold_copy
+from .base_element import BaseElement
+from .base_types import ElementBase
+from .component import (
+    _AssetsChunk,
+    _PageAsset,
+    collect_assets,
+    render_assets,
+    render_sprite,
+)
+from .csp import NONCE, apply_nonce
+from .stream import StreamMarker, digest_stream, encode_stream, static_fragment
 from .util_funcs import get_livereload_env
 
 Node: TypeAlias = base_types.Node
@@ -16,6 +30,8 @@ def generate_head(
     | None = None,
     extra: Iterable[Node] | None = None,
     skip_meta: bool = False,
+    preload: Iterable[Node] | None = None,
+    nonce: bool = False,
 ) -> el.head:
     """
     Generate a head element with common imports and arguments.
@@ -28,12 +44,17 @@ def generate_head(
     :param fonts: A list of font imports to include in the head
     :param extra: Any extra elements to include at the end of the head
     :param skip_meta: Skip the meta viewport tag
+    :param preload: Preload links placed before the other imports,
+                    i.e. from `above_fold.above_the_fold`
+    :param nonce: Add the `csp.NONCE` placeholder to the generated
+                  scripts and styles, see `document_streamer`
 
     :return: A head element with the specified imports and title
     """
-    head_elements: list[Node] = resource.to_elements(
-        js=js, css=css, fonts=fonts
-    )
+    # Rendered once per set of resources
+    head_elements: list[Node] = [
+        resource.to_html(js=js, css=css, fonts=fonts, nonce=nonce)
+    ]
     if extra:
         head_elements.extend(extra)
 
@@ -44,6 +65,7 @@ def generate_head(
         if not skip_meta
         else None,
         el.title()[title] if title else None,
+        preload,
         head_elements,
     ]
 
@@ -53,6 +75,8 @@ def document_streamer(
     head: Iterable[Node] | el.head | None = None,
     body: Iterable[Node] | el.body | None = None,
     stream_mode: Literal["head_only", "full"] = "head_only",
+    assets: Literal["head", "body"] = "body",
+    nonce: str | None = None,
 ) -> Generator[str, Any, None]:
     """
     Return a full HTML5 document as a generator, yielding parts as strings.
@@ -83,44 +107,148 @@ def document_streamer(
     :param stream_mode: If set, return a generator that yields parts of the document.
                         "head_only" yields the head, then full body,
                         "full" yields the entire document in parts.
+    :param assets: Where `component_assets` used in the document go.
+                   "body" emits them at the end of the body, so the head
+                   is yielded first. "head" renders the body before
+                   yielding the head, to emit them in the head.
+                   Icons, see `html_compose.icons`, always go in a
+                   sprite at the end of the body.
+    :param nonce: CSP nonce of the response. It is set on the generated
+                  scripts and styles, and substituted for every
+                  `csp.NONCE` placeholder in the document.
 
     :return: A generator that yields parts of the HTML5 document as strings
     """
+    parts = _document_parts(
+        lang, head, body, stream_mode, assets, nonce is not None
+    )
+    if nonce is None:
+        return parts
+    return apply_nonce(parts, nonce)
+
+
+def _document_parts(
+    lang: str | None,
+    head: Iterable[Node] | el.head | None,
+    body: Iterable[Node] | el.body | None,
+    stream_mode: Literal["head_only", "full"],
+    assets: Literal["head", "body"],
+    nonce: bool,
+) -> Generator[str, Any, None]:
+    """
+    The parts of `document_streamer`, with nonce placeholders
+    """
+    if stream_mode not in ("head_only", "full"):
+        raise ValueError("stream_mode must be 'head_only' or 'full'")
     # Enable HTML5 and prevent quirks mode
     header = doctype("html")
     if isinstance(head, el.head):
         head_el = head
     else:
-        head_el = generate_head(extra=head)
-    # None if disabled
-    live_reload_flags = get_livereload_env()
+        head_el = generate_head(extra=head, nonce=nonce)
+    # Setup the body element
+    if isinstance(body, el.body):
+        body_el = body
+    else:
+        body_el = el.body()[body]
+
+    # Component assets and icon symbols by key, collected as the body
+    # renders
+    found: dict[str, _PageAsset] = {}
+    body_parts: Iterable[str] = collect_assets(body_el.resolve(), found)
+    head_insert = ""
+    if assets == "head":
+        body_parts = list(body_parts)
+        head_insert = render_assets(found.values(), nonce)
+    elif assets != "body":
+        raise ValueError("assets must be 'head' or 'body'")
+
+    head_html = head_el.render()
     # Feature: Live reloading for development
     # Fires when HTMLCOMPOSE_LIVERELOAD=1
-    if live_reload_flags:
-        head_el.append(_livereload_script_tag(live_reload_flags))
+    # None if disabled
+    live_reload_script = _livereload_script(nonce)
+    if live_reload_script:
+        head_insert += live_reload_script
+    if head_insert:
+        # Added to the rendered head so a reused head element isn't changed
+        head_html = f"{head_html[: -len('</head>')]}{head_insert}</head>"
     # Produce our HTML element and save its parts
     html_el = el.html(lang=lang).resolve()
     html_el_start = next(html_el)
     html_el_end = next(html_el)
     # Yield up until end of the head element
-    yield f"{header}\n{html_el_start}\n{head_el.render()}\n\n"
+    yield f"{header}\n{html_el_start}\n{head_html}\n\n"
 
-    # Setup the body element
-    if isinstance(body, el.body):
-        body_el = body
-    else:
-        body_el = el.body()[body]
+    # Icons go in a sprite at the end of the body either way
+    body_parts = _assets_before_end(
+        body_parts, found, nonce, scripts=assets == "body"
+    )
     if stream_mode == "full":
         # Resolve in pieces
-        for body_part in body_el.resolve():
-            yield body_part
+        yield from body_parts
         yield "\n"
         yield html_el_end
-    elif stream_mode == "head_only":
-        # Resolve all at once
-        yield f"{body_el.render()}\n{html_el_end}"
     else:
-        raise ValueError("stream_mode must be 'head_only' or 'full'")
+        # Resolve all at once
+        yield f"{''.join(body_parts)}\n{html_el_end}"
+
+
+def _assets_before_end(
+    parts: Iterable[str],
+    found: dict[str, _PageAsset],
+    nonce: bool,
+    scripts: bool,
+) -> Generator[str, None, None]:
+    """
+    Yield rendered body parts, with the collected icon sprite before the
+    last part, the closing tag
+
+    :param scripts: Also add the component styles and scripts
+    """
+    end = None
+    for part in parts:
+        if end is not None:
+            yield end
+        end = part
+    if found:
+        html = render_sprite(found.values())
+        if scripts:
+            html = render_assets(found.values(), nonce) + html
+        if html:
+            yield html
+    if end is not None:
+        yield end
+
+
+def document_streamer_bytes(
+    lang: str | None = None,
+    head: Iterable[Node] | el.head | None = None,
+    body: Iterable[Node] | el.body | None = None,
+    stream_mode: Literal["head_only", "full"] = "head_only",
+    assets: Literal["head", "body"] = "body",
+    nonce: str | None = None,
+) -> Generator[bytes, Any, None]:
+    """
+    Return a full HTML5 document as a generator of UTF-8 bytes.
+
+    Arguments are the same as `document_streamer`.
+    In "head_only" mode the head is yielded on its own before the body,
+    in "full" mode output is buffered into larger writes.
+
+    :return: A generator that yields parts of the HTML5 document as bytes
+    """
+    return encode_stream(
+        document_streamer(
+            lang=lang,
+            head=head,
+            body=body,
+            stream_mode=stream_mode,
+            assets=assets,
+            nonce=nonce,
+        ),
+        flush_each=stream_mode == "head_only",
+    )
 
 
 def document_generator(
@@ -157,7 +285,9 @@ def document_generator(
 
     """
     return "".join(
-        document_streamer(lang=lang, head=head, body=body, stream_mode="full")
+        document_streamer(
+            lang=lang, head=head, body=body, stream_mode="full", assets="head"
+        )
     )
 
 
@@ -176,9 +306,46 @@ def get_livereload_uri() -> str:
     return f"cdn.jsdelivr.net/npm/livereload-js@{VERSION}/dist/livereload.js"
 
 
-def _livereload_script_tag(live_reload_settings):
+# (livereload uri, flags env var, nonce) -> rendered script
+_livereload_cache: dict[tuple, str | None] = {}
+
+
+def _livereload_script(nonce: bool = False) -> str | None:
+    """
+    Rendered livereload script or None if livereload is disabled
+
+    Cached on the livereload environment variables, which are only parsed
+    when they change.
+
+    :param nonce: With the `csp.NONCE` placeholder
+    """
+    key = (
+        get_livereload_uri(),
+        getenv("HTMLCOMPOSE_LIVERELOAD"),
+        getenv("HTMLCOMPOSE_LIVERELOAD_FLAGS"),
+        nonce,
+    )
+    try:
+        return _livereload_cache[key]
+    except KeyError:
+        pass
+
+    live_reload_flags = get_livereload_env()
+    script = None
+    if live_reload_flags:
+        script = _livereload_script_tag(live_reload_flags, nonce).render()
+    # Settings rarely change, keep the latest (with and without nonce)
+    if key[:3] != next(iter(_livereload_cache), key)[:3]:
+        _livereload_cache.clear()
+    _livereload_cache[key] = script
+    return script
+
+
+def _livereload_script_tag(live_reload_settings, nonce: bool = False):
     """
     Returns a script tag which injects livereload.js.
+
+    :param nonce: Add the `csp.NONCE` placeholder
     """
     # Fires when HTMLCOMPOSE_LIVERELOAD=1
     # Livereload: https://github.com/livereload/livereload-js
@@ -199,18 +366,17 @@ def _livereload_script_tag(live_reload_settings):
         uri_encoded_flags = urlencode({"host": host, "port": port})
 
     # This scriptlet auto-inserts the livereload script and detects protocol
-    return el.script()[
-        unsafe_text(
-            "\n".join(
-                [
-                    "(function(){",
-                    'var s = document.createElement("script");',
-                    f"s.src = location.protocol + '//{uri}?{uri_encoded_flags}';",
-                    "document.head.appendChild(s)",
-                    "})()",
-                ]
-            )
-        )
+    lines = ["(function(){", 'var s = document.createElement("script");']
+    if nonce:
+        # The injected script needs the nonce as well
+        lines.append("s.nonce = document.currentScript.nonce;")
+    lines += [
+        f"s.src = location.protocol + '//{uri}?{uri_encoded_flags}';",
+        "document.head.appendChild(s)",
+        "})()",
+    ]
+    return el.script(nonce=NONCE if nonce else None)[
+        unsafe_text("\n".join(lines))
     ]
 
 
@@ -237,6 +403,7 @@ class HTML5Document:
         | None = None,
         head_extra: Iterable[Node] | None = None,
         body: Iterable[Node] | el.body | None = None,
+        above_fold: int | None = None,
     ) -> None:
         """
 
@@ -248,6 +415,9 @@ class HTML5Document:
         :param fonts: A list of font imports to include in the head
         :param head_extra: Additional elements to include in the head
         :param body: A 'body' element or a list of elements to include in the body
+        :param above_fold: Number of images/iframes in the body to load with
+                           high priority and preload, the rest load lazily.
+                           See `above_fold.above_the_fold`.
         :param stream_mode: If set, return a generator that yields parts of the document.
                             "head_only" yields the head, then full body,
                             "full" yields the entire document in parts.
@@ -262,15 +432,65 @@ class HTML5Document:
             self.body = body
         else:
             self.body = el.body()[body]
-
-    def render(self) -> str:
+        # Applied once, the preload links are reused by every render
+        self.preload: list[el.link] | None = None
+        if above_fold is not None:
+            # The caller's elements are left as they are
+            body_el, self.preload = above_the_fold_copy(self.body, above_fold)
+            self.body = cast(el.body, body_el)
+
+    def render(self, nonce: str | None = None) -> str:
         """
         Return the full HTML5 document as a string.
+
+        :param nonce: CSP nonce of the response, see `document_streamer`
+        """
+        return "".join(
+            self.stream(stream_mode="full", assets="head", nonce=nonce)
+        )
+
+    def render_with_digest(self) -> tuple[str, str]:
         """
-        return "".join(self.stream(stream_mode="full"))
+        Return the full HTML5 document and the hex digest of its content.
+
+        See `html_compose.stream` for details on the digest.
+        """
+        stream = digest_stream(self.stream(stream_mode="full", assets="head"))
+        html = "".join(stream)  # type: ignore[arg-type]
+        return html, stream.hexdigest()
+
+    def render_bytes(self, nonce: str | None = None) -> bytes:
+        """
+        Return the full HTML5 document as UTF-8 bytes.
+
+        :param nonce: CSP nonce of the response, see `document_streamer`
+        """
+        return b"".join(
+            encode_stream(
+                self.stream(stream_mode="full", assets="head", nonce=nonce)
+            )
+        )
+
+    def stream_bytes(
+        self,
+        stream_mode: Literal["head_only", "full"] = "head_only",
+        assets: Literal["head", "body"] = "body",
+        nonce: str | None = None,
+    ) -> Generator[bytes, Any, None]:
+        """
+        Return a generator that yields parts of the HTML5 document as
+        UTF-8 bytes. See `stream`.
+        """
+        return encode_stream(
+            self.stream(stream_mode=stream_mode, assets=assets, nonce=nonce),
+            flush_each=stream_mode == "head_only",
+        )
 
     def stream(
-        self, stream_mode: Literal["head_only", "full"] = "head_only"
+        self,
+        stream_mode: Literal["head_only", "full"] = "head_only",
+        assets: Literal["head", "body"] = "body",
+        nonce: str | None = None,
     ) -> Generator[str, Any, None]:
         """
         Return a generator that yields parts of the HTML5 document as strings.
@@ -278,6 +498,8 @@ class HTML5Document:
         :param stream_mode: Parts of the document to stream. If "head_only",
                             we yield the head, then the full body.
                             If "full", we yield the entire document in parts.
+        :param assets: Where `component_assets` go, see `document_streamer`
+        :param nonce: CSP nonce of the response, see `document_streamer`
 
         :return: A generator that yields parts of the HTML5 document as strings.
         """
@@ -289,9 +511,13 @@ class HTML5Document:
                 css=self.css,
                 fonts=self.fonts,
                 extra=self.head_extra,
+                preload=self.preload,
+                nonce=nonce is not None,
             ),
             body=self.body,
             stream_mode=stream_mode,
+            assets=assets,
+            nonce=nonce,
         )
 
     def __html__(self) -> str:
@@ -302,3 +528,388 @@ class HTML5Document:
 
     def __repr__(self) -> str:
         return pretty_print(str(self))
+
+
+class _SlotChunk(StreamMarker):
+    slot: "layout_slot"
+    parent: ElementBase | None
+
+
+class _PartChunk(StreamMarker):
+    render: Callable[[], str | None]
+
+
+class _layout_part(ElementBase):
+    """
+    Layout content which is looked up on every render instead of being
+    compiled into the static fragments
+    """
+
+    __slots__ = ("render",)
+
+    def __init__(self, render: Callable[[], str | None]) -> None:
+        self.render = render  # type: ignore[assignment]
+
+    def resolve(self, parent=None) -> Generator[str, None, None]:
+        chunk = _PartChunk("")
+        chunk.render = self.render  # type: ignore[assignment]
+        yield chunk
+
+
+def _slot_owners(
+    root: BaseElement, parent: ElementBase | None
+) -> dict[int, ElementBase | None]:
+    """
+    Map each `layout_slot` in a template, by id, to the parent of the
+    element which holds it
+
+    Only element children, lists and tuples are walked. Callables and
+    iterators are left alone, they are consumed by the render.
+    """
+    owners: dict[int, ElementBase | None] = {}
+    stack: list[tuple[Iterable, BaseElement, ElementBase | None]] = [
+        (root._children, root, parent)
+    ]
+    while stack:
+        children, element, element_parent = stack.pop()
+        for child in children:
+            if isinstance(child, layout_slot):
+                owners[id(child)] = element_parent
+            elif isinstance(child, BaseElement):
+                stack.append((child._children, child, element))
+            elif isinstance(child, (list, tuple)):
+                stack.append((child, element, element_parent))
+    return owners
+
+
+class layout_slot(ElementBase):
+    """
+    A named placeholder in a `Layout`, filled with new content per render.
+    """
+
+    __slots__ = ("name", "default")
+
+    def __init__(self, name: str, default: Node = None) -> None:
+        """
+        :param name: Keyword used to fill the slot in `Layout.stream`
+        :param default: Rendered when no value is passed for the slot.
+                        It is rendered per request, callables included.
+        """
+        self.name = name
+        self.default = default
+
+    def resolve(self, parent=None) -> Generator[str, None, None]:
+        chunk = _SlotChunk("")
+        chunk.slot = self
+        chunk.parent = parent
+        yield chunk
+
+    def __repr__(self) -> str:
+        return f"layout_slot({self.name!r})"
+
+
+class Layout:
+    """
+    A document rendered once, with named slots filled per request.
+
+    Everything outside of the slots, i.e. the doctype, `<html>`, the head
+    with its resources and any static body markup, is rendered when the
+    layout is created and kept as `static_fragment`s. A render only
+    resolves the slot contents, so it costs about as much as rendering
+    the body alone.
+
+    ```python
+    from html_compose import Layout, layout_slot, main, nav, p
+
+    site = Layout(
+        title="Site",
+        lang="en",
+        css=["/static/site.css"],
+        body=[nav[...], main[layout_slot("body")]],
+    )
+
+    site.stream(title="Home", body=[p["Hello"]])
+    ```
+
+    The slots are "title" (the title text, defaults to the layout title),
+    "head" (after the other head content) and "body" (the body content,
+    unless a `body` template places slots itself). Any `layout_slot` in
+    `head_extra` or `body` is another slot, filled by its name.
+
+    Callables outside of slots are called once, when the layout is
+    created. The resource block of the head and the livereload script are
+    looked up per render, so cache-busted URIs and `hash="auto"` SRI hashes
+    follow file changes as they do for `HTML5Document`.
+
+    `component_assets` of the template are emitted in the head, those of
+    slot contents at the end of the body. The icon sprite, see
+    `html_compose.icons`, is built per render from the icons of the
+    template and the slot contents.
+
+    With `nonce=True` the generated scripts and styles carry the
+    `csp.NONCE` placeholder, and each render substitutes the nonce it is
+    given, so the layout stays precompiled under a strict CSP.
+    """
+
+    def __init__(
+        self,
+        title: str | None = None,
+        lang: str | None = None,
+        js: Iterable[str | resource.js_import] | None = None,
+        css: Iterable[str | resource.css_import] | None = None,
+        fonts: Iterable[
+            resource.font_import_manual | resource.font_import_provider
+        ]
+        | None = None,
+        head_extra: Iterable[Node] | None = None,
+        body: Iterable[Node] | el.body | None = None,
+        above_fold: int | None = None,
+        nonce: bool = False,
+    ) -> None:
+        """
+        :param title: Default document title
+        :param lang: The language of the document.
+                     English is "en", or consult HTML documentation
+        :param js: A list of javascript imports to include in the head
+        :param css: A list of CSS imports to include in the head
+        :param fonts: A list of font imports to include in the head
+        :param head_extra: Additional elements to include in the head
+        :param body: A 'body' element or a list of elements to include in the
+                     body, with `layout_slot`s for the per-request content.
+                     Defaults to a single "body" slot.
+        :param above_fold: Number of images/iframes in the body template to
+                           load with high priority and preload, the rest
+                           load lazily. Slot contents are not included.
+                           See `above_fold.above_the_fold`.
+        :param nonce: Renders take a CSP nonce, see `stream`
+        """
+        self.nonce = nonce
+        if body is None:
+            body = [layout_slot("body")]
+        body_el = body if isinstance(body, el.body) else el.body()[body]
+        preload = None
+        if above_fold is not None:
+            new_body, preload = above_the_fold_copy(body_el, above_fold)
+            body_el = cast(el.body, new_body)
+
+        html_el_root = el.html(lang=lang)
+        html_el = html_el_root.resolve()
+        html_el_start = next(html_el)
+        html_el_end = next(html_el)
+
+        # Component assets used by the template, emitted in the head
+        self._assets: dict[str, _PageAsset] = {}
+        body_chunks = list(body_el.resolve())
+        self._body = self._compile(body_chunks[:-1], self._assets)
+        # The closing tag, slot contents add their assets before it
+        self._body_end = static_fragment(
+            unsafe_text(f"{body_chunks[-1]}\n{html_el_end}")
+        )
+
+        head_extra = list(head_extra) if head_extra else []
+        if self._assets:
+            head_extra.append(
+                unsafe_text(render_assets(self._assets.values(), nonce))
+            )
+        head_extra.append(_layout_part(lambda: _livereload_script(nonce)))
+        head_extra.append(layout_slot("head"))
+        # Same order as generate_head. The title slot holds the whole
+        # element, so a document without a title has no title element.
+        head_el = el.head()[
+            el.meta(
+                name="viewport", content="width=device-width, initial-scale=1.0"
+            ),
+            layout_slot("title", default=title),
+            preload,
+            # Cached per resource declarations and fingerprints
+            _layout_part(
+                lambda: resource.to_html(
+                    js=js, css=css, fonts=fonts, nonce=nonce
+                )
+            ),
+            head_extra,
+        ]
+        # Elements holding each slot, with their parent
+        self._slot_owners = {
+            **_slot_owners(head_el, html_el_root),
+            **_slot_owners(body_el, html_el_root),
+        }
+
+        self._head = self._compile(
+            [
+                f"{doctype('html')}\n{html_el_start}\n",
+                *head_el.resolve(),
+                "\n\n",
+            ],
+            self._assets,
+            inline_assets=True,
+            nonce=nonce,
+        )
+        self.slots = frozenset(
+            part.slot.name
+            for part in self._head + self._body
+            if isinstance(part, _SlotChunk)
+        )
+
+    @staticmethod
+    def _compile(
+        chunks: Iterable[str],
+        assets: dict[str, _PageAsset],
+        inline_assets: bool = False,
+        nonce: bool = False,
+    ) -> list[static_fragment | _SlotChunk | _PartChunk]:
+        """
+        Join rendered chunks into fragments between the slots
+
+        :param assets: Collects the component assets found
+        :param inline_assets: Render new component assets in place
+        :param nonce: Render them with the nonce placeholder
+        """
+        parts: list[static_fragment | _SlotChunk | _PartChunk] = []
+        pending: list[str] = []
+        for chunk in chunks:
+            if type(chunk) is _AssetsChunk:
+                if chunk.assets.key not in assets:
+                    assets[chunk.assets.key] = chunk.assets
+                    if inline_assets:
+                        pending.append(render_assets([chunk.assets], nonce))
+            elif isinstance(chunk, (_SlotChunk, _PartChunk)):
+                if pending:
+                    parts.append(static_fragment(unsafe_text("".join(pending))))
+                    pending.clear()
+                parts.append(chunk)
+            else:
+                pending.append(chunk)
+        if pending:
+            parts.append(static_fragment(unsafe_text("".join(pending))))
+        return parts
+
+    def _fill(
+        self,
+        parts: list[static_fragment | _SlotChunk | _PartChunk],
+        values: dict[str, Node],
+    ) -> Generator[str, None, None]:
+        for part in parts:
+            if isinstance(part, _PartChunk):
+                html = part.render()
+                if html:
+                    yield html
+                continue
+            if not isinstance(part, _SlotChunk):
+                yield from part.resolve()
+                continue
+            slot = part.slot
+            value = values.get(slot.name, slot.default)
+            if slot.name == "title" and value is not None:
+                value = el.title()[value]
+            if value is None:
+                continue
+            # Resolved as a child of the element holding the slot,
+            # so callables get the same arguments as in an element tree
+            owner = part.parent
+            if not isinstance(owner, BaseElement):
+                raise TypeError(
+                    f"{slot!r} must be placed in an element, "
+                    f"not {type(owner).__name__}"
+                )
+            yield from owner._resolve_child(
+                value,
+                call_callables=True,
+                parent=self._slot_owners.get(id(slot)),
+            )
+
+    def stream(
+        self,
+        stream_mode: Literal["head_only", "full"] = "head_only",
+        nonce: str | None = None,
+        **slots: Node,
+    ) -> Generator[str, Any, None]:
+        """
+        Return a generator that yields parts of the document as strings.
+
+        :param stream_mode: Parts of the document to stream. If "head_only",
+                            we yield the head, then the full body.
+                            If "full", we yield the entire document in parts.
+        :param nonce: CSP nonce of the response, substituted for every
+                      `csp.NONCE` placeholder. Required if the layout was
+                      created with `nonce=True`.
+        :param slots: Content for the layout slots by name,
+                      i.e. title="Home", body=[...]
+
+        :return: A generator that yields parts of the HTML5 document as strings.
+        """
+        unknown = slots.keys() - self.slots
+        if unknown:
+            raise ValueError(
+                f"Unknown layout slots {sorted(unknown)}, "
+                f"expected any of {sorted(self.slots)}"
+            )
+        if stream_mode not in ("head_only", "full"):
+            raise ValueError("stream_mode must be 'head_only' or 'full'")
+        if nonce is None:
+            if self.nonce:
+                raise ValueError("This layout needs a nonce to render")
+            return self._parts(stream_mode, slots)
+        return apply_nonce(self._parts(stream_mode, slots), nonce)
+
+    def _parts(
+        self, stream_mode: Literal["head_only", "full"], slots: dict[str, Node]
+    ) -> Generator[str, Any, None]:
+        # Assets of the slot contents which the template doesn't use
+        found = self._assets.copy()
+        head = collect_assets(self._fill(self._head, slots), found)
+        body = collect_assets(self._fill(self._body, slots), found)
+        if stream_mode == "full":
+            yield from head
+            yield from body
+            yield from self._end(found)
+        else:
+            yield "".join(head)
+            yield "".join(chain(body, self._end(found)))
+
+    def _end(self, found: dict[str, _PageAsset]) -> Generator[str, None, None]:
+        """
+        Yield the assets of the slot contents, the icon sprite
+        and the end of the document
+        """
+        known = len(self._assets)
+        html = render_sprite(found.values())
+        if len(found) > known:
+            new = islice(found.values(), known, None)
+            html = render_assets(new, self.nonce) + html
+        if html:
+            yield html
+        yield from self._body_end.resolve()
+
+    def stream_bytes(
+        self,
+        stream_mode: Literal["head_only", "full"] = "head_only",
+        nonce: str | None = None,
+        **slots: Node,
+    ) -> Generator[bytes, Any, None]:
+        """
+        Return a generator that yields parts of the document as
+        UTF-8 bytes. See `stream`.
+        """
+        return encode_stream(
+            self.stream(stream_mode, nonce, **slots),
+            flush_each=stream_mode == "head_only",
+        )
+
+    def render(self, nonce: str | None = None, **slots: Node) -> str:
+        """
+        Return the full document as a string.
+
+        :param nonce: CSP nonce of the response, see `stream`
+        :param slots: Content for the layout slots by name
+        """
+        return "".join(self.stream("full", nonce, **slots))
+
+    def __repr__(self) -> str:
+        return f"Layout(slots={sorted(self.slots)})"
+
+    def render_bytes(self, nonce: str | None = None, **slots: Node) -> bytes:
+        """
+        Return the full document as UTF-8 bytes.
+        """
+        return b"".join(encode_stream(self.stream("full", nonce, **slots)))
@@ -3,7 +3,7 @@ from typing import Literal, Iterable, Mapping
 from ..attributes import GlobalAttrs
 from ..base_attribute import BaseAttribute
 from ..base_element import BaseElement
-from ..base_types import Resolvable, StrLike
+from ..base_types import AttrResolver, Resolvable, StrLike
 
 # This file is generated by tools/generate_elements.py
 
@@ -41,28 +41,43 @@ class address(BaseElement):
             BaseAttribute | Iterable[BaseAttribute] | Mapping[str, Resolvable]
         ]
         | None = None,
-        id: StrLike | None = None,
+        id: StrLike | AttrResolver | None = None,
         class_: Resolvable | None = None,
-        accesskey: Resolvable | StrLike | None = None,
+        accesskey: Resolvable | StrLike | AttrResolver | None = None,
         autocapitalize: Literal[
             "on", "off", "none", "sentences", "words", "characters"
         ]
         | StrLike
+        | AttrResolver
         | None = None,
-        autocorrect: Literal["on", "off"] | StrLike | None = None,
-        autofocus: bool | StrLike | None = None,
+        autocorrect: Literal["on", "off"]
+        | StrLike
+        | AttrResolver
+        | None = None,
+        autofocus: bool | StrLike | AttrResolver | None = None,
         contenteditable: Literal["true", "plaintext-only", "false"]
         | StrLike
+        | AttrResolver
+        | None = None,
+        dir: Literal["ltr", "rtl", "auto"]
+        | StrLike
+        | AttrResolver
+        | None = None,
+        draggable: Literal["true", "false"]
+        | StrLike
+        | AttrResolver
         | None = None,
-        dir: Literal["ltr", "rtl", "auto"] | StrLike | None = None,
-        draggable: Literal["true", "false"] | StrLike | None = None,
         enterkeyhint: Literal[
             "enter", "done", "go", "next", "previous", "search", "send"
         ]
         | StrLike
+        | AttrResolver
         | None = None,
-        hidden: Literal["until-found", "hidden", ""] | StrLike | None = None,
-        inert: bool | StrLike | None = None,
+        hidden: Literal["until-found", "hidden", ""]
+        | StrLike
+        | AttrResolver
+        | None = None,
+        inert: bool | StrLike | AttrResolver | None = None,
         inputmode: Literal[
             "none",
             "text",
@@ -74,94 +89,102 @@ class address(BaseElement):
             "search",
         ]
         | StrLike
+        | AttrResolver
+        | None = None,
+        is_: StrLike | AttrResolver | None = None,
+        itemid: StrLike | AttrResolver | None = None,
+        itemprop: Resolvable | StrLike | AttrResolver | None = None,
+        itemref: Resolvable | StrLike | AttrResolver | None = None,
+        itemscope: bool | StrLike | AttrResolver | None = None,
+        itemtype: Resolvable | StrLike | AttrResolver | None = None,
+        lang: StrLike | AttrResolver | None = None,
+        nonce: StrLike | AttrResolver | None = None,
+        onauxclick: StrLike | AttrResolver | None = None,
+        onbeforeinput: StrLike | AttrResolver | None = None,
+        onbeforematch: StrLike | AttrResolver | None = None,
+        onbeforetoggle: StrLike | AttrResolver | None = None,
+        onblur: StrLike | AttrResolver | None = None,
+        oncancel: StrLike | AttrResolver | None = None,
+        oncanplay: StrLike | AttrResolver | None = None,
+        oncanplaythrough: StrLike | AttrResolver | None = None,
+        onchange: StrLike | AttrResolver | None = None,
+        onclick: StrLike | AttrResolver | None = None,
+        onclose: StrLike | AttrResolver | None = None,
+        oncontextlost: StrLike | AttrResolver | None = None,
+        oncontextmenu: StrLike | AttrResolver | None = None,
+        oncontextrestored: StrLike | AttrResolver | None = None,
+        oncopy: StrLike | AttrResolver | None = None,
+        oncuechange: StrLike | AttrResolver | None = None,
+        oncut: StrLike | AttrResolver | None = None,
+        ondblclick: StrLike | AttrResolver | None = None,
+        ondrag: StrLike | AttrResolver | None = None,
+        ondragend: StrLike | AttrResolver | None = None,
+        ondragenter: StrLike | AttrResolver | None = None,
+        ondragleave: StrLike | AttrResolver | None = None,
+        ondragover: StrLike | AttrResolver | None = None,
+        ondragstart: StrLike | AttrResolver | None = None,
+        ondrop: StrLike | AttrResolver | None = None,
+        ondurationchange: StrLike | AttrResolver | None = None,
+        onemptied: StrLike | AttrResolver | None = None,
+        onended: StrLike | AttrResolver | None = None,
+        onerror: StrLike | AttrResolver | None = None,
+        onfocus: StrLike | AttrResolver | None = None,
+        onformdata: StrLike | AttrResolver | None = None,
+        oninput: StrLike | AttrResolver | None = None,
+        oninvalid: StrLike | AttrResolver | None = None,
+        onkeydown: StrLike | AttrResolver | None = None,
+        onkeypress: StrLike | AttrResolver | None = None,
+        onkeyup: StrLike | AttrResolver | None = None,
+        onload: StrLike | AttrResolver | None = None,
+        onloadeddata: StrLike | AttrResolver | None = None,
+        onloadedmetadata: StrLike | AttrResolver | None = None,
+        onloadstart: StrLike | AttrResolver | None = None,
+        onmousedown: StrLike | AttrResolver | None = None,
+        onmouseenter: StrLike | AttrResolver | None = None,
+        onmouseleave: StrLike | AttrResolver | None = None,
+        onmousemove: StrLike | AttrResolver | None = None,
+        onmouseout: StrLike | AttrResolver | None = None,
+        onmouseover: StrLike | AttrResolver | None = None,
+        onmouseup: StrLike | AttrResolver | None = None,
+        onpaste: StrLike | AttrResolver | None = None,
+        onpause: StrLike | AttrResolver | None = None,
+        onplay: StrLike | AttrResolver | None = None,
+        onplaying: StrLike | AttrResolver | None = None,
+        onprogress: StrLike | AttrResolver | None = None,
+        onratechange: StrLike | AttrResolver | None = None,
+        onreset: StrLike | AttrResolver | None = None,
+        onresize: StrLike | AttrResolver | None = None,
+        onscroll: StrLike | AttrResolver | None = None,
+        onscrollend: StrLike | AttrResolver | None = None,
+        onsecuritypolicyviolation: StrLike | AttrResolver | None = None,
+        onseeked: StrLike | AttrResolver | None = None,
+        onseeking: StrLike | AttrResolver | None = None,
+        onselect: StrLike | AttrResolver | None = None,
+        onslotchange: StrLike | AttrResolver | None = None,
+        onstalled: StrLike | AttrResolver | None = None,
+        onsubmit: StrLike | AttrResolver | None = None,
+        onsuspend: StrLike | AttrResolver | None = None,
+        ontimeupdate: StrLike | AttrResolver | None = None,
+        ontoggle: StrLike | AttrResolver | None = None,
+        onvolumechange: StrLike | AttrResolver | None = None,
+        onwaiting: StrLike | AttrResolver | None = None,
+        onwheel: StrLike | AttrResolver | None = None,
+        popover: Literal["auto", "manual"]
+        | StrLike
+        | AttrResolver
+        | None = None,
+        slot: StrLike | AttrResolver | None = None,
+        spellcheck: Literal["true", "false", ""]
+        | StrLike
+        | AttrResolver
         | None = None,
-        is_: StrLike | None = None,
-        itemid: StrLike | None = None,
-        itemprop: Resolvable | StrLike | None = None,
-        itemref: Resolvable | StrLike | None = None,
-        itemscope: bool | StrLike | None = None,
-        itemtype: Resolvable | StrLike | None = None,
-        lang: StrLike | None = None,
-        nonce: StrLike | None = None,
-        onauxclick: StrLike | None = None,
-        onbeforeinput: StrLike | None = None,
-        onbeforematch: StrLike | None = None,
-        onbeforetoggle: StrLike | None = None,
-        onblur: StrLike | None = None,
-        oncancel: StrLike | None = None,
-        oncanplay: StrLike | None = None,
-        oncanplaythrough: StrLike | None = None,
-        onchange: StrLike | None = None,
-        onclick: StrLike | None = None,
-        onclose: StrLike | None = None,
-        oncontextlost: StrLike | None = None,
-        oncontextmenu: StrLike | None = None,
-        oncontextrestored: StrLike | None = None,
-        oncopy: StrLike | None = None,
-        oncuechange: StrLike | None = None,
-        oncut: StrLike | None = None,
-        ondblclick: StrLike | None = None,
-        ondrag: StrLike | None = None,
-        ondragend: StrLike | None = None,
-        ondragenter: StrLike | None = None,
-        ondragleave: StrLike | None = None,
-        ondragover: StrLike | None = None,
-        ondragstart: StrLike | None = None,
-        ondrop: StrLike | None = None,
-        ondurationchange: StrLike | None = None,
-        onemptied: StrLike | None = None,
-        onended: StrLike | None = None,
-        onerror: StrLike | None = None,
-        onfocus: StrLike | None = None,
-        onformdata: StrLike | None = None,
-        oninput: StrLike | None = None,
-        oninvalid: StrLike | None = None,
-        onkeydown: StrLike | None = None,
-        onkeypress: StrLike | None = None,
-        onkeyup: StrLike | None = None,
-        onload: StrLike | None = None,
-        onloadeddata: StrLike | None = None,
-        onloadedmetadata: StrLike | None = None,
-        onloadstart: StrLike | None = None,
-        onmousedown: StrLike | None = None,
-        onmouseenter: StrLike | None = None,
-        onmouseleave: StrLike | None = None,
-        onmousemove: StrLike | None = None,
-        onmouseout: StrLike | None = None,
-        onmouseover: StrLike | None = None,
-        onmouseup: StrLike | None = None,
-        onpaste: StrLike | None = None,
-        onpause: StrLike | None = None,
-        onplay: StrLike | None = None,
-        onplaying: StrLike | None = None,
-        onprogress: StrLike | None = None,
-        onratechange: StrLike | None = None,
-        onreset: StrLike | None = None,
-        onresize: StrLike | None = None,
-        onscroll: StrLike | None = None,
-        onscrollend: StrLike | None = None,
-        onsecuritypolicyviolation: StrLike | None = None,
-        onseeked: StrLike | None = None,
-        onseeking: StrLike | None = None,
-        onselect: StrLike | None = None,
-        onslotchange: StrLike | None = None,
-        onstalled: StrLike | None = None,
-        onsubmit: StrLike | None = None,
-        onsuspend: StrLike | None = None,
-        ontimeupdate: StrLike | None = None,
-        ontoggle: StrLike | None = None,
-        onvolumechange: StrLike | None = None,
-        onwaiting: StrLike | None = None,
-        onwheel: StrLike | None = None,
-        popover: Literal["auto", "manual"] | StrLike | None = None,
-        slot: StrLike | None = None,
-        spellcheck: Literal["true", "false", ""] | StrLike | None = None,
         style: Resolvable | Mapping[StrLike, StrLike] | None = None,
-        tabindex: int | StrLike | None = None,
-        title: StrLike | None = None,
-        translate: Literal["yes", "no"] | StrLike | None = None,
+        tabindex: int | StrLike | AttrResolver | None = None,
+        title: StrLike | AttrResolver | None = None,
+        translate: Literal["yes", "no"] | StrLike | AttrResolver | None = None,
         writingsuggestions: Literal["true", "false", ""]
         | StrLike
+        | AttrResolver
         | None = None,
         children: list | None = None,
     ) -> None:
@@ -0,0 +1,215 @@
+"""
+SVG icon sprites
+
+An icon repeated as inline SVG puts its whole path data in the page every
+time it is used. With an `IconRegistry`, each icon is a `<symbol>` in one
+hidden sprite per page, and each use is a small reference to it:
+
+```python
+from html_compose import button
+from html_compose.icons import IconRegistry
+
+icons = IconRegistry()
+icons.register_dir("static/icons")  # check.svg, menu.svg, ...
+icons.register("dot", '<svg viewBox="0 0 8 8"><circle r="4"/></svg>')
+
+button[icons.use("check", class_="icon"), "Save"]
+```
+```html
+<button>
+  <svg class="icon" aria-hidden="true"><use href="#icon-check"/></svg>Save
+</button>
+...
+<svg xmlns="http://www.w3.org/2000/svg" aria-hidden="true"
+  width="0" height="0" style="position:absolute">
+  <symbol id="icon-check" viewBox="0 0 24 24">...</symbol>
+</svg>
+</body>
+```
+
+Icons are parsed and their symbols rendered when they are registered.
+A use renders cached markup, and marks its symbol as used on the page
+like `component_assets` do, so `document_streamer` and `Layout` put only
+the symbols of the icons actually used in the sprite, each once, at the
+end of the body. A use rendered outside of a document has no sprite.
+"""
+
+import os
+import re
+import xml.etree.ElementTree as ET
+from typing import Generator
+
+from . import elements as el
+from . import escape_text, unsafe_text
+from .base_types import ElementBase
+from .component import _PageAsset
+from .util_funcs import BoundedCache
+
+# Attributes of the source <svg> which apply to its symbol
+_SYMBOL_ATTRS = (
+    "viewBox",
+    "preserveAspectRatio",
+    "fill",
+    "stroke",
+    "stroke-width",
+    "stroke-linecap",
+    "stroke-linejoin",
+)
+
+_ICON_NAME = re.compile(r"[A-Za-z0-9_-]+")
+_SVG_OPEN = re.compile(r"""<svg\b(?:[^>"']|"[^"]*"|'[^']*')*>""")
+_SVG_CLOSE = re.compile(r"</svg\s*>\s*$")
+
+# Maximum number of cached use markups per registry
+USE_CACHE_CAP = 1024
+
+
+class _IconSymbol(_PageAsset):
+    __slots__ = ()
+
+    sprite = True
+
+    def __init__(self, html: str) -> None:
+        self._set_html(html, html)
+
+
+def _parse_symbol(symbol_id: str, svg_text: str) -> str:
+    """
+    Turn an SVG document into a `<symbol>` element
+
+    :raises ValueError: If the text isn't a well-formed SVG element
+    """
+    try:
+        root = ET.fromstring(svg_text.strip())
+    except ET.ParseError as exc:
+        raise ValueError(f"Icon {symbol_id}: invalid SVG: {exc}") from exc
+    if root.tag.rpartition("}")[2] != "svg":
+        raise ValueError(f"Icon {symbol_id}: expected an <svg> element")
+
+    # The content is kept as written, ElementTree would rename namespaces
+    opening = _SVG_OPEN.search(svg_text)
+    closing = _SVG_CLOSE.search(svg_text)
+    if opening is not None and closing is not None:
+        content = svg_text[opening.end() : closing.start()].strip()
+    elif opening is not None and opening.group().endswith("/>"):
+        # <svg .../> has no content
+        content = ""
+    else:
+        raise ValueError(f"Icon {symbol_id}: can't find the <svg> content")
+
+    attrs = [f'id="{escape_text(symbol_id)}"']
+    for name in _SYMBOL_ATTRS:
+        value = root.get(name)
+        if value is not None:
+            attrs.append(f'{name}="{escape_text(value)}"')
+    return f"<symbol {' '.join(attrs)}>{content}</symbol>"
+
+
+class icon_use(ElementBase):
+    """
+    A use of a registered icon, see `IconRegistry.use`
+    """
+
+    __slots__ = ("symbol", "html")
+
+    def __init__(self, symbol: _IconSymbol, html: str) -> None:
+        self.symbol = symbol
+        self.html = html
+
+    def resolve(self, parent=None) -> Generator[str, None, None]:
+        yield self.symbol._chunk
+        yield self.html
+
+    def __repr__(self) -> str:
+        return f"icon_use({self.html!r})"
+
+
+class IconRegistry:
+    """
+    Named SVG icons, rendered as references into a per-page sprite
+    """
+
+    def __init__(self, prefix: str = "icon-"):
+        """
+        :param prefix: Prefix of the symbol ids, i.e. "icon-check"
+        """
+        self.prefix = prefix
+        self.symbols: dict[str, _IconSymbol] = {}
+        # (name, attributes) -> rendered use
+        self._uses: BoundedCache[tuple, icon_use] = BoundedCache()
+
+    def register(self, name: str, svg: str) -> None:
+        """
+        Register an icon
+
+        :param name: Icon name, letters, digits, "-" and "_"
+        :param svg: SVG markup of the icon, an `<svg>` element.
+                    Its content is trusted and emitted as-is.
+        """
+        if not _ICON_NAME.fullmatch(name):
+            raise ValueError(f"Invalid icon name {name!r}")
+        symbol_id = f"{self.prefix}{name}"
+        self.symbols[name] = _IconSymbol(_parse_symbol(symbol_id, svg))
+        self._uses = BoundedCache(
+            (k, v) for k, v in self._uses.items() if k[0] != name
+        )
+
+    def register_file(self, name: str, file_path: str) -> None:
+        """
+        Register an icon from an SVG file
+        """
+        with open(file_path, encoding="utf-8") as f:
+            self.register(name, f.read())
+
+    def register_dir(self, dir_path: str) -> int:
+        """
+        Register every .svg file of a directory, named after the file
+
+        :return: Number of icons registered
+        """
+        count = 0
+        for entry in sorted(os.scandir(dir_path), key=lambda e: e.name):
+            stem, ext = os.path.splitext(entry.name)
+            if ext.lower() == ".svg" and entry.is_file():
+                self.register_file(stem, entry.path)
+                count += 1
+        return count
+
+    def use(
+        self, name: str, title: str | None = None, **attrs: str
+    ) -> icon_use:
+        """
+        Return a use of an icon, `<svg><use href="#icon-name"/></svg>`
+
+        :param name: Registered icon name
+        :param title: Accessible name of the icon. Without one, the icon
+                      is hidden from assistive technology.
+        :param attrs: Attributes of the `<svg>` element, i.e. class_="icon".
+                      A trailing underscore is dropped as for elements.
+        """
+        key = (name, title, tuple(sorted(attrs.items())))
+        cached = self._uses.get(key)
+        if cached is not None:
+            return cached
+
+        try:
+            symbol = self.symbols[name]
+        except KeyError:
+            raise KeyError(f"Unknown icon {name!r}") from None
+        svg_attrs = {
+            k.rstrip("_").replace("_", "-"): v for k, v in attrs.items()
+        }
+        if title is None:
+            svg_attrs.setdefault("aria-hidden", "true")
+        else:
+            svg_attrs.setdefault("role", "img")
+            svg_attrs.setdefault("aria-label", title)
+        use = f'<use href="#{escape_text(self.prefix + name)}"/>'
+        html = el.svg(attrs=svg_attrs)[unsafe_text(use)].render()
+
+        result = icon_use(symbol, html)
+        self._uses.put(key, result, USE_CACHE_CAP)
+        return result
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.symbols
@@ -0,0 +1,145 @@
+"""
+JSON data islands
+
+Data for client side code, i.e. hydration state, is embedded as
+`<script type="application/json">` and read with `JSON.parse`:
+
+```python
+from html_compose import body, json_island
+
+body[app_root, json_island(state, id="state")]
+```
+```javascript
+const state = JSON.parse(document.getElementById("state").textContent)
+```
+
+The JSON is encoded as the island renders, in chunks of about
+`stream.BATCH_SIZE` characters, so a large payload is streamed instead of
+being built as one string. dict keys may be str, int, float, bool or None
+as with `json.dumps`. `JSON.parse` rejects `NaN` and `Infinity`, so they
+raise ValueError instead of being written.
+
+`json_island(obj, use_orjson=True)` encodes with orjson, which must be
+installed. It encodes the whole payload at once, much faster, and it is then
+sent in chunks. datetimes and dataclasses are passed to `default` as with the
+json module, but orjson writes `NaN` and `Infinity` as `null`, raises for ints
+wider than 64 bits and encodes UUIDs and enums itself.
+
+`<`, `>` and `&` are escaped as `\\u003c`, `\\u003e` and `\\u0026`, so the
+data can't close the script element or start a comment. U+2028 and U+2029
+are escaped as well. The escapes are JSON, so the parsed data is unchanged.
+"""
+
+import json
+from typing import Any, Callable, Generator
+
+from . import elements as el
+from .base_types import ElementBase
+from .stream import BATCH_SIZE
+
+try:
+    import orjson as _orjson  # type: ignore[import-not-found]
+except ImportError:
+    _orjson = None
+    _ORJSON_OPTIONS = 0
+else:
+    # datetimes and dataclasses go to `default` as with the json module
+    _ORJSON_OPTIONS = (
+        _orjson.OPT_NON_STR_KEYS
+        | _orjson.OPT_PASSTHROUGH_DATETIME
+        | _orjson.OPT_PASSTHROUGH_DATACLASS
+    )
+
+_ESCAPES = str.maketrans(
+    {
+        "<": "\\u003c",
+        ">": "\\u003e",
+        "&": "\\u0026",
+        "\u2028": "\\u2028",
+        "\u2029": "\\u2029",
+    }
+)
+
+
+def escape_json(text: str) -> str:
+    """
+    Escape JSON text for embedding in HTML, i.e. in a script element
+    """
+    return text.translate(_ESCAPES)
+
+
+def _iter_json(
+    obj: Any, default: Callable[[Any], Any] | None, use_orjson: bool = False
+) -> Generator[str, None, None]:
+    """
+    Encode obj as compact JSON, yielding escaped chunks
+    """
+    if use_orjson:
+        data = _orjson.dumps(
+            obj, default=default, option=_ORJSON_OPTIONS
+        ).decode("utf-8")
+        for start in range(0, len(data), BATCH_SIZE):
+            yield escape_json(data[start : start + BATCH_SIZE])
+        return
+
+    encoder = json.JSONEncoder(
+        ensure_ascii=False,
+        separators=(",", ":"),
+        default=default,
+        allow_nan=False,
+    )
+    pending: list[str] = []
+    pending_size = 0
+    # iterencode yields every token on its own, join them into batches
+    for token in encoder.iterencode(obj):
+        pending.append(token)
+        pending_size += len(token)
+        if pending_size >= BATCH_SIZE:
+            yield escape_json("".join(pending))
+            pending.clear()
+            pending_size = 0
+    if pending:
+        yield escape_json("".join(pending))
+
+
+class json_island(ElementBase):
+    """
+    A `<script type="application/json">` holding data encoded as JSON.
+
+    The data is encoded each time the island renders.
+    """
+
+    __slots__ = ("obj", "default", "use_orjson", "_start", "_end")
+
+    def __init__(
+        self,
+        obj: Any,
+        id: str | None = None,
+        default: Callable[[Any], Any] | None = None,
+        attrs: dict[str, str] | None = None,
+        use_orjson: bool = False,
+    ) -> None:
+        """
+        :param obj: Data to encode, anything the json module accepts
+        :param id: id attribute of the script element,
+                   to find it with `document.getElementById`
+        :param default: Called for objects which can't be encoded,
+                        returns something which can. See `json.dumps`.
+        :param attrs: Other attributes of the script element
+        :param use_orjson: Encode with orjson, see the module docstring
+        """
+        if use_orjson and _orjson is None:
+            raise ImportError("use_orjson=True requires orjson")
+        self.obj = obj
+        self.default = default
+        self.use_orjson = use_orjson
+        script = el.script(attrs=attrs, type="application/json", id=id)
+        self._start, self._end = script.resolve()
+
+    def resolve(self, parent=None) -> Generator[str, None, None]:
+        yield self._start
+        yield from _iter_json(self.obj, self.default, self.use_orjson)
+        yield self._end
+
+    def __repr__(self) -> str:
+        return f"json_island({self._start!r})"
@@ -20,10 +20,17 @@ For fonts:
 """
 
 import json
-from typing import Any, Iterable
+import re
+from typing import Any, Callable, Iterable, TypeVar
+from urllib.parse import quote
+
+from markupsafe import Markup
 
 from .. import base_types, unsafe_text
 from .. import elements as el
+from ..csp import NONCE
+from ..json_island import escape_json
+from ..util_funcs import BoundedCache
 
 
 class settings:
@@ -36,11 +43,20 @@ class settings:
 
     # Base directory when resolving relative paths for local resources
     base_dir = "."
-    # html-compose cache-buster timestamp
+    # html-compose cache-buster query parameter
     query_string = "hccbts"
     # Maximum number of cached URIs for cache busting
     cache_cap = 1000
-    stat_poll_interval: int | float = 1  # seconds
+    # Seconds before a cache-busted file is checked for changes again
+    stat_poll_interval: int | float = 1
+    # Maximum number of inlined stylesheets kept in memory
+    inline_css_cache_cap = 64
+    # JSON manifest written by `html-compose manifest`.
+    # When set, its fingerprints are used without checking the files.
+    manifest_file: str | None = None
+    # Maximum number of resource sets with cached head HTML or Link headers,
+    # see to_html and link_headers
+    head_cache_cap = 256
 
 
 class _State:
@@ -48,30 +64,56 @@ class _State:
     Internal state for local static resource imports
     """
 
-    stat_cache: dict[str, int | float] = {}
+    # Fingerprints of cache-busted files, see resource.manifest
+    manifest: "AssetManifest | None" = None
+    # (base_dir, manifest_file) the manifest was created for
+    manifest_source: tuple[str, str | None] | None = None
+
+    # Module URL -> (fingerprint, import specifiers), see module_graph
+    module_imports: BoundedCache[str, tuple[str, tuple[str, ...]]] = (
+        BoundedCache()
+    )
+
+    # Image path -> (time of the last stat, mtime, (width, height) or None),
+    # see img_import
+    image_sizes: BoundedCache[
+        str, tuple[float, int, tuple[int, int] | None]
+    ] = BoundedCache()
 
-    misc_stat_cache: dict[str, int | float] = {}
+    # Source -> (fingerprint, minified css, size in bytes) of inlined css
+    inline_css: BoundedCache[str, tuple[str, str, int]] = BoundedCache()
+
+    # Resource set key -> rendered head elements
+    head_cache: BoundedCache[tuple, Markup] = BoundedCache()
+
+    # Resource set key -> Link header values
+    link_header_cache: BoundedCache[tuple, tuple[str, ...]] = BoundedCache()
 
 
 from .css_import import css_import  # noqa: E402
 from .font_import import font_import_manual, font_import_provider  # noqa: E402
+from .img_import import img_import  # noqa: E402
 from .js_import import js_import  # noqa: E402
+from .manifest import AssetManifest  # noqa: E402
 
 
 def to_elements(
     js: Iterable[str | js_import] | None = None,
     css: Iterable[str | css_import] | None = None,
     fonts: Iterable[font_import_manual | font_import_provider] | None = None,
+    nonce: bool = False,
 ):
     """
     Generate elements for `head` element from resource imports
 
-    Depending on your use case consider caching the resolution of this function
+    `to_html` caches the rendered result of this function
 
 
     :param js: Javascript imports. A string is treated as a simple script src
     :param css: CSS imports. A string is treated as a simple link rel=stylesheet
     :param fonts: Font imports
+    :param nonce: Add the `csp.NONCE` placeholder to script and style
+                  elements, i.e. the import map
     """
     head_elements: list[base_types.Node] = []
 
@@ -96,14 +138,27 @@ def to_elements(
         #  <link rel="modulepreload" href="main.js" />
         js_imports: dict[str, str] = {}
         scopes: dict[str, dict[str, str]] = {}
+        # Modules imported by other modules, see js_import.preload_imports
+        dependency_links: dict[str, el.link] = {}
+        dependency_map: dict[str, str] = {}
+        loaded: set[str] = set()
         for js_src in js:
             if isinstance(js_src, js_import):
                 jsi: js_import = js_src
                 # Generate script tag
                 script_tags.append(jsi.script())
+                loaded.add(jsi._src)
                 link = jsi.preload_link()
                 if link:
                     preload_links.append(link)
+                for (url, uri), link in zip(
+                    jsi._dependencies, jsi.dependency_links()
+                ):
+                    # The import map sends every importer to the
+                    # cache-busted URL, so that is the one to preload
+                    if url not in dependency_links or uri != url:
+                        dependency_links[url] = link
+                dependency_map.update(jsi.dependency_map())
 
                 entry = jsi.import_map_entry()
                 if entry:
@@ -121,13 +176,24 @@ def to_elements(
                 if not isinstance(js_src, str):
                     raise TypeError("js must be str or js_import")
                 script_tags.append(el.script(src=js_src))
+                loaded.add(js_src)
+
+        # Each module is preloaded once per page,
+        # and not at all if the page loads it anyway
+        preload_links.extend(
+            link
+            for url, link in dependency_links.items()
+            if url not in loaded and link.attrs["href"] not in loaded
+        )
+        for url, uri in dependency_map.items():
+            js_imports.setdefault(url, uri)
 
         if js_imports:
             import_map: dict[str, Any] = {"imports": js_imports}
             if scopes:
                 import_map["scopes"] = scopes
-            # dump to json; prevent escapes
-            js_dump = json.dumps(import_map).replace("<", "\\u003c")
+            # dump to json; escaped so it can't close the script
+            js_dump = escape_json(json.dumps(import_map))
             preload_links.insert(
                 0, el.script(type="importmap")[unsafe_text(js_dump)]
             )
@@ -158,14 +224,210 @@ def to_elements(
     if script_tags:
         head_elements.extend(script_tags)
 
+    if nonce:
+        for element in head_elements:
+            if isinstance(element, (el.script, el.style)):
+                element.attrs["nonce"] = NONCE
+
     return head_elements
 
 
+T = TypeVar("T")
+
+
+def _resource_key(resource, kind: str):
+    if isinstance(resource, str):
+        return (kind, resource)
+    return resource.cache_key()
+
+
+def _cached(
+    cache: BoundedCache[tuple, T],
+    js: list,
+    css: list,
+    fonts: list,
+    build: Callable[[], T],
+    variant: Any = None,
+) -> T:
+    """
+    Return the cached value of `build` for a set of resource declarations
+
+    The key changes when a declaration or a cache-busted URI changes.
+    Up to `settings.head_cache_cap` resource sets are kept.
+
+    :param variant: Other options of `build`, part of the key
+    """
+    try:
+        key = (
+            tuple(_resource_key(r, "js") for r in js),
+            tuple(_resource_key(r, "css") for r in css),
+            tuple(f.cache_key() for f in fonts),
+            variant,
+        )
+        hash(key)
+    except (AttributeError, TypeError):
+        # Not a known resource type, to_elements reports it
+        return build()
+
+    try:
+        return cache[key]
+    except KeyError:
+        pass
+    value = build()
+    cache.put(key, value, settings.head_cache_cap)
+    return value
+
+
+def to_html(
+    js: Iterable[str | js_import] | None = None,
+    css: Iterable[str | css_import] | None = None,
+    fonts: Iterable[font_import_manual | font_import_provider] | None = None,
+    nonce: bool = False,
+) -> Markup:
+    """
+    Rendered HTML of `to_elements`, cached per set of resource declarations
+
+    The cache entry changes when a declaration or a cache-busted URI
+    changes. Up to `settings.head_cache_cap` resource sets are kept.
+
+    :param js: Javascript imports. A string is treated as a simple script src
+    :param css: CSS imports. A string is treated as a simple link rel=stylesheet
+    :param fonts: Font imports
+    :param nonce: Add the `csp.NONCE` placeholder to script and style
+                  elements, see `to_elements`
+    """
+    js = list(js) if js else []
+    css = list(css) if css else []
+    fonts = list(fonts) if fonts else []
+    return _cached(
+        _State.head_cache,
+        js,
+        css,
+        fonts,
+        lambda: unsafe_text(
+            "".join(
+                e.render()
+                for e in to_elements(js=js, css=css, fonts=fonts, nonce=nonce)
+            )
+        ),
+        variant=nonce,
+    )
+
+
+# Link parameters carried over from the link elements
+_LINK_PARAMS = ("as", "type", "crossorigin", "integrity")
+# Reserved URI characters are kept, anything else is percent-encoded
+_URI_SAFE = ":/?#[]@!$&'()*+,;=%~"
+_TOKEN = re.compile(r"[!#$%&'*+\-.^_`|~0-9A-Za-z]+")
+# Control characters can't be sent in a header, even in a quoted-string
+_CONTROL = re.compile(r"[\x00-\x08\x0a-\x1f\x7f]")
+
+
+def _link_header(href: str, params: dict[str, str]) -> str:
+    """
+    Format one RFC 8288 link-value
+
+    Raises ValueError if a parameter value contains a control character,
+    i.e. CR or LF which would end the header.
+    """
+    # Keep the URI as written, but it may not break out of <...>
+    parts = [f"<{quote(href, safe=_URI_SAFE)}>"]
+    for name, value in params.items():
+        if value == "":
+            # Boolean attribute, i.e. crossorigin
+            parts.append(name)
+        elif _TOKEN.fullmatch(value):
+            parts.append(f"{name}={value}")
+        elif _CONTROL.search(value):
+            raise ValueError(
+                f"Link parameter {name} contains a control character: {value!r}"
+            )
+        else:
+            escaped = value.replace("\\", "\\\\").replace('"', '\\"')
+            parts.append(f'{name}="{escaped}"')
+    return "; ".join(parts)
+
+
+def _link_headers(js: list, css: list, fonts: list) -> tuple[str, ...]:
+    headers: dict[tuple, str] = {}
+    for element in to_elements(js=js, css=css, fonts=fonts):
+        if not isinstance(element, el.link):
+            # Scripts, the import map and font styles have no hint
+            continue
+        attrs = element.attrs
+        href = attrs.get("href")
+        rel = attrs.get("rel")
+        if not href:
+            continue
+        params = {}
+        if rel == "stylesheet":
+            # Early Hints only apply fetches, so stylesheets are preloaded
+            params["rel"] = "preload"
+            params["as"] = "style"
+        elif rel in ("preconnect", "preload", "modulepreload"):
+            params["rel"] = rel
+        else:
+            continue
+        for name in _LINK_PARAMS:
+            if name in attrs and name not in params:
+                params[name] = attrs[name]
+
+        key = (href, params["rel"], params.get("as"))
+        if key not in headers:
+            headers[key] = _link_header(href, params)
+    return tuple(headers.values())
+
+
+def link_headers(
+    js: Iterable[str | js_import] | None = None,
+    css: Iterable[str | css_import] | None = None,
+    fonts: Iterable[font_import_manual | font_import_provider] | None = None,
+) -> tuple[str, ...]:
+    """
+    RFC 8288 `Link` header values for resource imports,
+    cached per set of resource declarations like `to_html`
+
+    Servers can send them in a `103 Early Hints` response, or with the
+    page, so the browser starts fetching before the page is rendered:
+
+    ```python
+    hints = resource.link_headers(js=js, css=css, fonts=fonts)
+    send_early_hints([("Link", value) for value in hints])
+    # or as one header
+    headers["Link"] = ", ".join(hints)
+    ```
+
+    Values are produced for everything `to_elements` would preconnect,
+    preload or modulepreload, and each stylesheet is preloaded
+    (`rel=preload; as=style`). Scripts which don't set `preload` are left
+    to the page.
+
+    :param js: Javascript imports. A string is treated as a simple script src
+    :param css: CSS imports. A string is treated as a simple link rel=stylesheet
+    :param fonts: Font imports
+    :return: One link-value per resource, without duplicates
+    """
+    js = list(js) if js else []
+    css = list(css) if css else []
+    fonts = list(fonts) if fonts else []
+    return _cached(
+        _State.link_header_cache,
+        js,
+        css,
+        fonts,
+        lambda: _link_headers(js, css, fonts),
+    )
+
+
 __all__ = [
     "js_import",
     "css_import",
     "font_import_manual",
     "font_import_provider",
+    "img_import",
     "to_elements",
+    "to_html",
+    "link_headers",
     "settings",
+    "AssetManifest",
 ]
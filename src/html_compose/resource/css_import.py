@@ -1,7 +1,12 @@
 from typing import Literal
 
 from .. import elements as el
-from .util_funcs import _cachebust_resource_uri
+from .. import unsafe_text
+from .util_funcs import (
+    _cachebust_resource_uri,
+    _inline_stylesheet,
+    _resource_integrity,
+)
 
 
 class css_import:
@@ -11,6 +16,8 @@ class css_import:
     - `link(rel="preload")` to preload the import
     - `hash` and `crossorigin` for SRI
     - Local resource cache busting
+    - `style` with the minified stylesheet, for small local stylesheets
+      which should not block first paint
 
     An production usage might look like:
     ```python
@@ -71,6 +78,8 @@ class css_import:
         | str
         | None = None,
         cache_bust: bool = False,
+        inline: bool = False,
+        inline_threshold: int | None = None,
     ):
         """
         A css import wrapper to wrap some of the complexity of optimal
@@ -86,20 +95,36 @@ class css_import:
             If true, adds a preload link for this resource
 
         `hash`:
-            An optional SRI integrity hash for the import
+            An optional SRI integrity hash for the import.
+            "auto" computes it from the local file, i.e. those that exist
+            in `resource.settings.base_dir`. Same-origin files don't
+            need `crossorigin`.
 
         `crossorigin`:
             Optionally sets the crossorigin attribute on the link tag.
             Valid values are "", "anonymous", "use-credentials"
 
         `cache_bust`:
-            If true, appends a timestamp to the URL to prevent browser
+            If true, appends a content fingerprint to the URL to prevent browser
             caching. Webservers configured for static resources manage this
             feature automatically, but for development this can be useful.
 
             This feature only works for local resources, i.e. those that
             exist in `resource.settings.base_dir`
 
+        `inline`:
+            If true, the minified stylesheet is emitted in a style element
+            instead of a link. Relative url() references are rewritten
+            to stay correct.
+
+            This feature only works for local resources, i.e. those that
+            exist in `resource.settings.base_dir`. The file is read once
+            per version, see `resource.settings.inline_css_cache_cap`.
+
+        `inline_threshold`:
+            Inline the stylesheet only if it is at most this many bytes
+            once minified, otherwise link it.
+
         """
         self.href = href
         self.preload = preload
@@ -108,8 +133,12 @@ class css_import:
         self.cache_bust = cache_bust
         self.has_link = preload
         self._href = self.uri()
+        self._integrity = self.integrity()
+        self.inline = inline
+        self.inline_threshold = inline_threshold
+        self._inline_css = self.inline_css()
 
-        if hash and self.crossorigin is None:
+        if hash and hash != "auto" and self.crossorigin is None:
             raise ValueError(
                 "If hash is set, crossorigin must be set to ''/'anonymous'"
             )
@@ -117,26 +146,68 @@ class css_import:
     def uri(self):
         """
         Returns the source URI - with cache busting if enabled
-        which is implemented by getting the mtime of the local file
+        which is a fingerprint of the local file's content
 
-        This operation performs up to two fs stats per call
-
-        1. The base static directory is checked once and cached per interpreter
-        2. The specific resource is checked if it is time to poll again
-           based on settings.stat_poll_interval
+        See `resource.manifest`. The file is checked for changes at most
+        every settings.stat_poll_interval seconds.
         """
         if not self.cache_bust:
             return self.href
 
         return _cachebust_resource_uri(self.href)
 
+    def integrity(self) -> str | None:
+        """
+        Returns the SRI hash, computed from the local file if hash is "auto"
+        """
+        if self.hash == "auto":
+            return _resource_integrity(self.href)
+        return self.hash
+
+    def inline_css(self) -> str | None:
+        """
+        Returns the minified stylesheet if it is inlined, otherwise None
+        """
+        threshold = self.inline_threshold
+        if not self.inline and threshold is None:
+            return None
+        css, size = _inline_stylesheet(self.href)
+        if self.inline or (threshold is not None and size <= threshold):
+            return css
+        return None
+
+    def cache_key(self) -> tuple:
+        """
+        Hashable key of everything which affects the generated elements
+
+        The cache-busted URI and automatic SRI hash are checked again,
+        so elements generated after this call use the current ones.
+        """
+        if self.cache_bust:
+            self._href = self.uri()
+        if self.hash == "auto":
+            self._integrity = self.integrity()
+        if self.inline or self.inline_threshold is not None:
+            self._inline_css = self.inline_css()
+        return (
+            css_import,
+            self._href,
+            self.preload,
+            self._integrity,
+            self.crossorigin,
+            self._inline_css,
+        )
+
     def preloads(self) -> list[el.link]:
         """
         Returns a link element for preloading this import if preload is set
+        and the stylesheet isn't inlined
         """
+        if self._inline_css is not None:
+            return []
         attrs = {"href": self._href}
-        if self.hash:
-            attrs["integrity"] = self.hash
+        if self._integrity:
+            attrs["integrity"] = self._integrity
         if self.crossorigin:
             attrs["crossorigin"] = self.crossorigin
         if self.preload:
@@ -146,12 +217,15 @@ class css_import:
 
     def links(self):
         """
-        Returns one or more link element for this import
+        Returns one or more link element for this import,
+        or a style element if the stylesheet is inlined
         """
+        if self._inline_css is not None:
+            return [el.style()[unsafe_text(self._inline_css)]]
         links = []
         attrs = {"href": self._href}
-        if self.hash:
-            attrs["integrity"] = self.hash
+        if self._integrity:
+            attrs["integrity"] = self._integrity
         if self.crossorigin:
             attrs["crossorigin"] = self.crossorigin
 
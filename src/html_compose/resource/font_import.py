@@ -28,6 +28,9 @@ _AUTODETECT_FONT_MIMETYPES = {
 
 
 class _font_import_base:
+    def cache_key(self) -> tuple:
+        raise NotImplementedError()
+
     def preload_links(self) -> list[el.link]:
         raise NotImplementedError()
 
@@ -128,13 +131,10 @@ class font_import_manual(_font_import_base):
     def uris(self) -> list[str]:  # -> list[str] | list[Any]:
         """
         Returns the source URI - with cache busting if enabled
-        which is implemented by getting the mtime of the local file
+        which is a fingerprint of the local file's content
 
-        This operation performs up to two fs stats per call
-
-        1. The base static directory is checked once and cached per interpreter
-        2. The specific resource is checked if it is time to poll again
-           based on settings.stat_poll_interval
+        See `resource.manifest`. The file is checked for changes at most
+        every settings.stat_poll_interval seconds.
         """
         hrefs = []
         for h in self.hrefs:
@@ -145,6 +145,27 @@ class font_import_manual(_font_import_base):
             hrefs.append(_cachebust_resource_uri(h))
         return hrefs
 
+    def cache_key(self) -> tuple:
+        """
+        Hashable key of everything which affects the generated elements
+
+        The cache-busted URI is checked again, so elements generated after
+        this call use the current one.
+        """
+        if self.cache_bust:
+            self._hrefs = self.uris()
+        return (
+            font_import_manual,
+            tuple(self._hrefs),
+            self.family,
+            self.weight,
+            self.style,
+            self.display,
+            self.preload,
+            self.crossorigin,
+            self.unicode_range,
+        )
+
     @staticmethod
     def get_font_format(href: str) -> str | None:
         ext = href.split(".")[-1].lower()
@@ -287,7 +308,7 @@ class font_import_provider(_font_import_base):
             If not set, it defaults to the value of `crossorigin`.
 
         `cache_bust`:
-            If true, appends a timestamp to the URL to prevent browser
+            If true, appends a content fingerprint to the URL to prevent browser
             caching. Webservers configured for static resources manage this
             feature automatically, but for development this can be useful.
 
@@ -321,19 +342,38 @@ class font_import_provider(_font_import_base):
     def uri(self):
         """
         Returns the source URI - with cache busting if enabled
-        which is implemented by getting the mtime of the local file
-
-        This operation performs up to two fs stats per call
+        which is a fingerprint of the local file's content
 
-        1. The base static directory is checked once and cached per interpreter
-        2. The specific resource is checked if it is time to poll again
-           based on settings.stat_poll_interval
+        See `resource.manifest`. The file is checked for changes at most
+        every settings.stat_poll_interval seconds.
         """
         if not self.cache_bust:
             return self.href
 
         return _cachebust_resource_uri(self.href)
 
+    def cache_key(self) -> tuple:
+        """
+        Hashable key of everything which affects the generated elements
+
+        The cache-busted URI is checked again, so elements generated after
+        this call use the current one.
+        """
+        if self.cache_bust:
+            self._href = self.uri()
+        preconnect = self.preconnect
+        return (
+            font_import_provider,
+            self._href,
+            self.preload,
+            self.hash,
+            self.crossorigin,
+            preconnect
+            if preconnect is None or isinstance(preconnect, str)
+            else tuple(preconnect),
+            self.preconnect_crossorigin,
+        )
+
     def preload_links(
         self,
     ) -> list[el.link]:  # -> list[Any]:# -> list[Any]:# -> list[Any]:
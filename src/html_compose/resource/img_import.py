@@ -0,0 +1,485 @@
+import os
+import struct
+from time import time
+from typing import Iterable, Literal
+
+from .. import elements as el
+from . import _State, settings
+from .manifest import _relative_path, _split_source
+from .util_funcs import _cachebust_resource_uri
+
+# Bytes read to find the dimensions of most images.
+# JPEG markers may be further in, they are followed with seeks.
+_PROBE_SIZE = 4096
+
+_IMAGE_TYPES = {
+    "avif": "image/avif",
+    "webp": "image/webp",
+    "png": "image/png",
+    "jpg": "image/jpeg",
+    "jpeg": "image/jpeg",
+    "gif": "image/gif",
+}
+
+# JPEG start of frame markers, which hold the dimensions
+_JPEG_SOF = {
+    0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7,
+    0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF,
+}  # fmt: skip
+
+
+# EXIF orientations which rotate the image by 90 or 270 degrees
+_EXIF_TRANSPOSED = {5, 6, 7, 8}
+_EXIF_ORIENTATION = 0x0112
+
+
+def _exif_orientation(data: bytes) -> int:
+    """
+    Return the orientation tag of an APP1 segment, 1 if it has none
+    """
+    if not data.startswith(b"Exif\0\0"):
+        return 1
+    tiff = data[6:]
+    order = {b"II": "<", b"MM": ">"}.get(tiff[:2])
+    if order is None or len(tiff) < 8:
+        return 1
+    ifd = struct.unpack(order + "I", tiff[4:8])[0]
+    if len(tiff) < ifd + 2:
+        return 1
+    count = struct.unpack(order + "H", tiff[ifd : ifd + 2])[0]
+    for entry in range(ifd + 2, ifd + 2 + 12 * count, 12):
+        if len(tiff) < entry + 12:
+            break
+        if struct.unpack(order + "H", tiff[entry : entry + 2])[0] == (
+            _EXIF_ORIENTATION
+        ):
+            return struct.unpack(order + "H", tiff[entry + 8 : entry + 10])[0]
+    return 1
+
+
+def _jpeg_size(f, head: bytes) -> tuple[int, int] | None:
+    """
+    Return the displayed (width, height) of a JPEG, with the EXIF
+    orientation applied as browsers do
+    """
+    # File offset of head[0]
+    base = 0
+    pos = 2
+    orientation = 1
+    while True:
+        if len(head) < pos - base + 9:
+            # Marker segments can be large (EXIF), read on
+            f.seek(pos)
+            head = f.read(_PROBE_SIZE)
+            base = pos
+            if len(head) < 9:
+                return None
+        at = pos - base
+        if head[at] != 0xFF:
+            return None
+        marker = head[at + 1]
+        if marker == 0xFF:
+            # Fill byte
+            pos += 1
+            continue
+        length = struct.unpack(">H", head[at + 2 : at + 4])[0]
+        if marker in _JPEG_SOF:
+            height, width = struct.unpack(">HH", head[at + 5 : at + 9])
+            if orientation in _EXIF_TRANSPOSED:
+                return height, width
+            return width, height
+        if marker == 0xE1 and orientation == 1:
+            data = head[at + 4 : at + 2 + length]
+            if len(data) < length - 2:
+                f.seek(pos + 4)
+                data = f.read(length - 2)
+            orientation = _exif_orientation(data)
+        pos += 2 + length
+
+
+def _boxes(data: bytes, start: int, end: int):
+    """
+    Yield (type, body start, body end) of the ISOBMFF boxes in data[start:end]
+    """
+    while start + 8 <= end:
+        size, box_type = struct.unpack(">I4s", data[start : start + 8])
+        body = start + 8
+        if size == 1 and body + 8 <= end:
+            size = struct.unpack(">Q", data[body : body + 8])[0]
+            body += 8
+        elif size == 0:
+            size = end - start
+        if size < body - start or start + size > end:
+            return
+        yield box_type, body, start + size
+        start += size
+
+
+def _avif_primary_size(meta: bytes) -> tuple[int, int] | None:
+    """
+    Follow the primary item of a meta box to its ispe and irot properties
+    """
+    primary = None
+    properties: list[tuple[bytes, int, int]] = []
+    associations: dict[int, list[int]] = {}
+    # meta is a full box: version and flags come before its children
+    for box_type, body, end in _boxes(meta, 12, len(meta)):
+        if box_type == b"pitm":
+            fmt = ">H" if meta[body] == 0 else ">I"
+            primary = struct.unpack_from(fmt, meta, body + 4)[0]
+        elif box_type == b"iprp":
+            for sub_type, sub_body, sub_end in _boxes(meta, body, end):
+                if sub_type == b"ipco":
+                    properties = list(_boxes(meta, sub_body, sub_end))
+                elif sub_type == b"ipma":
+                    associations = _ipma(meta, sub_body)
+
+    size = None
+    rotated = False
+    if primary is None:
+        return None
+    for index in associations.get(primary, ()):
+        if not 0 < index <= len(properties):
+            continue
+        prop_type, prop_body, _ = properties[index - 1]
+        if prop_type == b"ispe":
+            size = struct.unpack_from(">II", meta, prop_body + 4)
+        elif prop_type == b"irot":
+            # Anticlockwise rotation in quarter turns
+            rotated = meta[prop_body] & 0x3 in (1, 3)
+    if size is not None and rotated:
+        return size[1], size[0]
+    return size
+
+
+def _ipma(data: bytes, start: int) -> dict[int, list[int]]:
+    """
+    Property indexes of each item from an item property association box
+    """
+    version = data[start]
+    flags = int.from_bytes(data[start + 1 : start + 4], "big")
+    count = struct.unpack_from(">I", data, start + 4)[0]
+    pos = start + 8
+    result: dict[int, list[int]] = {}
+    for _ in range(count):
+        if version < 1:
+            item = struct.unpack_from(">H", data, pos)[0]
+            pos += 2
+        else:
+            item = struct.unpack_from(">I", data, pos)[0]
+            pos += 4
+        indexes = result[item] = []
+        for _ in range(data[pos]):
+            if flags & 1:
+                index = struct.unpack_from(">H", data, pos + 1)[0] & 0x7FFF
+                pos += 2
+            else:
+                index = data[pos + 1] & 0x7F
+                pos += 1
+            indexes.append(index)
+        pos += 1
+    return result
+
+
+def _avif_size(f, head: bytes) -> tuple[int, int] | None:
+    """
+    Return the (width, height) of the primary item of an AVIF,
+    with its rotation applied
+    """
+    # The meta box follows ftyp
+    f.seek(struct.unpack(">I", head[:4])[0])
+    header = f.read(8)
+    meta_size = struct.unpack(">I", header[:4])[0] if len(header) == 8 else 0
+    if header[4:8] == b"meta" and meta_size >= 16:
+        meta = header + f.read(meta_size - 8)
+        try:
+            size = _avif_primary_size(meta)
+        except (struct.error, IndexError):  # Truncated
+            size = None
+        if size is not None:
+            return size
+
+    # No item properties to follow: thumbnails are smaller than the image
+    sizes = []
+    pos = head.find(b"ispe")
+    while pos != -1 and len(head) >= pos + 16:
+        sizes.append(struct.unpack(">II", head[pos + 8 : pos + 16]))
+        pos = head.find(b"ispe", pos + 4)
+    return max(sizes, key=lambda size: size[0] * size[1], default=None)
+
+
+def _probe_size(file_path: str) -> tuple[int, int] | None:
+    """
+    Read the dimensions of a PNG, JPEG, GIF, WebP or AVIF image
+    from its header, without decoding it
+
+    JPEG EXIF orientation and AVIF rotation are applied, so the size is
+    the one the browser displays.
+
+    :return: (width, height), or None for unknown formats
+    """
+    with open(file_path, "rb") as f:
+        head = f.read(_PROBE_SIZE)
+
+        if head.startswith(b"\x89PNG\r\n\x1a\n") and head[12:16] == b"IHDR":
+            return struct.unpack(">II", head[16:24])
+
+        if head[:6] in (b"GIF87a", b"GIF89a"):
+            return struct.unpack("<HH", head[6:10])
+
+        if head.startswith(b"RIFF") and head[8:12] == b"WEBP":
+            chunk = head[12:16]
+            if chunk == b"VP8 ":
+                width, height = struct.unpack("<HH", head[26:30])
+                return width & 0x3FFF, height & 0x3FFF
+            if chunk == b"VP8L":
+                bits = int.from_bytes(head[21:25], "little")
+                return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+            if chunk == b"VP8X":
+                width = int.from_bytes(head[24:27], "little") + 1
+                height = int.from_bytes(head[27:30], "little") + 1
+                return width, height
+            return None
+
+        if head[4:8] == b"ftyp" and head[8:12] in (b"avif", b"avis"):
+            # The image spatial extents property holds the dimensions
+            return _avif_size(f, head)
+
+        if head.startswith(b"\xff\xd8"):
+            return _jpeg_size(f, head)
+
+    return None
+
+
+def image_size(src: str) -> tuple[int, int] | None:
+    """
+    Return (width, height) of a local image, relative to
+    `resource.settings.base_dir`
+
+    Results are cached per file and mtime. A file is checked for changes
+    at most every `settings.stat_poll_interval` seconds, so repeated calls
+    are a dictionary lookup.
+
+    :return: (width, height), or None if the format isn't recognized
+    """
+    file_path = os.path.join(
+        settings.base_dir, _relative_path(_split_source(src)[0])
+    )
+    cache = _State.image_sizes
+    now = time()
+    cached = cache.get(file_path)
+    if cached is not None and now - cached[0] <= settings.stat_poll_interval:
+        return cached[2]
+
+    try:
+        mtime = os.stat(file_path).st_mtime_ns
+    except FileNotFoundError as exc:
+        raise FileNotFoundError(
+            f"img_import: image {file_path} does not exist"
+        ) from exc
+
+    if cached is not None and cached[1] == mtime:
+        size = cached[2]
+    else:
+        size = _probe_size(file_path)
+    cache.put(file_path, (now, mtime, size), settings.cache_cap)
+    return size
+
+
+def _is_local(src: str) -> bool:
+    return "//" not in src.partition("?")[0] and not src.startswith("data:")
+
+
+def _image_type(src: str) -> str | None:
+    ext = _split_source(src)[0].rsplit(".", 1)[-1].lower()
+    return _IMAGE_TYPES.get(ext)
+
+
+class img_import:
+    """
+    An image helper which emits an `img`, or a `picture` when variants
+    come in other formats, with:
+
+    - `width` and `height` read from the local file, so the browser
+      reserves the space before the image loads (no layout shift)
+    - `srcset` and `sizes` from variants of the image, described by their
+      probed widths
+    - `loading="lazy"` and `decoding="async"` unless it is a priority
+      image, which gets `fetchpriority="high"` instead
+
+    ```python
+    hero = img_import(
+        "/img/hero.jpg",
+        alt="Our team",
+        variants=["/img/hero-640.jpg", "/img/hero-640.avif",
+                  "/img/hero-1280.avif"],
+        sizes="(max-width: 640px) 100vw, 1280px",
+        priority=True,
+    )
+    main[hero, p["..."]]
+    ```
+    ```html
+    <picture>
+      <source type="image/avif" srcset="/img/hero-640.avif 640w,
+        /img/hero-1280.avif 1280w" sizes="(max-width: 640px) 100vw, 1280px"/>
+      <img src="/img/hero.jpg" alt="Our team" width="1280" height="720"
+        srcset="/img/hero-640.jpg 640w, /img/hero.jpg 1280w"
+        sizes="(max-width: 640px) 100vw, 1280px" fetchpriority="high"/>
+    </picture>
+    ```
+
+    Image headers are probed, not decoded, and cached per mtime,
+    see `image_size`. The markup is built again on each render.
+    """
+
+    def __init__(
+        self,
+        src: str,
+        alt: str,
+        variants: Iterable[str] | None = None,
+        sizes: str | None = None,
+        width: int | None = None,
+        height: int | None = None,
+        priority: bool = False,
+        loading: Literal["lazy", "eager"] | None = None,
+        decoding: Literal["async", "sync", "auto"] | None = None,
+        cache_bust: bool = False,
+        attrs: dict[str, str] | None = None,
+    ):
+        """
+        :param src: Image URL. Local images are relative to
+                    `resource.settings.base_dir`.
+        :param alt: Alternative text, "" for decorative images
+        :param variants: Other sizes and formats of the same image.
+                         Local variants are described by their width.
+        :param sizes: The sizes attribute for the srcset candidates
+        :param width: Intrinsic width, read from the file if not set
+        :param height: Intrinsic height, read from the file if not set
+        :param priority: The image is likely the largest above the fold:
+                         fetchpriority="high" and no lazy loading
+        :param loading: Overrides the loading attribute,
+                        "lazy" unless priority is set
+        :param decoding: Overrides the decoding attribute,
+                         "async" unless priority is set
+        :param cache_bust: Append content fingerprints to local URLs,
+                           see `resource.manifest`
+        :param attrs: Other attributes for the img element
+        """
+        self.src = src
+        self.alt = alt
+        self.variants = list(variants) if variants else []
+        self.sizes = sizes
+        self.width = width
+        self.height = height
+        self.priority = priority
+        self.loading = loading
+        self.decoding = decoding
+        self.cache_bust = cache_bust
+        self.attrs = attrs
+
+    def _uri(self, src: str) -> str:
+        if self.cache_bust and _is_local(src):
+            return _cachebust_resource_uri(src)
+        return src
+
+    def _srcset(self, sources: list[str]) -> str | None:
+        candidates = []
+        for src in sources:
+            size = image_size(src) if _is_local(src) else None
+            if size is None:
+                # Without a width the candidate can't be described
+                continue
+            candidates.append((size[0], self._uri(src)))
+        if len(candidates) < 2:
+            return None
+        candidates.sort()
+        return ", ".join(f"{uri} {width}w" for width, uri in candidates)
+
+    def element(self) -> el.img | el.picture:
+        """
+        Returns the img element, wrapped in a picture
+        if there are variants in other formats
+        """
+        width, height = self.width, self.height
+        if (width is None or height is None) and _is_local(self.src):
+            size = image_size(self.src)
+            if size is not None:
+                width = size[0] if width is None else width
+                height = size[1] if height is None else height
+
+        img_type = _image_type(self.src)
+        by_type: dict[str | None, list[str]] = {}
+        for variant in self.variants:
+            by_type.setdefault(_image_type(variant), []).append(variant)
+
+        img_attrs: dict[str, str | int] = {
+            "src": self._uri(self.src),
+            "alt": self.alt,
+        }
+        if width is not None and height is not None:
+            img_attrs["width"] = width
+            img_attrs["height"] = height
+        srcset = self._srcset([self.src, *by_type.pop(img_type, [])])
+        if srcset:
+            img_attrs["srcset"] = srcset
+            if self.sizes:
+                img_attrs["sizes"] = self.sizes
+
+        if self.priority:
+            img_attrs["fetchpriority"] = "high"
+        loading = self.loading or (None if self.priority else "lazy")
+        if loading:
+            img_attrs["loading"] = loading
+        decoding = self.decoding or (None if self.priority else "async")
+        if decoding:
+            img_attrs["decoding"] = decoding
+        if self.attrs:
+            img_attrs.update(self.attrs)
+
+        img = el.img(attrs=img_attrs)
+        # Modern formats first, the browser takes the first it supports
+        sources = []
+        for mime in _IMAGE_TYPES.values():
+            variants = by_type.pop(mime, None)
+            if not variants:
+                continue
+            source_attrs = {"type": mime}
+            srcset = self._srcset(variants)
+            if srcset is None:
+                source_attrs["srcset"] = ", ".join(
+                    self._uri(v) for v in variants
+                )
+            else:
+                source_attrs["srcset"] = srcset
+                if self.sizes:
+                    source_attrs["sizes"] = self.sizes
+            sources.append(el.source(attrs=source_attrs))
+
+        if not sources:
+            return img
+        return el.picture()[sources, img]
+
+    def variants_of(self, src: str) -> list[str]:
+        """
+        Returns the variants in the same format as src
+        """
+        img_type = _image_type(src)
+        return [v for v in self.variants if _image_type(v) == img_type]
+
+    def preload_link(self) -> el.link:
+        """
+        Returns a link element which preloads this image,
+        i.e. for a priority image
+        """
+        attrs = {"href": self._uri(self.src)}
+        srcset = self._srcset([self.src, *self.variants_of(self.src)])
+        if srcset:
+            attrs["imagesrcset"] = srcset
+            if self.sizes:
+                attrs["imagesizes"] = self.sizes
+        if self.priority:
+            attrs["fetchpriority"] = "high"
+        return el.link(attrs=attrs, rel="preload", as_="image")
+
+    def __html__(self) -> str:
+        return self.element().render()
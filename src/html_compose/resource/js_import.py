@@ -2,7 +2,8 @@ from typing import Iterable, Literal
 
 from .. import elements as el
 from ..util_funcs import flatten_iterable, is_iterable_but_not_str
-from .util_funcs import _cachebust_resource_uri
+from .module_graph import module_dependencies
+from .util_funcs import _cachebust_resource_uri, _resource_integrity
 
 
 class js_import:
@@ -19,7 +20,7 @@ class js_import:
     ```
     creates an import map so javascript modules can be imported by name
     - `link(rel="modulepreload")` to preload the import
-    - if cache_bust is true, appends a timestamp to the URL to
+    - if cache_bust is true, appends a content fingerprint to the URL to
 
     An production usage might look like:
 
@@ -113,6 +114,7 @@ class js_import:
         | str
         | None = None,
         cache_bust: bool = False,
+        preload_imports: bool = False,
     ):
         """
         A javascript import wrapper to manage optimal window import strategies.
@@ -125,7 +127,7 @@ class js_import:
         `source`:
             The literal src passed to tags i.e. script and link preload.
 
-            If cache_bust is set, a timestamp is appended to the URL.
+            If cache_bust is set, a content fingerprint is appended to the URL.
         `name`:
             The name of the import, e.g. "lodash" which can be used in
             javascript type="module" imports.
@@ -158,16 +160,20 @@ class js_import:
             scripts to older browsers that do not support javascript modules.
 
         `hash`:
-            An optional SRI integrity hash for the import
+            An optional SRI integrity hash for the import.
+            "auto" computes it from the local file, i.e. those that exist
+            relative to `resource.settings.base_dir`. Same-origin files
+            don't need `crossorigin`.
 
         `crossorigin`:
             Optionally sets the crossorigin attribute on the script tag.
             Valid values are "", "anonymous", "use-credentials"
 
         `cache_bust`:
-            If true, appends a timestamp to the URL to work with browser
-            caching. Webservers configured for static resources manage this
-            feature automatically, but for development this can be useful.
+            If true, appends a content fingerprint to the URL to work with
+            browser caching. Webservers configured for static resources
+            manage this feature automatically, but for development this can
+            be useful.
 
             This feature only works for local resources, i.e. those that
             exist relative to `resource.settings.base_dir`
@@ -182,6 +188,15 @@ class js_import:
             Because they affect the import map but not what is loaded -
             the script tag controls what loads - they are rarely used.
 
+        `preload_imports`:
+            If true, the static imports of this local module are followed
+            through other local modules and every module found gets a
+            modulepreload link, so the browser fetches the whole graph at
+            once. See `resource.module_graph`.
+
+            With cache_bust, each dependency's cache-busted URL is also
+            added to the import map, so the module's own imports load it.
+
         """
 
         self.name = name
@@ -190,7 +205,7 @@ class js_import:
         self.hash = hash
         self.scope_url = scope_url
         if scope_url and is_iterable_but_not_str(scope_url):
-            self.scope_url = flatten_iterable(scope_url)
+            self.scope_url = list(flatten_iterable(scope_url))
         self.crossorigin = crossorigin
         self.cache_bust = cache_bust
         self.has_link = preload
@@ -198,7 +213,10 @@ class js_import:
         self.defer = defer
         self.nomodule = nomodule
         self._src = self.uri()
-        if hash and self.crossorigin is None:
+        self._integrity = self.integrity()
+        self.preload_imports = preload_imports
+        self._dependencies = self.dependencies()
+        if hash and hash != "auto" and self.crossorigin is None:
             raise ValueError(
                 "If hash is set, crossorigin must be set to ''/'anonymous'"
             )
@@ -206,19 +224,67 @@ class js_import:
     def uri(self) -> str:
         """
         Returns the source URI - with cache busting if enabled
-        which is implemented by getting the mtime of the local file
-
-        This operation performs up to two fs stats per call
+        which is a fingerprint of the local file's content
 
-        1. The base static directory is checked once and cached per interpreter
-        2. The specific resource is checked if it is time to poll again
-           based on settings.stat_poll_interval
+        See `resource.manifest`. The file is checked for changes at most
+        every settings.stat_poll_interval seconds.
         """
         if not self.cache_bust:
             return self.source
 
         return _cachebust_resource_uri(self.source)
 
+    def integrity(self) -> str | None:
+        """
+        Returns the SRI hash, computed from the local file if hash is "auto"
+        """
+        if self.hash == "auto":
+            return _resource_integrity(self.source)
+        return self.hash
+
+    def dependencies(self) -> list[tuple[str, str]]:
+        """
+        Returns (url, uri) of the local modules this module imports,
+        directly or transitively, if preload_imports is set.
+        uri is cache-busted if cache_bust is set.
+        """
+        if not self.preload_imports:
+            return []
+        return [
+            (url, _cachebust_resource_uri(url) if self.cache_bust else url)
+            for url in module_dependencies(self.source)
+        ]
+
+    def cache_key(self) -> tuple:
+        """
+        Hashable key of everything which affects the generated elements
+
+        The cache-busted URI and automatic SRI hash are checked again,
+        so elements generated after this call use the current ones.
+        """
+        if self.cache_bust:
+            self._src = self.uri()
+        if self.hash == "auto":
+            self._integrity = self.integrity()
+        if self.preload_imports:
+            self._dependencies = self.dependencies()
+        scope_url = self.scope_url
+        if scope_url is not None and not isinstance(scope_url, str):
+            scope_url = tuple(scope_url)
+        return (
+            js_import,
+            self._src,
+            self.name,
+            self.preload,
+            self._integrity,
+            self.async_,
+            self.defer,
+            self.nomodule,
+            scope_url,
+            self.crossorigin,
+            tuple(self._dependencies),
+        )
+
     def import_map_entry(
         self,
     ) -> tuple[str, str] | tuple[str, str, Iterable] | None:
@@ -239,8 +305,8 @@ class js_import:
         """
         if self.preload:
             attrs = {"href": self._src}
-            if self.hash:
-                attrs["integrity"] = self.hash
+            if self._integrity:
+                attrs["integrity"] = self._integrity
             if self.crossorigin:
                 attrs["crossorigin"] = self.crossorigin
             if self.name:
@@ -250,6 +316,25 @@ class js_import:
 
         return None
 
+    def dependency_links(self) -> list[el.link]:
+        """
+        Returns modulepreload links for the modules this module imports
+        """
+        links = []
+        for _url, uri in self._dependencies:
+            attrs = {"href": uri}
+            if self.crossorigin is not None:
+                attrs["crossorigin"] = self.crossorigin
+            links.append(el.link(attrs=attrs, rel="modulepreload"))
+        return links
+
+    def dependency_map(self) -> dict[str, str]:
+        """
+        Returns import map entries from the URLs this module's imports
+        resolve to, to their cache-busted URLs
+        """
+        return {url: uri for url, uri in self._dependencies if url != uri}
+
     def script(self) -> el.script:
         """
         Returns a script tag for this import
@@ -258,8 +343,8 @@ class js_import:
 
         if self.name:
             attrs["type"] = "module"
-        if self.hash:
-            attrs["integrity"] = self.hash
+        if self._integrity:
+            attrs["integrity"] = self._integrity
         if self.crossorigin:
             attrs["crossorigin"] = self.crossorigin
         if self.async_:
@@ -0,0 +1,353 @@
+"""
+Content-hash manifest of local static files
+
+Cache busting (`cache_bust=True` on `js_import`, `css_import` and
+`font_import_manual`) appends a fingerprint of the file's content to its
+URI, i.e. `/static/app.js?hccbts=3f0a9c2e41d7b806`. Fingerprints are kept in
+an `AssetManifest` for `resource.settings.base_dir`:
+
+* In development the manifest fills in as files are used. A file is checked
+  again (one stat) at most every `settings.stat_poll_interval` seconds and
+  only hashed again when its size or mtime changed.
+* For production, scan the static directory once and save the manifest:
+
+```sh
+html-compose manifest static --out static/manifest.json
+```
+
+```python
+from html_compose import resource
+
+resource.settings.base_dir = "static"
+resource.settings.manifest_file = "static/manifest.json"
+```
+
+  A loaded manifest is trusted as-is, files it lists are never touched.
+  Files it doesn't list are hashed once when first used.
+
+A cache-busted URI is a dictionary lookup once its fingerprint is known.
+
+The manifest also holds SRI hashes for `hash="auto"` imports.
+They are computed the first time a file needs one, in the same read as
+its fingerprint when the file changed, and saved with the manifest
+(`html-compose manifest --sri` computes them for every file).
+"""
+
+import base64
+import hashlib
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from time import time
+from typing import Any, Iterable
+
+from ..util_funcs import BoundedCache
+from . import _State, settings
+
+MANIFEST_VERSION = 1
+
+# Size in bytes of file fingerprints
+FINGERPRINT_SIZE = 8
+
+# Files are hashed in blocks of this many bytes
+READ_SIZE = 1024 * 1024
+
+# Hash algorithm of generated SRI hashes
+SRI_ALGORITHM = "sha384"
+
+
+def _hash_file(file_path: str, sri: bool = False) -> tuple[str, str | None]:
+    """
+    Hash a file in one streamed read
+
+    :param sri: Also compute the SRI hash
+    :return: (fingerprint as hex, SRI hash or None)
+    """
+    hasher = hashlib.blake2b(digest_size=FINGERPRINT_SIZE)
+    sri_hasher = hashlib.new(SRI_ALGORITHM) if sri else None
+    with open(file_path, "rb") as f:
+        while block := f.read(READ_SIZE):
+            hasher.update(block)
+            if sri_hasher is not None:
+                sri_hasher.update(block)
+
+    integrity = None
+    if sri_hasher is not None:
+        digest = base64.b64encode(sri_hasher.digest()).decode("ascii")
+        integrity = f"{SRI_ALGORITHM}-{digest}"
+    return hasher.hexdigest(), integrity
+
+
+def _new_entry(file_path: str, st: os.stat_result, sri: bool) -> dict[str, Any]:
+    fingerprint, integrity = _hash_file(file_path, sri)
+    entry: dict[str, Any] = {
+        "size": st.st_size,
+        "mtime": st.st_mtime_ns,
+        "hash": fingerprint,
+    }
+    if integrity is not None:
+        entry["sri"] = integrity
+    return entry
+
+
+def _split_source(source: str) -> tuple[str, str, str]:
+    """
+    Split a resource URI into (path, query, fragment)
+    """
+    source, _, fragment = source.partition("#")
+    source, _, query = source.partition("?")
+    return source, query, fragment
+
+
+def _relative_path(source_path: str) -> str:
+    """
+    Manifest key of a resource path, relative to the base directory
+    """
+    return os.path.normpath(source_path.lstrip("/")).replace(os.sep, "/")
+
+
+class AssetManifest:
+    """
+    Content fingerprints of the files below a base directory
+
+    Entries are keyed by path relative to the base directory, with "/"
+    separators, and hold the file's size, mtime (ns), fingerprint and,
+    once requested, its SRI hash.
+    """
+
+    def __init__(self, base_dir: str, frozen: bool = False):
+        """
+        :param base_dir: Directory which resource paths are relative to
+        :param frozen: Trust existing entries without checking the files,
+                       as for a manifest loaded in production
+        """
+        self.base_dir = base_dir
+        self.frozen = frozen
+        self.files: dict[str, dict[str, Any]] = {}
+        # Relative path -> time of the last stat
+        self._checked: dict[str, float] = {}
+        # Source URI -> (fingerprint, cache-busted URI)
+        self._uris: BoundedCache[str, tuple[str, str]] = BoundedCache()
+
+    def _stat_entry(self, rel: str, sri: bool = False) -> dict[str, Any]:
+        """
+        Return the entry for a file, hashing it if it changed
+
+        :param sri: Compute the SRI hash if the entry has none
+        """
+        file_path = os.path.join(self.base_dir, rel)
+        try:
+            st = os.stat(file_path)
+        except FileNotFoundError as exc:
+            raise FileNotFoundError(
+                f"cache_bust enabled but resource {file_path} does not exist"
+            ) from exc
+
+        entry = self.files.get(rel)
+        if (
+            entry is None
+            or entry["size"] != st.st_size
+            or entry["mtime"] != st.st_mtime_ns
+            or (sri and "sri" not in entry)
+        ):
+            # A file which had an SRI hash keeps getting one
+            sri = sri or (entry is not None and "sri" in entry)
+            entry = _new_entry(file_path, st, sri)
+            self.files[rel] = entry
+        return entry
+
+    def entry(self, source: str, sri: bool = False) -> dict[str, Any]:
+        """
+        Return the manifest entry for a resource path or URI
+
+        The file is checked if it is unknown, or if it was last checked
+        more than `settings.stat_poll_interval` seconds ago and the
+        manifest isn't frozen.
+
+        :param sri: Make sure the entry has an SRI hash
+        """
+        rel = _relative_path(_split_source(source)[0])
+        entry = self.files.get(rel)
+        missing_sri = sri and entry is not None and "sri" not in entry
+        if entry is not None and self.frozen and not missing_sri:
+            return entry
+
+        now = time()
+        checked = self._checked.get(rel)
+        if (
+            entry is None
+            or missing_sri
+            or checked is None
+            or now - checked > settings.stat_poll_interval
+        ):
+            entry = self._stat_entry(rel, sri)
+            self._checked[rel] = now
+        return entry
+
+    def path(self, source: str) -> str:
+        """
+        Return the file path of a resource path or URI
+        """
+        rel = _relative_path(_split_source(source)[0])
+        return os.path.join(self.base_dir, rel)
+
+    def fingerprint(self, source: str) -> str:
+        """
+        Return the content fingerprint of a resource path or URI
+        """
+        return self.entry(source)["hash"]
+
+    def integrity(self, source: str) -> str:
+        """
+        Return the SRI hash of a resource path or URI,
+        i.e. "sha384-..."
+        """
+        return self.entry(source, sri=True)["sri"]
+
+    def uri(self, source: str) -> str:
+        """
+        Return the resource URI with its fingerprint added to the query
+        string as `settings.query_string`. Other parts are kept as written.
+        """
+        cached = self._uris.get(source)
+        if cached is not None and self.frozen:
+            return cached[1]
+
+        fingerprint = self.fingerprint(source)
+        if cached is not None and cached[0] == fingerprint:
+            return cached[1]
+
+        path, query, fragment = _split_source(source)
+        param = f"{settings.query_string}={fingerprint}"
+        uri = f"{path}?{query}&{param}" if query else f"{path}?{param}"
+        if fragment:
+            uri = f"{uri}#{fragment}"
+
+        self._uris.put(source, (fingerprint, uri), settings.cache_cap)
+        return uri
+
+    def scan(
+        self,
+        workers: int | None = None,
+        exclude: Iterable[str] = (),
+        sri: bool = False,
+    ) -> int:
+        """
+        Fingerprint every file below the base directory
+
+        Files whose size and mtime match their entry are not read again,
+        and entries of deleted files are dropped.
+
+        :param workers: Threads hashing files. Defaults to the CPU count.
+        :param exclude: Relative paths to leave out, i.e. the manifest itself
+        :param sri: Compute SRI hashes for every file.
+                    Files which had one keep getting one regardless.
+        :return: Number of files hashed
+        """
+        excluded = {_relative_path(rel) for rel in exclude}
+        stats: dict[str, os.stat_result] = {}
+        for root, _dirs, names in os.walk(self.base_dir):
+            for name in names:
+                file_path = os.path.join(root, name)
+                rel = os.path.relpath(file_path, self.base_dir)
+                rel = rel.replace(os.sep, "/")
+                if rel not in excluded:
+                    stats[rel] = os.stat(file_path)
+
+        changed: list[tuple[str, bool]] = []
+        for rel, st in stats.items():
+            entry = self.files.get(rel)
+            if (
+                entry is None
+                or entry["size"] != st.st_size
+                or entry["mtime"] != st.st_mtime_ns
+                or (sri and "sri" not in entry)
+            ):
+                changed.append(
+                    (rel, sri or (entry is not None and "sri" in entry))
+                )
+
+        # hashlib releases the GIL while hashing, so threads read and hash
+        # files in parallel
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            entries = pool.map(
+                lambda job: _new_entry(
+                    os.path.join(self.base_dir, job[0]), stats[job[0]], job[1]
+                ),
+                changed,
+            )
+            for (rel, _), entry in zip(changed, entries):
+                self.files[rel] = entry
+
+        for rel in self.files.keys() - stats.keys():
+            del self.files[rel]
+
+        now = time()
+        self._checked = dict.fromkeys(self.files, now)
+        self._uris.clear()
+        return len(changed)
+
+    def save(self, file_path: str):
+        """
+        Write the manifest as JSON
+        """
+        tmp = f"{file_path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(
+                {"version": MANIFEST_VERSION, "files": self.files},
+                f,
+                sort_keys=True,
+            )
+        os.replace(tmp, file_path)
+
+    @classmethod
+    def load(
+        cls, file_path: str, base_dir: str, frozen: bool = True
+    ) -> "AssetManifest":
+        """
+        Read a manifest written by `save`
+
+        :param file_path: Manifest file
+        :param base_dir: Directory which resource paths are relative to
+        :param frozen: Trust the entries without checking the files
+        """
+        with open(file_path, encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("version") != MANIFEST_VERSION:
+            raise ValueError(
+                f"Unsupported manifest version in {file_path}: "
+                f"{data.get('version')}"
+            )
+        manifest = cls(base_dir, frozen=frozen)
+        manifest.files = data["files"]
+        return manifest
+
+
+def get_manifest() -> AssetManifest:
+    """
+    Return the manifest for `settings.base_dir`
+
+    It is loaded from `settings.manifest_file` if set,
+    otherwise it fills in as files are used.
+    """
+    base_dir = settings.base_dir
+    manifest_file = settings.manifest_file
+    manifest = _State.manifest
+    if manifest is not None and _State.manifest_source == (
+        base_dir,
+        manifest_file,
+    ):
+        return manifest
+
+    if not os.path.isdir(base_dir):
+        raise FileNotFoundError(
+            "cache_bust enabled but resource.settings.base_dir "
+            f"{base_dir} does not exist"
+        )
+    if manifest_file:
+        manifest = AssetManifest.load(manifest_file, base_dir)
+    else:
+        manifest = AssetManifest(base_dir)
+    _State.manifest = manifest
+    _State.manifest_source = (base_dir, manifest_file)
+    return manifest
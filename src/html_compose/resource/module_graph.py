@@ -0,0 +1,131 @@
+"""
+Static import graph of local ES modules
+
+`js_import(..., preload_imports=True)` reads a local module, follows its
+static `import`/`export ... from` statements to other local modules and
+preloads all of them, so the browser doesn't discover the graph one
+round-trip at a time.
+
+Only relative ("./x.js", "../x.js") and absolute path ("/x.js") specifiers
+are followed. Bare specifiers ("alpinejs") resolve through the import map
+and full URLs are remote, so both are left to their own `js_import`.
+Dynamic `import()` is not followed, it is loaded on demand by design.
+Imports inside comments, strings and template literals are ignored.
+
+The specifiers of each file are cached by its content fingerprint, so a
+file is parsed again only when it changes.
+"""
+
+import posixpath
+import re
+
+from . import _State, settings
+from .manifest import get_manifest
+
+# Strings and template literals, kept, or comments, replaced by a space
+_JS_STRINGS_COMMENTS = re.compile(
+    r"""("(?:\\.|[^"\\\n])*"|'(?:\\.|[^'\\\n])*'|`(?:\\.|[^`\\])*`)"""
+    r"""|//[^\n]*|/\*.*?(?:\*/|$)""",
+    re.S,
+)
+# import x from "m", import {a, b as c} from "m", import * as x from "m",
+# import "m", export {a} from "m", export * from "m".
+# Other strings are matched as well, so text inside them is skipped.
+_STATIC_IMPORT = re.compile(
+    r"""(?<![\w$.])(?:import|export)\s*"""
+    r"""(?:[\w$*{}\s,]*?\s*\bfrom\s*)?(["'])([^"'\n]+)\1"""
+    r"""|"(?:\\.|[^"\\\n])*"|'(?:\\.|[^'\\\n])*'|`(?:\\.|[^`\\])*`""",
+    re.S,
+)
+# Imports of other files, i.e. JSON or CSS modules, aren't preloaded
+_MODULE_EXTENSIONS = (".js", ".mjs")
+
+
+def _specifiers(file_path: str) -> tuple[str, ...]:
+    """
+    Return the specifiers of a module's static imports, in source order
+    """
+    with open(file_path, encoding="utf-8") as f:
+        source = f.read()
+    # Commented out imports aren't imports
+    source = _JS_STRINGS_COMMENTS.sub(lambda m: m.group(1) or " ", source)
+    specifiers = dict.fromkeys(
+        m.group(2) for m in _STATIC_IMPORT.finditer(source) if m.group(2)
+    )
+    return tuple(specifiers)
+
+
+def _local_imports(url: str) -> tuple[str, ...]:
+    """
+    Return the specifiers of a local module, cached per content fingerprint
+    """
+    manifest = get_manifest()
+    fingerprint = manifest.fingerprint(url)
+    cache = _State.module_imports
+    cached = cache.get(url)
+    if cached is not None and cached[0] == fingerprint:
+        return cached[1]
+
+    specifiers = _specifiers(manifest.path(url))
+    cache.put(url, (fingerprint, specifiers), settings.cache_cap)
+    return specifiers
+
+
+def _resolve(specifier: str, importer: str) -> str | None:
+    """
+    Resolve a specifier against the URL of the importing module
+
+    :return: URL of a local module, or None if it isn't followed
+    """
+    if specifier.startswith("/"):
+        if specifier.startswith("//"):
+            # Protocol relative, remote
+            return None
+        return posixpath.normpath(specifier)
+    if not specifier.startswith(("./", "../")):
+        # Bare specifier or full URL
+        return None
+
+    url = posixpath.normpath(
+        posixpath.join(posixpath.dirname(importer), specifier)
+    )
+    if importer.startswith("/"):
+        return url
+    # Keep relative URLs in the "./" form of the entry
+    return url if url.startswith("../") else f"./{url}"
+
+
+def module_dependencies(source: str) -> list[str]:
+    """
+    Return the URLs of every local module `source` imports statically,
+    directly or transitively, in breadth first order
+
+    Specifiers which don't resolve to a .js/.mjs file below
+    `settings.base_dir` are skipped, the browser reports them if they
+    are real.
+
+    :param source: URL of a local module, as passed to `js_import`
+    """
+    entry = source.partition("#")[0].partition("?")[0]
+    seen = {posixpath.normpath(entry)}
+    queue = [entry]
+    dependencies = []
+    for importer in queue:
+        try:
+            specifiers = _local_imports(importer)
+        except (FileNotFoundError, UnicodeDecodeError):
+            if importer is entry:
+                raise
+            # Not a local module after all
+            continue
+        if importer is not entry:
+            dependencies.append(importer)
+        for specifier in specifiers:
+            url = _resolve(specifier.partition("?")[0], importer)
+            if url is None or not url.endswith(_MODULE_EXTENSIONS):
+                continue
+            key = posixpath.normpath(url)
+            if key not in seen:
+                seen.add(key)
+                queue.append(url)
+    return dependencies
@@ -1,72 +1,140 @@
-import urllib
-import urllib.parse
-from os import path, stat
-from time import time
+import posixpath
+import re
 
 from . import _State, settings
+from .manifest import get_manifest
 
 
 def _cachebust_resource_uri(source: str):
     """
-    Returns the source URI - with cache busting if enabled
-    which is implemented by getting the mtime of the local file
+    Returns the source URI with the content fingerprint of the local file
+    added to its query string
 
-    This operation performs up to two fs stats per call
+    Fingerprints come from the manifest for `settings.base_dir`,
+    see `resource.manifest`.
+    """
+    return get_manifest().uri(source)
+
+
+def _resource_integrity(source: str) -> str:
+    """
+    Returns the SRI hash of the local file, for `hash="auto"`
+
+    Hashes are computed once per file version and kept in the manifest for
+    `settings.base_dir`, see `resource.manifest`.
+    """
+    if "//" in source.partition("?")[0]:
+        raise ValueError(
+            f'hash="auto" only works for local resources, got {source}'
+        )
+    return get_manifest().integrity(source)
+
+
+# Strings and comments, found in one pass so neither hides the other
+_CSS_STRINGS_COMMENTS = re.compile(
+    r"""("(?:\\.|[^"\\])*"|'(?:\\.|[^'\\])*')|/\*.*?(?:\*/|$)""", re.S
+)
+_CSS_SPACE = re.compile(r"\s+")
+# Whitespace which never matters next to these
+_CSS_PUNCTUATION = re.compile(r" ?([{};,]) ?")
+# url() and @import references, or a string or comment to leave alone
+_CSS_REFERENCE = re.compile(
+    r"""(?<![\w-])(?i:url)\(\s*(?:"((?:\\.|[^"\\])*)"|'((?:\\.|[^'\\])*)'"""
+    r"""|([^"'()\s]+))\s*\)"""
+    r"""|(@(?i:import)\s*)(?:"((?:\\.|[^"\\])*)"|'((?:\\.|[^'\\])*)')"""
+    r"""|"(?:\\.|[^"\\])*"|'(?:\\.|[^'\\])*'|/\*.*?(?:\*/|$)""",
+    re.S,
+)
+
+
+def _minify_css(css: str) -> str:
+    """
+    Conservative CSS minifier: drops comments and redundant whitespace
+    """
+
+    def squeeze(text: str) -> str:
+        text = _CSS_PUNCTUATION.sub(r"\1", _CSS_SPACE.sub(" ", text))
+        return text.replace(";}", "}")
 
-    1. The base static directory is checked once and cached per interpreter
-    2. The specific resource is checked if it is time to poll again
-        based on settings.stat_poll_interval
+    out = []
+    # Text between strings, with comments replaced by a space since
+    # a comment may separate tokens, i.e. a/**/b
+    text = []
+    pos = 0
+    for match in _CSS_STRINGS_COMMENTS.finditer(css):
+        text.append(css[pos : match.start()])
+        if match.group(1):
+            out.append(squeeze("".join(text)))
+            out.append(match.group(1))
+            text.clear()
+        else:
+            text.append(" ")
+        pos = match.end()
+    text.append(css[pos:])
+    out.append(squeeze("".join(text)))
+    return "".join(out).strip()
+
+
+def _rebase_css_urls(css: str, source_path: str) -> str:
     """
+    Make relative url() and @import references relative to the document,
+    since inlined css no longer lives at its own URL
+    """
+    base = posixpath.dirname(source_path)
+
+    def rebase_url(url: str) -> str:
+        if url.startswith(("/", "#", "data:")) or "//" in url.split("?")[0]:
+            return url
+        url = posixpath.normpath(posixpath.join(base, url))
+        if source_path.startswith("./") and not url.startswith("../"):
+            url = f"./{url}"
+        return url
+
+    def rebase(match: re.Match) -> str:
+        double, single, bare, at_import, import_double, import_single = (
+            match.groups()
+        )
+        if at_import is not None:
+            if import_double is not None:
+                return f'{at_import}"{rebase_url(import_double)}"'
+            return f"{at_import}'{rebase_url(import_single)}'"
+        if double is not None:
+            return f'url("{rebase_url(double.strip())}")'
+        if single is not None:
+            return f"url('{rebase_url(single.strip())}')"
+        if bare is not None:
+            return f"url({rebase_url(bare)})"
+        # A string or comment
+        return match.group(0)
+
+    return _CSS_REFERENCE.sub(rebase, css)
+
+
+def _inline_stylesheet(source: str) -> tuple[str, int]:
+    """
+    Returns the minified contents of a local stylesheet for a <style>
+    element and their size in bytes
+
+    The file is read once per content fingerprint, and up to
+    `settings.inline_css_cache_cap` stylesheets are kept.
+    """
+    source_path = source.partition("#")[0].partition("?")[0]
+    if "//" in source_path:
+        raise ValueError(f"Only local stylesheets can be inlined, got {source}")
+
+    manifest = get_manifest()
+    fingerprint = manifest.fingerprint(source)
+    cache = _State.inline_css
+    cached = cache.get(source)
+    if cached is not None and cached[0] == fingerprint:
+        return cached[1], cached[2]
+
+    with open(manifest.path(source), encoding="utf-8") as f:
+        css = _minify_css(f.read())
+    css = _rebase_css_urls(css, source_path)
+    # </style> would end the element early. \/ is a valid css escape.
+    css = css.replace("</", "<\\/")
+    size = len(css.encode("utf-8"))
 
-    misc_stat_cache = _State.misc_stat_cache
-    stat_cache = _State.stat_cache
-    base_dir = settings.base_dir
-
-    if misc_stat_cache.get(base_dir) is None:
-        try:
-            misc_stat_cache[base_dir] = int(stat(base_dir).st_mtime)
-        except FileNotFoundError as exc:
-            raise FileNotFoundError(
-                "js_import cache_bust enabled but "
-                f"js_import.settings.base_dir {base_dir} "
-                "does not exist"
-            ) from exc
-
-    resource_path = path.join(base_dir, source.lstrip("/"))
-    now = time()
-    ts = misc_stat_cache.get(path.join(base_dir, source), None)
-    update_ts = ts is None or (now - ts) > settings.stat_poll_interval
-    if update_ts:
-        try:
-            ts = int(stat(resource_path).st_mtime)
-        except FileNotFoundError as exc:
-            raise FileNotFoundError(
-                "js_import cache_bust enabled but "
-                f"resource {resource_path} "
-                "does not exist"
-            ) from exc
-
-        if len(stat_cache) >= settings.cache_cap:
-            # Clear if it's too big
-            stat_cache.clear()
-        stat_cache[resource_path] = ts
-
-    assert ts is not None, "ts should be set by now"
-
-    spliturl = urllib.parse.urlsplit(source)
-    pairs = urllib.parse.parse_qsl(
-        spliturl.query,
-        keep_blank_values=True,
-        encoding="utf-8",
-        errors="surrogateescape",
-    )
-    # add our cache buster
-    pairs.append((settings.query_string, str(int(ts))))
-    # re assemble the query string, try our best to preservees exactly
-    new_qs = urllib.parse.urlencode(
-        pairs,
-        quote_via=urllib.parse.quote,
-        encoding="utf-8",
-        errors="surrogateescape",
-    )
-    return spliturl._replace(query=new_qs).geturl()
+    cache.put(source, (fingerprint, css, size), settings.inline_css_cache_cap)
+    return css, size
@@ -0,0 +1,575 @@
+"""
+Streaming stages for rendered output
+
+`BaseElement.resolve` and `document_streamer` produce HTML as an iterator of
+strings. The helpers in this module consume that iterator and transform it
+incrementally, so a page never has to be held in memory as one string.
+
+## Compression
+
+```python
+from html_compose import body, main, nav
+from html_compose.stream import compress_stream, flush_point, static_fragment
+
+site_nav = static_fragment(nav[...])  # module level, rendered once
+
+page = body[
+    site_nav,
+    flush_point(),  # the browser gets the nav before the slow part
+    main[lambda: slow_query()],
+]
+
+for chunk in compress_stream(page.resolve(), "gzip"):
+    send(chunk)
+```
+
+* `compress_stream` yields compressed `bytes` as input arrives.
+  gzip and deflate are always available, zstd when the standard library
+  provides `compression.zstd` (Python 3.14+).
+* `flush_point()` renders nothing, but tells compression stages to emit
+  everything produced so far (a sync flush).
+* `static_fragment` renders its content once. The compressed form is cached
+  on the fragment per encoding and spliced into the stream as-is, so shared
+  layout bytes are compressed once per process instead of once per request.
+
+## Content digests
+
+A running digest (blake2b) can be computed while a page renders,
+which is enough to answer conditional requests with an ETag.
+
+```python
+html, digest = page.render_with_digest()
+
+stream = digest_stream(document_streamer(body=page))
+for chunk in stream:
+    send(chunk)
+trailer_etag = stream.etag()
+
+# Only the digest, nothing is concatenated
+if content_digest(page) == client_etag:
+    return not_modified()
+```
+
+A `static_fragment` contributes its own cached digest instead of its bytes,
+so fragments are never re-hashed. The digest is therefore specific to this
+module, and is stable for equal output built from equal fragments.
+
+## UTF-8 output
+
+Servers and file writers want bytes. `encode_stream` encodes chunks
+incrementally into a reused buffer and yields buffer sized `bytes`, so the
+page never exists as both a `str` and its encoded copy.
+
+```python
+page.render_bytes()
+for data in page.resolve_bytes():
+    sock.sendall(data)
+```
+
+A `static_fragment` encodes once and its cached bytes are reused.
+"""
+
+import hashlib
+import zlib
+from typing import Generator, Iterable, Iterator, Literal
+
+from . import escape_text, unsafe_text
+from .base_types import ElementBase, Node, _HasHtml
+from .util_funcs import flatten_iterable, is_iterable_but_not_str
+
+try:
+    from compression import zstd as _zstd  # type: ignore[import-not-found]
+except ImportError:  # Python < 3.14
+    _zstd = None
+
+Encoding = Literal["gzip", "deflate", "zstd"]
+
+ENCODINGS: tuple[str, ...] = ("gzip", "deflate") + (
+    ("zstd",) if _zstd is not None else ()
+)
+"""Content encodings supported by `compress_stream` in this interpreter"""
+
+# Small chunks are joined until this many characters are pending
+# before they are handed to the compressor
+BATCH_SIZE = 16 * 1024
+
+# encode_stream yields once this many bytes are buffered
+BUFFER_SIZE = 16 * 1024
+
+# Size in bytes of content digests
+DIGEST_SIZE = 16
+
+_GZIP_HEADER = b"\x1f\x8b\x08\x00\x00\x00\x00\x00\x00\xff"
+
+
+def encode_chunk(chunk: str | bytes) -> bytes:
+    """
+    Encode a rendered chunk as UTF-8
+    """
+    if isinstance(chunk, bytes):
+        return chunk
+    if isinstance(chunk, _FragmentChunk):
+        return chunk.fragment.encoded()
+    return chunk.encode("utf-8")
+
+
+class StreamMarker(str):
+    """
+    A rendered chunk which carries meaning for stream stages.
+
+    Markers are str instances, so joining a stream which contains them
+    produces exactly the same HTML as if they were plain strings.
+    """
+
+
+class _FlushMarker(StreamMarker):
+    pass
+
+
+FLUSH = _FlushMarker("")
+"""Marker chunk requesting a sync flush from compression stages"""
+
+
+class _FragmentChunk(StreamMarker):
+    fragment: "static_fragment"
+
+
+class flush_point(ElementBase):
+    """
+    A node which renders to nothing but marks a flush point.
+
+    Compression stages emit everything produced before it,
+    so the browser can start working on e.g. the head of a page
+    while the rest is still rendering.
+    """
+
+    __slots__ = ()
+
+    def __init__(self) -> None:
+        pass
+
+    def resolve(self, parent=None) -> Generator[str, None, None]:
+        yield FLUSH
+
+    def __repr__(self) -> str:
+        return "flush_point()"
+
+
+def _render_node(node: Node) -> str:
+    """
+    Render a node which has no parent element
+    """
+    if node is None:
+        return ""
+    if isinstance(node, ElementBase):
+        return node.render()
+    if isinstance(node, _HasHtml):
+        return node.__html__()
+    if isinstance(node, (str, int)):
+        return escape_text(node)
+    if is_iterable_but_not_str(node):
+        return "".join(
+            _render_node(child)
+            for child in flatten_iterable(node)  # type: ignore[arg-type]
+        )
+
+    raise TypeError(f"Unsupported static_fragment content: {type(node)}")
+
+
+class static_fragment(ElementBase):
+    """
+    Pre-rendered HTML which is shared between renders.
+
+    The content is rendered once, at construction. This includes calling
+    any callables in the tree, so per-request content does not belong here.
+
+    Stream stages cache what they derive from a fragment on the fragment
+    itself, i.e. the encoded and compressed bytes, so a fragment declared at
+    module level is processed once per process.
+    """
+
+    def __init__(self, content: Node) -> None:
+        """
+        :param content: An element, text or list of nodes to pre-render.
+        """
+        self.html: str = _render_node(content)
+        self._chunk = _FragmentChunk(self.html)
+        self._chunk.fragment = self
+        self._encoded: bytes | None = None
+        self._digest: bytes | None = None
+        self._compressed: dict[tuple[str, int | None], bytes] = {}
+        self._splits: dict[str, tuple["static_fragment", ...]] = {}
+
+    def split(self, sep: str) -> tuple["static_fragment", ...]:
+        """
+        Return the fragment split at each occurrence of sep, computed once
+
+        The parts are fragments themselves, so stream stages can
+        substitute per-request text between cached parts.
+        A fragment without sep returns itself as the only part.
+        """
+        parts = self._splits.get(sep)
+        if parts is None:
+            if sep in self.html:
+                parts = tuple(
+                    static_fragment(unsafe_text(part))
+                    for part in self.html.split(sep)
+                )
+            else:
+                parts = (self,)
+            self._splits[sep] = parts
+        return parts
+
+    def encoded(self) -> bytes:
+        """
+        Return the UTF-8 encoded fragment
+        """
+        if self._encoded is None:
+            self._encoded = self.html.encode("utf-8")
+        return self._encoded
+
+    def digest(self) -> bytes:
+        """
+        Return the digest of the fragment, computed once
+        """
+        if self._digest is None:
+            self._digest = hashlib.blake2b(
+                self.encoded(), digest_size=DIGEST_SIZE
+            ).digest()
+        return self._digest
+
+    def compressed(self, encoding: Encoding, level: int | None) -> bytes:
+        """
+        Return the fragment compressed for splicing into a stream.
+
+        For gzip and deflate this is a raw deflate segment ending on a sync
+        flush, for zstd a complete frame.
+        """
+        # gzip and deflate share the same raw deflate segment
+        key = ("zstd" if encoding == "zstd" else "deflate", level)
+        data = self._compressed.get(key)
+        if data is None:
+            if encoding == "zstd":
+                assert _zstd is not None
+                data = _zstd.compress(self.encoded(), level)
+            else:
+                comp = zlib.compressobj(
+                    _zlib_level(level), zlib.DEFLATED, -zlib.MAX_WBITS
+                )
+                data = comp.compress(self.encoded()) + comp.flush(
+                    zlib.Z_SYNC_FLUSH
+                )
+            self._compressed[key] = data
+        return data
+
+    def resolve(self, parent=None) -> Generator[str, None, None]:
+        yield self._chunk
+
+    def render(self, parent=None) -> str:
+        return self.html
+
+    def __html__(self) -> str:
+        return self.html
+
+    def __repr__(self) -> str:
+        return f"static_fragment({self.html!r})"
+
+
+def _zlib_level(level: int | None) -> int:
+    return zlib.Z_DEFAULT_COMPRESSION if level is None else level
+
+
+class _ZlibCompressor:
+    """
+    gzip (RFC 1952) or zlib/deflate (RFC 1950) writer
+
+    The container is written by hand around a raw deflate stream,
+    which is what allows pre-compressed fragments to be spliced in.
+    """
+
+    def __init__(self, encoding: str, level: int | None):
+        self.gzip = encoding == "gzip"
+        self.level = _zlib_level(level)
+        self.raw_level = level
+        self.check = zlib.crc32(b"") if self.gzip else zlib.adler32(b"")
+        self.size = 0
+        self.deflate = self._new_deflate()
+
+    def _new_deflate(self):
+        return zlib.compressobj(self.level, zlib.DEFLATED, -zlib.MAX_WBITS)
+
+    def _track(self, data: bytes):
+        if self.gzip:
+            self.check = zlib.crc32(data, self.check)
+        else:
+            self.check = zlib.adler32(data, self.check)
+        self.size += len(data)
+
+    def header(self) -> bytes:
+        if self.gzip:
+            return _GZIP_HEADER
+        # Borrow the two byte zlib header for this level
+        return zlib.compress(b"", self.level)[:2]
+
+    def compress(self, data: bytes) -> bytes:
+        self._track(data)
+        return self.deflate.compress(data)
+
+    def flush(self) -> bytes:
+        return self.deflate.flush(zlib.Z_SYNC_FLUSH)
+
+    def splice(self, fragment: static_fragment) -> bytes:
+        out = self.deflate.flush(zlib.Z_SYNC_FLUSH)
+        encoding: Encoding = "gzip" if self.gzip else "deflate"
+        out += fragment.compressed(encoding, self.raw_level)
+        self._track(fragment.encoded())
+        # The fragment's bytes are in the decoder's window but not in ours,
+        # so back references have to start over after it.
+        self.deflate = self._new_deflate()
+        return out
+
+    def finish(self) -> bytes:
+        out = self.deflate.flush(zlib.Z_FINISH)
+        if self.gzip:
+            trailer = self.check.to_bytes(4, "little") + (
+                self.size & 0xFFFFFFFF
+            ).to_bytes(4, "little")
+        else:
+            trailer = self.check.to_bytes(4, "big")
+        return out + trailer
+
+
+class _ZstdCompressor:
+    """
+    zstd writer
+
+    zstd decoders accept concatenated frames,
+    so fragments are spliced in as frames of their own.
+    """
+
+    def __init__(self, level: int | None):
+        assert _zstd is not None
+        self.level = level
+        self.comp = _zstd.ZstdCompressor(level)
+        self.pending = False
+
+    def header(self) -> bytes:
+        return b""
+
+    def compress(self, data: bytes) -> bytes:
+        self.pending = True
+        return self.comp.compress(data)
+
+    def flush(self) -> bytes:
+        return self.comp.flush(_zstd.ZstdCompressor.FLUSH_BLOCK)
+
+    def splice(self, fragment: static_fragment) -> bytes:
+        out = b""
+        if self.pending:
+            out = self.comp.flush(_zstd.ZstdCompressor.FLUSH_FRAME)
+            self.comp = _zstd.ZstdCompressor(self.level)
+            self.pending = False
+        return out + fragment.compressed("zstd", self.level)
+
+    def finish(self) -> bytes:
+        return self.comp.flush(_zstd.ZstdCompressor.FLUSH_FRAME)
+
+
+def compress_stream(
+    chunks: Iterable[str | bytes],
+    encoding: Encoding = "gzip",
+    level: int | None = None,
+    flush_each: bool = False,
+) -> Generator[bytes, None, None]:
+    """
+    Compress rendered chunks as they are produced.
+
+    Small chunks are batched before compression. Output is yielded whenever
+    the compressor produces it, at every flush point and at the end.
+
+    :param chunks: Output of `resolve()`, `document_streamer` or any
+                   iterable of str/bytes. str is encoded as UTF-8.
+    :param encoding: "gzip", "deflate" or "zstd". See `ENCODINGS`.
+    :param level: Compression level. None uses the library default.
+    :param flush_each: Sync flush after every input chunk. This suits
+                       `document_streamer(stream_mode="head_only")`,
+                       which yields the head and then the body.
+
+    :return: A generator of compressed bytes,
+             suitable as a `Content-Encoding: {encoding}` body.
+    """
+    if encoding not in ENCODINGS:
+        raise ValueError(
+            f"Unsupported encoding {encoding!r}, expected one of {ENCODINGS}"
+        )
+
+    comp: _ZlibCompressor | _ZstdCompressor
+    if encoding == "zstd":
+        comp = _ZstdCompressor(level)
+    else:
+        comp = _ZlibCompressor(encoding, level)
+
+    pending: list[str] = []
+    pending_size = 0
+
+    def drain() -> bytes:
+        nonlocal pending_size
+        if not pending:
+            return b""
+        data = "".join(pending).encode("utf-8")
+        pending.clear()
+        pending_size = 0
+        return comp.compress(data)
+
+    # The container header goes out with the first compressed bytes
+    out = b""
+    header = comp.header()
+    for chunk in chunks:
+        if isinstance(chunk, StreamMarker):
+            if chunk is FLUSH:
+                out += drain() + comp.flush()
+            elif isinstance(chunk, _FragmentChunk):
+                out += drain() + comp.splice(chunk.fragment)
+            else:
+                pending.append(chunk)
+                pending_size += len(chunk)
+        elif isinstance(chunk, bytes):
+            out += drain() + comp.compress(chunk)
+        else:
+            pending.append(chunk)
+            pending_size += len(chunk)
+            if pending_size >= BATCH_SIZE:
+                out += drain()
+
+        if flush_each:
+            out += drain() + comp.flush()
+
+        if out:
+            yield header + out
+            header = out = b""
+
+    out += drain() + comp.finish()
+    yield header + out
+
+
+def _update_digest(hasher, chunk: str | bytes):
+    if isinstance(chunk, _FragmentChunk):
+        hasher.update(chunk.fragment.digest())
+    else:
+        hasher.update(encode_chunk(chunk))
+
+
+class digest_stream:
+    """
+    Pass rendered chunks through while computing their digest.
+
+    The digest is final once the stream is exhausted.
+    """
+
+    def __init__(self, chunks: Iterable[str | bytes]):
+        """
+        :param chunks: Output of `resolve()`, `document_streamer`
+                       or any iterable of str/bytes.
+        """
+        self._chunks = chunks
+        self._hasher = hashlib.blake2b(digest_size=DIGEST_SIZE)
+
+    def __iter__(self) -> Iterator[str | bytes]:
+        hasher = self._hasher
+        for chunk in self._chunks:
+            _update_digest(hasher, chunk)
+            yield chunk
+
+    def hexdigest(self) -> str:
+        """
+        Return the digest of all chunks seen so far as a hex string
+        """
+        return self._hasher.hexdigest()
+
+    def etag(self, weak: bool = False) -> str:
+        """
+        Return the digest formatted as an ETag header value
+        """
+        tag = f'"{self.hexdigest()}"'
+        return f"W/{tag}" if weak else tag
+
+
+def render_with_digest(
+    node: ElementBase, parent: ElementBase | None = None
+) -> tuple[str, str]:
+    """
+    Render a node and compute its content digest in the same pass.
+
+    :return: (html, hex digest)
+    """
+    stream = digest_stream(node.resolve(parent))
+    html = "".join(stream)  # type: ignore[arg-type]
+    return html, stream.hexdigest()
+
+
+def content_digest(
+    source: ElementBase | Iterable[str | bytes],
+    parent: ElementBase | None = None,
+) -> str:
+    """
+    Compute the content digest without building the output.
+
+    This is the "dry" mode of `render_with_digest`: chunks are hashed and
+    discarded, and fragments only contribute their cached digest.
+
+    :param source: An element or an iterable of rendered chunks
+    :return: hex digest
+    """
+    chunks = (
+        source.resolve(parent) if isinstance(source, ElementBase) else source
+    )
+    hasher = hashlib.blake2b(digest_size=DIGEST_SIZE)
+    for chunk in chunks:
+        _update_digest(hasher, chunk)
+    return hasher.hexdigest()
+
+
+def encode_stream(
+    chunks: Iterable[str | bytes],
+    buffer_size: int = BUFFER_SIZE,
+    flush_each: bool = False,
+) -> Generator[bytes, None, None]:
+    """
+    Encode rendered chunks to UTF-8 incrementally.
+
+    Chunks are collected in a reused buffer which is emitted once it holds
+    `buffer_size` bytes. Chunks at least that large pass through uncopied.
+
+    :param chunks: Output of `resolve()`, `document_streamer`
+                   or any iterable of str/bytes.
+    :param buffer_size: Bytes to collect before yielding.
+    :param flush_each: Yield after every input chunk and at flush points
+                       instead of waiting for the buffer to fill.
+
+    :return: A generator of UTF-8 bytes
+    """
+    buffer = bytearray()
+    for chunk in chunks:
+        data = encode_chunk(chunk)
+        if len(data) >= buffer_size:
+            if buffer:
+                yield bytes(buffer)
+                buffer.clear()
+            yield data
+            continue
+
+        buffer += data
+        if flush_each or chunk is FLUSH or len(buffer) >= buffer_size:
+            if buffer:
+                yield bytes(buffer)
+                buffer.clear()
+
+    if buffer:
+        yield bytes(buffer)
+
+
+def render_bytes(node: ElementBase, parent: ElementBase | None = None) -> bytes:
+    """
+    Render a node directly to UTF-8 bytes
+    """
+    return b"".join(map(encode_chunk, node.resolve(parent)))
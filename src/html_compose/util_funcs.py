@@ -6,10 +6,12 @@ Not inteded to be used directly by library users.
 
 import inspect
 import json
-from functools import lru_cache
+import threading
+from functools import lru_cache, partial
 from os import getenv
 from pathlib import PurePath
-from typing import Any, Generator, Iterable
+from types import CodeType, GeneratorType, MethodType
+from typing import Any, Generator, Iterable, TypeVar
 
 
 def join_attrs(k, value_trusted):
@@ -19,14 +21,44 @@ def join_attrs(k, value_trusted):
     return f'{k}="{value_trusted}"'
 
 
+# Iterability by exact type.
+# isinstance(x, Iterable) runs the ABC subclass hooks, which is slow
+# for something asked about every child of every element.
+_iterable_types: dict[type, bool] = {
+    str: False,
+    bytes: False,
+    int: False,
+    float: False,
+    bool: False,
+    type(None): False,
+    list: True,
+    tuple: True,
+    dict: True,
+    set: True,
+    frozenset: True,
+    range: True,
+    GeneratorType: True,
+    type({}.keys()): True,
+    type({}.values()): True,
+    type({}.items()): True,
+}
+ITERABLE_TYPE_CACHE_SIZE = 1024
+
+
 def is_iterable_but_not_str(input_iterable: Any) -> bool:
     """
     Check if an iterable is not a string or bytes.
     Which prevents some bugs.
+
+    The answer is cached per type.
     """
-    return isinstance(input_iterable, Iterable) and not isinstance(
-        input_iterable, (str, bytes)
-    )
+    cls = type(input_iterable)
+    result = _iterable_types.get(cls)
+    if result is None:
+        result = issubclass(cls, Iterable) and not issubclass(cls, (str, bytes))
+        if len(_iterable_types) < ITERABLE_TYPE_CACHE_SIZE:
+            _iterable_types[cls] = result
+    return result
 
 
 def flatten_iterable(input_iterable: Iterable) -> Generator[Any, None, None]:
@@ -36,26 +68,94 @@ def flatten_iterable(input_iterable: Iterable) -> Generator[Any, None, None]:
     stack = [iter(input_iterable)]
 
     while stack:
-        try:
-            # Get next element from top iterator on the stack
-            current = next(stack[-1])
-            if is_iterable_but_not_str(current):
-                stack.append(
-                    iter(current)
-                )  # Push new iterator for the current iterable item
+        # Iterate the top iterator until it is exhausted or we descend.
+        # Iterators keep their position, so we resume here after a pop.
+        for current in stack[-1]:
+            cls = type(current)
+            # Magic: single item lists/tuples i.e. [li[x]] or (x,) are
+            # unwrapped in place instead of pushing an iterator for them
+            while (cls is list or cls is tuple) and len(current) == 1:
+                current = current[0]
+                cls = type(current)
+
+            if cls is list or cls is tuple:
+                if current:
+                    stack.append(iter(current))
+                    break
+            elif is_iterable_but_not_str(current):
+                # Push new iterator for the current iterable item
+                stack.append(iter(current))
+                break
             else:
                 # Item isn't iterator, yield it.
                 yield current
-        except StopIteration:
+        else:
             # The iterator was exhausted
             stack.pop()
 
 
+# Parameter counts by code object.
+# Lambdas built per request are new function objects every time,
+# but they share the code object of their definition.
+_param_counts: dict[CodeType, int] = {}
+PARAM_COUNT_CACHE_SIZE = 4096
+
+
 @lru_cache(maxsize=500)
-def get_param_count(func):
+def _signature_param_count(func) -> int:
     return len(inspect.signature(func).parameters)
 
 
+def get_param_count(func) -> int:
+    """
+    Return the number of parameters in the signature of func.
+
+    Bound arguments of methods and partials are not counted,
+    parameters with defaults, *args and **kwargs are.
+
+    Plain functions, bound methods and partials are answered from the code
+    object so they never reach inspect. Anything else, including functions
+    decorated with `functools.wraps` or carrying `__signature__`, is counted
+    with `inspect.signature`, which follows those.
+    """
+    original = func
+    bound = 0
+    while True:
+        if isinstance(func, MethodType):
+            bound += 1
+            func = func.__func__
+        elif isinstance(func, partial):
+            bound += len(func.args)
+            func = func.func
+        else:
+            break
+
+    code = getattr(func, "__code__", None)
+    if (
+        not isinstance(code, CodeType)
+        or hasattr(func, "__wrapped__")
+        or hasattr(func, "__signature__")
+    ):
+        return _signature_param_count(original)
+
+    count = _param_counts.get(code)
+    if count is None:
+        flags = code.co_flags
+        count = (
+            code.co_argcount
+            + code.co_kwonlyargcount
+            + bool(flags & inspect.CO_VARARGS)
+            + bool(flags & inspect.CO_VARKEYWORDS)
+        )
+        if len(_param_counts) < PARAM_COUNT_CACHE_SIZE:
+            _param_counts[code] = count
+
+    if bound:
+        # Bound arguments only consume positional parameters
+        return count - min(bound, code.co_argcount)
+    return count
+
+
 def safe_name(name):
     """
     Some names are reserved in Python, so we need to add an underscore
@@ -191,3 +291,37 @@ def glob_matcher(pattern, path):
         if not matched:
             return False
     return True
+
+
+K = TypeVar("K")
+V = TypeVar("V")
+
+
+class BoundedCache(dict[K, V]):
+    """
+    A dict which drops its oldest entries once it holds `cap` of them.
+
+    Reads are plain dict lookups. `put` serializes writers with a lock so
+    concurrent renders in a threaded server never evict the same entry
+    twice or iterate the dict while another thread resizes it.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._lock = threading.Lock()
+
+    def put(self, key: K, value: V, cap: int):
+        """
+        Store value under key, evicting the oldest entries if the cache
+        is full and key is new
+        """
+        with self._lock:
+            if key not in self:
+                while self and len(self) >= cap:
+                    try:
+                        oldest = next(iter(self))
+                    except (StopIteration, RuntimeError):
+                        # Cleared by another thread
+                        break
+                    self.pop(oldest, None)
+            self[key] = value
@@ -136,6 +136,70 @@ def test_yield_from():
     assert list(gen_2) == arr
 
 
+@pytest.mark.skip(reason="Performance test")
+def test_attr_coercion_performance():
+    """
+    Attribute-heavy form elements: resolving plain values directly
+    vs creating a BaseAttribute per attribute to evaluate it
+    """
+    from html_compose import BaseAttribute, input, option, select
+    from html_compose.base_attribute import resolve_attr_value
+
+    def form():
+        return [
+            input(
+                type="text",
+                name=f"field{i}",
+                id=f"field{i}",
+                class_=["form-control", "input-lg"],
+                placeholder="Name",
+                required=True,
+                maxlength=64,
+                attrs={"data-index": i, "aria-label": "Name"},
+            )
+            for i in range(2000)
+        ] + [
+            select(name="choice", class_="form-select", multiple=True)[
+                [
+                    option(
+                        value=str(i),
+                        selected=i == 3,
+                        disabled=i % 7 == 0,
+                        class_={"even": i % 2 == 0, "opt": True},
+                        label=f"Option {i}",
+                    )
+                    for i in range(200)
+                ]
+            ]
+            for _ in range(10)
+        ]
+
+    start = perf_counter()
+    form()
+    print(f"\nForm elements: {perf_counter() - start}")
+
+    attrs = [
+        ("type", "text"),
+        ("class", ["form-control", "input-lg"]),
+        ("required", True),
+        ("maxlength", 64),
+        ("class", {"even": True, "opt": True}),
+    ] * 20000
+
+    start = perf_counter()
+    for name, value in attrs:
+        BaseAttribute(name, value).evaluate()
+    with_object = perf_counter() - start
+
+    start = perf_counter()
+    for name, value in attrs:
+        resolve_attr_value(name, value)
+    direct = perf_counter() - start
+    print(f"BaseAttribute: {with_object} direct: {direct}")
+
+    assert direct < with_object
+
+
 @pytest.mark.skip(reason="Performance test")
 def test_compare_argument_style_performance():
     """
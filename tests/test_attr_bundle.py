@@ -0,0 +1,57 @@
+import pytest
+
+from html_compose import attr_bundle, button, div
+
+
+def test_bundle_matches_dict():
+    attrs = {"hx-post": "/save", "class": ["btn", "btn-primary"]}
+    bundle = attr_bundle(attrs, type="button", aria_label="Save")
+    assert dict(bundle) == {
+        "hx-post": "/save",
+        "class": "btn btn-primary",
+        "type": "button",
+        "aria-label": "Save",
+    }
+
+    expected = button(
+        attrs={**attrs, "type": "button", "aria-label": "Save"},
+        class_="wide",
+        style="margin: 0",
+    ).render()
+    assert (
+        button(attrs=bundle, class_="wide", style="margin: 0").render()
+        == expected
+    )
+
+    with pytest.raises(ValueError):
+        button(attrs=bundle, type="submit")
+
+
+def test_bundle_in_list():
+    bundle = attr_bundle(class_="a", style={"color": "red"})
+    assert (
+        div(attrs=[bundle, {"id": "x"}]).render()
+        == '<div class="a" style="color: red" id="x"></div>'
+    )
+    # Bundles nest and the element never changes the bundle
+    nested = attr_bundle(bundle, class_="b")
+    assert div(attrs=nested, class_="c").render() == (
+        '<div class="a b c" style="color: red"></div>'
+    )
+    assert bundle["class"] == "a"
+
+
+def test_bundle_equality():
+    a = attr_bundle(id="x", class_="c")
+    b = attr_bundle({"class": "c", "id": "x"})
+    assert a == b and hash(a) == hash(b)
+    assert a == {"id": "x", "class": "c"}
+
+    # Callable values take part in both
+    def label():
+        return "L"
+
+    lazy = attr_bundle(a, title=label)
+    assert lazy != a and lazy != dict(a)
+    assert lazy == attr_bundle(a, title=label)
+    assert hash(lazy) == hash(attr_bundle(a, title=label))
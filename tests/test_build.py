@@ -0,0 +1,117 @@
+import os
+import sys
+import textwrap
+import time
+
+import pytest
+
+from html_compose import build
+
+SITE = textwrap.dedent(
+    """
+    from html_compose import HTML5Document, p
+    from html_compose.build import page
+
+    import components
+
+    @page("index.html")
+    def index():
+        return HTML5Document("Home", body=[components.banner()])
+
+    @page(
+        "posts/{slug}.html",
+        params=lambda: [{"slug": s} for s in ("a", "b", "c")],
+        depends=lambda slug: [f"content/{slug}.txt"],
+    )
+    def post(slug):
+        with open(f"content/{slug}.txt") as f:
+            return p[f.read()]
+    """
+)
+
+
+@pytest.fixture
+def site(tmp_path, monkeypatch):
+    (tmp_path / "site.py").write_text(SITE)
+    (tmp_path / "components.py").write_text(
+        "from html_compose import h1\n\ndef banner():\n    return h1['Hi']\n"
+    )
+    (tmp_path / "content").mkdir()
+    for slug in "abc":
+        (tmp_path / "content" / f"{slug}.txt").write_text(f"post {slug}")
+    monkeypatch.chdir(tmp_path)
+    yield tmp_path
+    for name in ("_html_compose_build_site", "components"):
+        sys.modules.pop(name, None)
+
+
+def bump(path, text):
+    path.write_text(text)
+    # Make sure the mtime moves even on coarse filesystems
+    stamp = time.time() + 10
+    os.utime(path, (stamp, stamp))
+
+
+def test_build_incremental(site):
+    result = build.build("site.py", out_dir="out", workers=1)
+    assert sorted(result.written) == [
+        "index.html",
+        "posts/a.html",
+        "posts/b.html",
+        "posts/c.html",
+    ]
+    assert (site / "out" / "posts" / "b.html").read_text() == "<p>post b</p>"
+
+    result = build.build("site.py", out_dir="out", workers=1)
+    assert result.rendered == 0
+    assert len(result.skipped) == 4
+
+    # A data file change only affects its page
+    bump(site / "content" / "b.txt", "post b v2")
+    result = build.build("site.py", out_dir="out", workers=1)
+    assert result.written == ["posts/b.html"]
+    assert (site / "out" / "posts" / "b.html").read_text() == "<p>post b v2</p>"
+
+    # A component module change re-renders only pages which use it,
+    # and unchanged output is not written
+    bump(site / "components.py", (site / "components.py").read_text() + "\n")
+    result = build.build("site.py", out_dir="out", workers=1)
+    assert result.written == []
+    assert result.unchanged == ["index.html"]
+    assert len(result.skipped) == 3
+
+    # The page module itself is a dependency of every page
+    bump(site / "site.py", (site / "site.py").read_text() + "\n")
+    result = build.build("site.py", out_dir="out", workers=1)
+    assert len(result.unchanged) == 4
+
+    result = build.build("site.py", out_dir="out", workers=1, force=True)
+    assert len(result.unchanged) == 4
+    assert "pages/s" in result.summary()
+
+
+def test_build_process_pool(site):
+    result = build.build("site.py", out_dir="out", workers=2)
+    assert len(result.written) == 4
+    index = (site / "out" / "index.html").read_text()
+    assert index.endswith("<body><h1>Hi</h1></body>\n</html>")
+
+
+def test_build_removes_stale_pages(site):
+    build.build("site.py", out_dir="out", workers=1)
+    assert (site / "out" / "posts" / "c.html").exists()
+
+    sys.modules.pop("_html_compose_build_site", None)
+    bump(site / "site.py", SITE.replace('("a", "b", "c")', '("a",)'))
+    result = build.build("site.py", out_dir="out", workers=1)
+    assert result.removed == ["posts/b.html", "posts/c.html"]
+    assert not (site / "out" / "posts" / "c.html").exists()
+    assert (site / "out" / "posts" / "a.html").exists()
+
+
+def test_build_rejects_paths_outside_out_dir(site):
+    bump(site / "site.py", SITE.replace('("a", "b", "c")', '("a", "../../x")'))
+    with pytest.raises(ValueError, match="outside"):
+        build.build("site.py", out_dir="out", workers=1)
+    assert not (site / "x.html").exists()
+    assert not (site / "out").exists()
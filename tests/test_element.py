@@ -1,3 +1,6 @@
+import functools
+import json
+
 import pytest
 from bs4 import BeautifulSoup
 
@@ -72,6 +75,61 @@ def test_nested_callables():
     assert a.render() == "<div>text<div>divdiv</div></div>"
 
 
+def test_chained_callables():
+    """
+    A callable returning a callable is called until it produces a node
+    """
+    a = div()[lambda: lambda x: lambda: x.tag]
+    assert a.render() == "<div>div</div>"
+    b = div()[lambda: h.br]
+    assert b.render() == "<div><br/></div>"
+
+
+def test_decorated_callable():
+    """
+    Decorated callables are called with the parameters they declare
+    """
+
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            return func(*args, **kwargs)
+
+        return wrapper
+
+    @decorator
+    def child():
+        return "x"
+
+    assert div[child].render() == "<div>x</div>"
+
+
+def test_extend_adopt():
+    """
+    Adopted lists are stored as a single segment and never mutated
+    """
+    items = [h.li[i] for i in range(3)]
+    el = h.ul(children=items)
+    el.append(h.li["end"])
+    assert len(items) == 3
+    assert el._children[0] is items
+    assert el.render() == "<ul><li>0</li><li>1</li><li>2</li><li>end</li></ul>"
+
+    el = h.ul()
+    el.extend(items)
+    el.extend((h.li[i] for i in range(3, 5)), adopt=False)
+    assert el._children[0] is items
+    assert len(el._children) == 3
+    # The element owns the list; changes before render are visible
+    items.append(h.li[9])
+    assert el.render() == (
+        "<ul><li>0</li><li>1</li><li>2</li><li>9</li><li>3</li><li>4</li></ul>"
+    )
+
+    with pytest.raises(ValueError):
+        h.br().extend(["x"])
+
+
 def test_resolve_none():
     el = div()[None].render()
     assert el == "<div></div>", "Nonetype should result in empty string"
@@ -185,6 +243,190 @@ def test_equivalent():
     assert a == b
 
 
+def test_structural_equality():
+    def tree(text="x", cls="a"):
+        return div(class_=cls)[
+            h.p["a", "b"], [h.span[i] for i in range(3)], text, h.br
+        ]
+
+    assert tree() == tree()
+    assert tree() != tree(text="y")
+    assert tree() != tree(cls="b")
+    # Text merges the way it renders, attribute order is ignored
+    assert div[h.p["ab"], [h.span[i] for i in range(3)], "x", h.br()] != tree()
+    assert h.p["ab"] == h.p["a", "b"]
+    assert div(id="i", class_="c") == div(class_="c", id="i")
+    assert h.p["<"] != h.p[h.unsafe_text("<")]
+    assert tree() == tree().render()
+
+    # Callables are evaluated with the same arguments as in render
+    assert div[lambda el: el.tag] == div["div"]
+    assert div[lambda: h.p["a"]] == div[h.p["a"]]
+    assert div[lambda: h.p["a"]] != div[lambda: h.p["b"]]
+
+
+def test_content_hash():
+    a, b = div[h.p["x", 1]], div[h.p["x1"]]
+    assert a.content_hash() == b.content_hash()
+    assert a == b
+    assert {a.content_hash(): 1}[b.content_hash()] == 1
+    # Elements are mutable, they can't be dict keys themselves
+    with pytest.raises(TypeError):
+        hash(a)
+    assert a != 1 and a.__eq__(1) is NotImplemented
+
+    a.append("more")
+    assert a.content_hash() != b.content_hash()
+    assert a != b
+
+    c = div[lambda: "x"]
+    assert c.content_hash() == div["x"].content_hash()
+
+    # Changing a nested element changes every ancestor's hash
+    inner = h.p["x"]
+    outer, other = div[inner], div[h.p["x"]]
+    assert outer.content_hash() == other.content_hash()
+    inner.append("y")
+    assert outer != other
+    assert outer.content_hash() != other.content_hash()
+    assert outer == div[h.p["xy"]]
+    inner.attrs["id"] = "i"
+    assert outer.content_hash() == div[h.p(id="i")["xy"]].content_hash()
+
+    # Digests are cached until a hashed element changes
+    first = outer.content_hash()
+    assert outer._digest is not None and inner._digest is not None
+    assert outer.content_hash() == first
+
+    # Children which may change between renders are hashed each time
+    items = [h.li["a"]]
+    listing = h.ul(children=items)
+    before = listing.content_hash()
+    assert listing._digest is None
+    items.append(h.li["b"])
+    assert listing.content_hash() != before
+
+
+def test_shared_attrs():
+    a, b = h.td(class_="num"), h.td(class_="num")
+    # Nothing is shared until a set has been rendered twice
+    assert a._attrs is not b._attrs
+    assert a._attr_string is None
+    for element in (a, b, a):
+        element.render()
+    assert a._attrs is b._attrs
+    assert a._attr_string == 'class="num"'
+    # A set seen once is rendered without being interned
+    unique = h.td(id="only-once")
+    assert unique.render() == '<td id="only-once"></td>'
+    assert unique._attr_string is None
+
+    # Reads keep the shared set
+    assert a.attrs["class"] == "num"
+    assert dict(a.attrs) == {"class": "num"}
+    assert a.attrs.copy() == {"class": "num"}
+    assert a.attrs | {"id": "y"} == {"class": "num", "id": "y"}
+    assert json.dumps(dict(a.attrs)) == '{"class": "num"}'
+    assert a._attrs is b._attrs
+
+    # Copy on write
+    a.attrs["id"] = "x"
+    assert a._attrs is not b._attrs
+    assert b.attrs == {"class": "num"}
+    assert a.render() == '<td class="num" id="x"></td>'
+    assert b.render() == '<td class="num"></td>'
+    assert h.td(class_="num").render() == '<td class="num"></td>'
+    b.attrs |= {"title": "t"}
+    assert b.render() == '<td class="num" title="t"></td>'
+    assert h.td(class_="num").render() == '<td class="num"></td>'
+
+    b.attrs = {"title": "<"}
+    assert b.render() == '<td title="&lt;"></td>'
+
+
+def test_attr_coercion_matches_base_attribute():
+    from html_compose.base_attribute import resolve_attr_value
+
+    values = [
+        "a",
+        h.unsafe_text("<b>"),
+        1,
+        True,
+        False,
+        None,
+        0,
+        [],
+        ["a", "b"],
+        {"a": True, "b": False, "c": 1},
+        {"color": "red", "margin": 0},
+    ]
+    for name in ("class", "style", "data-x"):
+        for delimiter in (" ", "; "):
+            for value in values:
+                attr = h.BaseAttribute(name, value, delimiter).evaluate()
+                expected = attr[1] if attr else None
+                assert resolve_attr_value(name, value, delimiter) == expected
+
+    for value in (["a", 1], 1.5, ("a",)):
+        with pytest.raises(ValueError):
+            resolve_attr_value("class", value)  # type: ignore[arg-type]
+
+    # Keyword style joins with "; ", a style dict in attrs= with " "
+    style = {"color": "red", "margin": 0}
+    assert div(style=style).attrs["style"] == "color: red; margin: 0"
+    assert div({"style": style}).attrs["style"] == "color: red margin: 0"
+
+
+def test_callable_attrs():
+    from contextvars import ContextVar
+
+    user = ContextVar("user", default="anon")
+    link = a(class_="nav", href=lambda: f"/u/{user.get()}")["Profile"]
+    assert link.render() == '<a class="nav" href="/u/anon">Profile</a>'
+    user.set("<b>")
+    assert link.render() == '<a class="nav" href="/u/&lt;b&gt;">Profile</a>'
+
+    # Callables get the element and parent like callable children
+    item = h.li(
+        {"aria-selected": lambda el, parent: parent is not None},
+        class_=lambda el: [el.tag],
+        id=lambda: None,
+    )
+    assert h.ul[item].render() == (
+        '<ul><li aria-selected="true" class="li"></li></ul>'
+    )
+    assert item.render() == '<li class="li"></li>'
+
+    # class/style merge with static values, other duplicates raise
+    assert (
+        div(
+            attrs={"class": "a", "style": "color: red"},
+            class_=lambda: "b",
+            style=lambda: {"margin": 0},
+        ).render()
+        == '<div class="a b" style="color: red; margin: 0"></div>'
+    )
+    with pytest.raises(ValueError):
+        div({"id": "x"}, id=lambda: "y")
+
+    # Bundles keep callables for each element
+    bundle = h.attr_bundle(href=lambda el: f"#{el.tag}")
+    assert a(attrs=bundle).render() == '<a href="#a"></a>'
+    assert h.area(attrs=[bundle]).render() == '<area href="#area"/>'
+
+    # Callables render in their declared position
+    ordered = a({"id": "x", "href": lambda: "/", "title": "t"}, class_="c")
+    assert ordered.render() == '<a id="x" href="/" title="t" class="c"></a>'
+    assert a(href=lambda: "/", rel="r").render() == '<a href="/" rel="r"></a>'
+    bundle = h.attr_bundle({"rel": lambda: "next", "id": "n"}, type_="t")
+    assert a(attrs=[{"class": "c"}, bundle]).render() == (
+        '<a class="c" rel="next" id="n" type="t"></a>'
+    )
+
+    assert link != a(class_="nav", href="/u/anon")["Profile"]
+    assert link == a(class_="nav", href="/u/<b>")["Profile"]
+
+
 def test_document():
     doc = h.HTML5Document(
         "Test", lang="en", body=[h.button["Button"], h.br(), h.p["demo 2"]]
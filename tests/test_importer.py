@@ -1,14 +1,18 @@
 import pytest
 
 import html_compose.elements as el
-from html_compose.document import HTML5Document
+from html_compose import document, resource
+from html_compose.document import HTML5Document, document_streamer
 from html_compose.resource import (
     css_import,
     font_import_manual,
     font_import_provider,
     js_import,
+    link_headers,
     to_elements,
+    to_html,
 )
+from html_compose.util_funcs import generate_livereload_env
 
 
 def get_css():
@@ -312,3 +316,67 @@ def test_document_generator():
     # print(result)
     for i, line in enumerate(result):
         assert line == expected[i], f"Line {i + 1} does not match"
+
+
+def test_head_cache():
+    resource._State.head_cache.clear()
+    fonts = get_font_manual()
+    html = to_html(get_js(), get_css(), fonts)
+    assert html == "".join(
+        e.render() for e in to_elements(get_js(), get_css(), fonts)
+    )
+    # Equal declarations share one entry
+    assert to_html(get_js(), get_css(), get_font_manual()) is html
+    assert len(resource._State.head_cache) == 1
+
+    other = to_html(get_js()[:1], get_css())
+    assert other != html
+    assert len(resource._State.head_cache) == 2
+
+
+def test_livereload_head(monkeypatch):
+    env = generate_livereload_env("localhost", 51353, None)
+    for key, value in env.items():
+        monkeypatch.setenv(key, value)
+    head = el.head()[el.title()["t"]]
+    first = "".join(document_streamer(head=head))
+    second = "".join(document_streamer(head=head))
+    assert first == second
+    assert first.count("<script>") == 1
+    # The head element itself is left as it was
+    assert head.render() == "<head><title>t</title></head>"
+
+    monkeypatch.delenv("HTMLCOMPOSE_LIVERELOAD")
+    assert "livereload" not in "".join(document_streamer(head=head))
+    assert document._livereload_script() is None
+
+
+def test_link_headers():
+    hints = link_headers(get_js(), get_css(), get_font_remote())
+    assert hints == (
+        "<https://fonts.googleapis.com>; rel=preconnect; crossorigin=anonymous",
+        "<https://fonts.gstatic.com>; rel=preconnect; crossorigin=anonymous",
+        # Preloaded stylesheet, not repeated for its link
+        "<https://cdn.jsdelivr.net/npm/bootstrap@5.3.0/dist/css/bootstrap.min.css>; "
+        "rel=preload; as=style; crossorigin=anonymous; "
+        "integrity=sha384-9ndCyUaIbzAi2FUVXJi0CjmCapSmO7SnpJef0486qhLnuZ2cdeRhO02iuK6FUUVM",
+        "<https://cdn.jsdelivr.net/npm/alpinejs@3.15.0/+esm>; "
+        "rel=modulepreload; crossorigin=anonymous; "
+        'integrity="sha384-Yf57wlxlrA1+0X6Ye9NOBxQ1tpmiwI/9mFpv9tT/Rh2UAajwwAlTWHnvTGYhgv7p"',
+        "<./static/admin.css>; rel=preload; as=style",
+        "<https://fonts.googleapis.com/css2?family=Montserrat:ital,wght@0,100..900;1,100..900&display=swap>; "
+        "rel=preload; as=style",
+    )
+    assert link_headers(get_js(), get_css(), get_font_remote()) is hints
+
+    assert link_headers(css=["/a b.css"]) == (
+        "</a%20b.css>; rel=preload; as=style",
+    )
+
+    # A value ending in a newline is not a token, control characters are
+    # rejected so they can't end the header
+    for value in ("sha384-x\n", "sha384-x\r\nSet-Cookie: a=b"):
+        with pytest.raises(ValueError):
+            link_headers(
+                css=[css_import("/x.css", hash=value, crossorigin="anonymous")]
+            )
@@ -0,0 +1,322 @@
+import base64
+import hashlib
+import os
+import struct
+import sys
+import time
+
+import pytest
+
+from html_compose import resource
+from html_compose.resource import (
+    AssetManifest,
+    css_import,
+    img_import,
+    js_import,
+    to_html,
+)
+from html_compose.resource.img_import import image_size
+
+
+@pytest.fixture
+def static(tmp_path, monkeypatch):
+    (tmp_path / "js").mkdir()
+    (tmp_path / "js" / "app.js").write_text("console.log(1)")
+    (tmp_path / "site.css").write_text("body {}")
+    monkeypatch.setattr(resource.settings, "base_dir", str(tmp_path))
+    monkeypatch.setattr(resource._State, "manifest", None)
+    yield tmp_path
+
+
+def bump(path, text):
+    path.write_text(text)
+    stamp = time.time() + 10
+    os.utime(path, (stamp, stamp))
+
+
+def test_cache_bust_fingerprint(static, monkeypatch):
+    uri = js_import("/js/app.js", name="app", cache_bust=True).uri()
+    fingerprint = resource._State.manifest.fingerprint("js/app.js")
+    assert uri == f"/js/app.js?hccbts={fingerprint}"
+    assert len(fingerprint) == 16
+
+    # Query and fragment are kept as written
+    assert css_import("./site.css?v=a b#x", cache_bust=True).uri() == (
+        f"./site.css?v=a b&hccbts={resource._State.manifest.fingerprint('site.css')}#x"
+    )
+
+    # Changes are picked up once the poll interval passed
+    bump(static / "js" / "app.js", "console.log(2)")
+    assert js_import("/js/app.js", cache_bust=True).uri() == uri
+    monkeypatch.setattr(resource.settings, "stat_poll_interval", -1)
+    assert js_import("/js/app.js", cache_bust=True).uri() != uri
+
+    with pytest.raises(FileNotFoundError):
+        js_import("/js/missing.js", cache_bust=True)
+
+
+def test_layout_follows_fingerprint(static, monkeypatch):
+    from html_compose import Layout
+
+    monkeypatch.setattr(resource.settings, "stat_poll_interval", -1)
+    app = js_import("/js/app.js", cache_bust=True, hash="auto")
+    layout = Layout(js=[app])
+    before = layout.render()
+    assert app.uri() in before
+
+    # The precompiled layout picks up the new fingerprint and SRI hash
+    bump(static / "js" / "app.js", "console.log(2)")
+    after = layout.render()
+    assert after != before
+    assert app.uri() in after
+    assert app.integrity() in after
+
+
+def test_manifest_scan_and_load(static, monkeypatch):
+    manifest = AssetManifest(str(static))
+    assert manifest.scan(workers=2) == 2
+    assert set(manifest.files) == {"js/app.js", "site.css"}
+    # Unchanged files are not hashed again
+    assert manifest.scan() == 0
+    bump(static / "site.css", "body { color: red }")
+    (static / "js" / "app.js").unlink()
+    assert manifest.scan() == 1
+    assert set(manifest.files) == {"site.css"}
+
+    manifest_file = str(static / "manifest.json")
+    manifest.save(manifest_file)
+    monkeypatch.setattr(resource.settings, "manifest_file", manifest_file)
+    # A loaded manifest is trusted without touching the files
+    (static / "site.css").unlink()
+    assert css_import("/site.css", cache_bust=True).uri() == (
+        f"/site.css?hccbts={manifest.fingerprint('site.css')}"
+    )
+    assert resource._State.manifest.frozen
+
+
+def sha384(data: bytes) -> str:
+    return "sha384-" + base64.b64encode(hashlib.sha384(data).digest()).decode()
+
+
+def test_auto_integrity(static, monkeypatch):
+    script = js_import("/js/app.js", name="app", hash="auto")
+    assert script.script().render() == (
+        '<script src="/js/app.js" type="module" '
+        f'integrity="{sha384(b"console.log(1)")}"></script>'
+    )
+    link = css_import("site.css", hash="auto", preload=True)
+    assert link.preloads()[0].attrs["integrity"] == sha384(b"body {}")
+
+    # A changed file gets a new hash once the poll interval passed
+    monkeypatch.setattr(resource.settings, "stat_poll_interval", -1)
+    bump(static / "js" / "app.js", "console.log(2)")
+    assert sha384(b"console.log(2)") in to_html(js=[script])
+
+    with pytest.raises(ValueError):
+        js_import("https://example.com/x.js", hash="auto")
+
+
+def test_manifest_sri(static, monkeypatch):
+    manifest = AssetManifest(str(static))
+    manifest.scan(sri=True)
+    manifest_file = str(static / "manifest.json")
+    manifest.save(manifest_file)
+
+    monkeypatch.setattr(resource.settings, "manifest_file", manifest_file)
+    (static / "site.css").unlink()
+    link = css_import("/site.css", hash="auto")
+    assert link.links()[0].attrs["integrity"] == sha384(b"body {}")
+
+
+def test_inline_css(static, monkeypatch):
+    (static / "css").mkdir()
+    (static / "css" / "big.css").write_text("p { color: red }" * 100)
+    (static / "css" / "small.css").write_text(
+        "/* note */\nbody {\n  background: url('../img/a.png');\n}\n"
+        "a::after { content: '</style>' }\n"
+    )
+    small = css_import("/css/small.css", inline_threshold=200, preload=True)
+    big = css_import("/css/big.css", inline_threshold=200)
+    assert small.preloads() == []
+    assert small.links()[0].render() == (
+        "<style>body{background: url('/img/a.png')}"
+        "a::after{content: '<\\/style>'}</style>"
+    )
+    assert (
+        big.links()[0].render()
+        == '<link href="/css/big.css" rel="stylesheet"/>'
+    )
+
+    # The file is read once per version
+    monkeypatch.setattr(
+        "builtins.open", lambda *a, **kw: pytest.fail("read again")
+    )
+    assert css_import("/css/small.css", inline=True).links() == small.links()
+
+
+def test_inline_css_strings(static):
+    (static / "css").mkdir()
+    (static / "css" / "site.css").write_text(
+        '@import "base.css";\n'
+        "/* url(old.png) */\n"
+        'a::after { content: ";}"; }\n'
+        'b::after { content: "url(x.png)"; background: url(x.png); }\n'
+    )
+    style = css_import("/css/site.css", inline=True).links()[0]
+    # Strings and comments are kept as they are
+    assert style.render() == (
+        '<style>@import "/css/base.css";a::after{content: ";}"}'
+        'b::after{content: "url(x.png)";background: url(/css/x.png)}</style>'
+    )
+
+
+def test_preload_imports(static):
+    js = static / "js"
+    (js / "lib").mkdir()
+    (js / "app.js").write_text(
+        'import Alpine from "alpinejs"\n'
+        "import { a } from './lib/a.js';\n"
+        'import data from "./data.json" with { type: "json" }\n'
+        'const lazy = () => import("./lazy.js")\n'
+        '// import "./dead.js"\n'
+        '/* import { x } from "./dead.js" */\n'
+        'const text = \'import "./dead.js"\', url = "http://x"\n'
+        'const tpl = `export * from "./dead.js"`\n'
+    )
+    (js / "dead.js").write_text("export const d = 1")
+    (js / "lib" / "a.js").write_text(
+        'export * from "../util.js"\nimport "/js/lib/b.js"\nimport "./gone.js"'
+    )
+    (js / "lib" / "b.js").write_text("export const b = 1")
+    (js / "util.js").write_text("export const u = 1")
+    (js / "other.js").write_text('import { u } from "./util.js"')
+
+    app = js_import(
+        "/js/app.js", name="app", preload_imports=True, cache_bust=True
+    )
+    assert [url for url, _ in app.dependencies()] == [
+        "/js/lib/a.js",
+        "/js/util.js",
+        "/js/lib/b.js",
+    ]
+    other = js_import("/js/other.js", name="other", preload_imports=True)
+    assert other.dependencies() == [("/js/util.js", "/js/util.js")]
+
+    html = to_html(js=[app, other])
+    manifest = resource._State.manifest
+    util = f"/js/util.js?hccbts={manifest.fingerprint('js/util.js')}"
+    # Preloaded once, by its cache-busted URL, and mapped to it
+    assert html.count('<link href="/js/util.js') == 1
+    assert f'<link href="{util}" rel="modulepreload"/>' in html
+    assert f'"/js/util.js": "{util}"' in html
+    assert "lazy" not in html
+
+
+def png(width, height):
+    return (
+        b"\x89PNG\r\n\x1a\n\x00\x00\x00\rIHDR"
+        + struct.pack(">II", width, height)
+        + b"\x08\x02\x00\x00\x00"
+    )
+
+
+def test_image_size(static):
+    img = static / "img"
+    img.mkdir()
+    exif = b"\xff\xe1" + struct.pack(">H", 5000) + b"\0" * 4998
+    sof = b"\xff\xc0\x00\x11\x08" + struct.pack(">HH", 480, 640)
+    (img / "a.jpg").write_bytes(b"\xff\xd8" + exif + sof)
+    (img / "a.gif").write_bytes(b"GIF89a" + struct.pack("<HH", 7, 9))
+    (img / "a.webp").write_bytes(
+        b"RIFF\0\0\0\0WEBPVP8X" + b"\0" * 8 + bytes([99, 0, 0, 49, 0, 0])
+    )
+    (img / "a.avif").write_bytes(
+        b"\0\0\0\x1cftypavif"
+        + b"\0" * 16
+        + b"\0\0\0\x14ispe\0\0\0\0"
+        + struct.pack(">II", 1920, 1080)
+    )
+    (img / "a.txt").write_text("not an image")
+
+    # Orientation 6: rotated 90 degrees, the displayed size is swapped
+    tiff = b"MM\0\x2a" + struct.pack(">IH", 8, 1)
+    tiff += struct.pack(">HHIHH", 0x0112, 3, 1, 6, 0) + b"\0" * 4
+    app1 = b"Exif\0\0" + tiff
+    (img / "rotated.jpg").write_bytes(
+        b"\xff\xd8"
+        + b"\xff\xe1"
+        + struct.pack(">H", len(app1) + 2)
+        + app1
+        + exif
+        + sof
+    )
+
+    # The primary item is found through pitm and ipma, the first ispe is
+    # its thumbnail's
+    def box(kind, body, full=False):
+        body = (b"\0" * 4 if full else b"") + body
+        return struct.pack(">I", len(body) + 8) + kind + body
+
+    ispe = [
+        box(b"ispe", struct.pack(">II", 160, 90), full=True),
+        box(b"ispe", struct.pack(">II", 1280, 720), full=True),
+    ]
+    ipma = struct.pack(">I", 2)
+    ipma += struct.pack(">HB", 1, 1) + bytes([0x01])
+    ipma += struct.pack(">HB", 2, 2) + bytes([0x82, 0x03])
+    iprp = box(
+        b"iprp",
+        box(b"ipco", b"".join(ispe) + box(b"irot", b"\x01"))
+        + box(b"ipma", ipma, full=True),
+    )
+    meta = box(
+        b"meta", box(b"pitm", struct.pack(">H", 2), full=True) + iprp, True
+    )
+    (img / "b.avif").write_bytes(box(b"ftyp", b"avif" + b"\0" * 4) + meta)
+
+    assert image_size("/img/a.jpg") == (640, 480)
+    assert image_size("/img/a.gif") == (7, 9)
+    assert image_size("img/a.webp") == (100, 50)
+    assert image_size("/img/a.avif?v=1") == (1920, 1080)
+    assert image_size("/img/a.txt") is None
+    assert image_size("/img/rotated.jpg") == (480, 640)
+    assert image_size("/img/b.avif") == (720, 1280)
+    with pytest.raises(FileNotFoundError):
+        image_size("/img/missing.png")
+
+
+def test_img_import(static, monkeypatch):
+    img = static / "img"
+    img.mkdir()
+    (img / "hero.png").write_bytes(png(1280, 720))
+    (img / "hero-640.png").write_bytes(png(640, 360))
+    (img / "hero-640.avif").write_text("")
+
+    assert img_import("/img/hero.png", alt="").element().render() == (
+        '<img src="/img/hero.png" alt="" width="1280" height="720" '
+        'loading="lazy" decoding="async"/>'
+    )
+    hero = img_import(
+        "/img/hero.png",
+        alt="Hero",
+        variants=["/img/hero-640.png", "/img/hero-640.avif"],
+        sizes="100vw",
+        priority=True,
+    )
+    assert hero.element().render() == (
+        '<picture><source type="image/avif" srcset="/img/hero-640.avif"/>'
+        '<img src="/img/hero.png" alt="Hero" width="1280" height="720" '
+        'srcset="/img/hero-640.png 640w, /img/hero.png 1280w" sizes="100vw" '
+        'fetchpriority="high"/></picture>'
+    )
+    assert 'imagesrcset="/img/hero-640.png 640w' in hero.preload_link().render()
+
+    # Sizes are probed once per mtime and poll interval
+    monkeypatch.setattr(
+        sys.modules[image_size.__module__],
+        "_probe_size",
+        lambda path: pytest.fail("probed again"),
+    )
+    assert hero.element().render() == hero.element().render()
+    monkeypatch.setattr(resource.settings, "stat_poll_interval", -1)
+    hero.element()
@@ -0,0 +1,462 @@
+import dataclasses
+import datetime
+import gzip
+import json
+import math
+import zlib
+
+import pytest
+
+from html_compose import (
+    HTML5Document,
+    Layout,
+    a,
+    body,
+    component_assets,
+    div,
+    iframe,
+    img,
+    layout_slot,
+    li,
+    p,
+    picture,
+    resource,
+    script,
+    ul,
+)
+from html_compose.above_fold import above_the_fold
+from html_compose.csp import NONCE, apply_nonce
+from html_compose.document import (
+    document_generator,
+    document_streamer,
+    document_streamer_bytes,
+)
+from html_compose.icons import IconRegistry
+from html_compose.json_island import _orjson, json_island
+from html_compose.stream import (
+    BATCH_SIZE,
+    ENCODINGS,
+    FLUSH,
+    compress_stream,
+    content_digest,
+    digest_stream,
+    encode_stream,
+    flush_point,
+    static_fragment,
+)
+from html_compose.util_funcs import generate_livereload_env
+
+
+def get_page(shared):
+    return body[
+        shared,
+        flush_point(),
+        ul[(li[f"row {i}"] for i in range(2000))],
+        shared,
+        p["the end"],
+    ]
+
+
+def test_fragment_renders_like_content():
+    shared = static_fragment(div(class_="nav")["Home & away"])
+    assert shared.render() == '<div class="nav">Home &amp; away</div>'
+    assert (
+        div[shared, flush_point()].render()
+        == '<div><div class="nav">Home &amp; away</div></div>'
+    )
+
+
+@pytest.mark.parametrize("encoding", ["gzip", "deflate"])
+def test_compress_round_trip(encoding):
+    shared = static_fragment(div(class_="nav")[[p[i] for i in range(50)]])
+    expected = get_page(shared).render().encode("utf-8")
+
+    output = b"".join(compress_stream(get_page(shared).resolve(), encoding))
+    if encoding == "gzip":
+        assert gzip.decompress(output) == expected
+    else:
+        assert zlib.decompress(output) == expected
+
+    # Second render reuses the cached fragment
+    assert shared._compressed
+    again = b"".join(compress_stream(get_page(shared).resolve(), encoding))
+    assert again == output
+
+
+def test_flush_point_emits_prefix():
+    shared = static_fragment(p["header"])
+    stream = compress_stream(get_page(shared).resolve(), "gzip")
+    first = next(stream)
+    # A sync flush makes everything so far decodable
+    decoder = zlib.decompressobj(wbits=31)
+    assert decoder.decompress(first) == b"<body><p>header</p>"
+
+
+def test_document_flush_each():
+    chunks = list(
+        compress_stream(
+            document_streamer(body=[p["hi"]]), "deflate", flush_each=True
+        )
+    )
+    assert len(chunks) == 3
+    decoded = zlib.decompress(b"".join(chunks)).decode()
+    assert decoded.endswith("<body><p>hi</p></body>\n</html>")
+
+
+def test_unknown_encoding():
+    with pytest.raises(ValueError):
+        list(compress_stream(["a"], "br"))  # type: ignore[arg-type]
+
+
+@pytest.mark.skipif("zstd" not in ENCODINGS, reason="zstd unavailable")
+def test_zstd_round_trip():
+    from compression import zstd  # type: ignore[import-not-found]
+
+    shared = static_fragment(p["shared"])
+    expected = get_page(shared).render().encode("utf-8")
+    output = b"".join(compress_stream(get_page(shared).resolve(), "zstd"))
+    assert zstd.decompress(output) == expected
+
+
+def test_render_with_digest():
+    shared = static_fragment(div(class_="nav")["nav"])
+    html, digest = get_page(shared).render_with_digest()
+    assert html == get_page(shared).render()
+    assert digest == get_page(shared).render_with_digest()[1]
+    assert content_digest(get_page(shared)) == digest
+
+    changed = body[shared, p["different"]]
+    assert content_digest(changed) != digest
+
+
+def test_digest_stream():
+    stream = digest_stream(document_streamer(body=[p["hi"]]))
+    html = "".join(stream)  # type: ignore[arg-type]
+    assert html.endswith("<body><p>hi</p></body>\n</html>")
+    assert stream.etag() == f'"{stream.hexdigest()}"'
+    assert stream.etag(weak=True).startswith('W/"')
+
+    doc = HTML5Document("t", body=[p["hi"]])
+    assert doc.render_with_digest() == (
+        doc.render(),
+        content_digest(doc.stream()),
+    )
+
+
+def test_render_bytes():
+    shared = static_fragment(p["ünïcode"])
+    expected = get_page(shared).render().encode("utf-8")
+    assert get_page(shared).render_bytes() == expected
+
+    parts = list(get_page(shared).resolve_bytes())
+    assert b"".join(parts) == expected
+    # Output is batched, not one write per tag
+    assert len(parts) < 10
+    assert all(isinstance(part, bytes) for part in parts)
+
+
+def test_encode_stream_flush():
+    chunks = ["<p>", "a", "</p>", FLUSH, "<p>", "b", "</p>"]
+    assert list(encode_stream(chunks)) == [b"<p>a</p>", b"<p>b</p>"]
+    assert list(encode_stream(["ab", "cd"], buffer_size=2)) == [b"ab", b"cd"]
+
+
+def test_document_bytes():
+    parts = list(document_streamer_bytes(body=[p["hi"]]))
+    assert len(parts) == 2
+    assert parts[1] == b"<body><p>hi</p></body>\n</html>"
+
+    doc = HTML5Document("t", body=[p["hi"]])
+    assert doc.render_bytes() == doc.render().encode("utf-8")
+    assert b"".join(doc.stream_bytes("full")) == doc.render_bytes()
+
+
+def test_layout():
+    layout = Layout(
+        "Site",
+        lang="en",
+        css=["/site.css"],
+        body=[
+            div(class_="nav")["nav"],
+            ul[layout_slot("body")],
+            layout_slot("footer", default=p["footer"]),
+        ],
+    )
+    assert layout.slots == {"title", "head", "body", "footer"}
+
+    rows = [li[i] for i in range(3)]
+    expected = HTML5Document(
+        "Home",
+        lang="en",
+        css=["/site.css"],
+        body=[div(class_="nav")["nav"], ul[rows], p["footer"]],
+    )
+    assert layout.render(title="Home", body=rows) == expected.render()
+    assert list(layout.stream(title="Home", body=rows)) == list(
+        expected.stream()
+    )
+    assert layout.render_bytes(title="Home", body=rows) == (
+        expected.render_bytes()
+    )
+
+    # The static parts are fragments, compressed once
+    full = layout.render(head=p["h"], footer=None)
+    assert "<title>Site</title>" in full
+    assert "<p>h</p></head>" in full
+    assert "footer" not in full
+    output = b"".join(compress_stream(layout.stream("full"), "gzip"))
+    assert gzip.decompress(output) == layout.render_bytes()
+
+    with pytest.raises(ValueError):
+        layout.render(sidebar="x")
+
+    # Slot callables get the element holding the slot and its parent
+    layout = Layout(body=[ul[layout_slot("body")]])
+    html = layout.render(body=lambda el, parent: f"{el.tag} in {parent.tag}")
+    assert "<ul>ul in body</ul>" in html
+
+
+def test_above_the_fold():
+    hero = img(src="/hero.jpg", srcset="/hero-2x.jpg 2x")
+    art = picture[img(src="/art.png")]
+    page = body[
+        div[[hero, art]],
+        lambda: img(src="/per-request.png"),
+        iframe(src="/map"),
+        img(src="/late.png", loading="eager"),
+    ]
+    before = page.render_with_digest()[1]
+    links = above_the_fold(page, count=2)
+    assert [link.render() for link in links] == [
+        '<link fetchpriority="high" href="/hero.jpg" '
+        'imagesrcset="/hero-2x.jpg 2x" as="image" rel="preload"/>'
+    ]
+    assert page.render() == (
+        "<body><div>"
+        '<img src="/hero.jpg" srcset="/hero-2x.jpg 2x" loading="eager" '
+        'fetchpriority="high"/>'
+        '<picture><img src="/art.png" loading="eager" fetchpriority="high"/>'
+        '</picture></div><img src="/per-request.png"/>'
+        '<iframe src="/map" loading="lazy"/>'
+        '<img loading="eager" src="/late.png" decoding="async"/>'
+        "</body>"
+    )
+    # Cached digests of the ancestors are dropped
+    assert page.render_with_digest()[1] != before
+
+    # A layout applies the pass when it is created
+    layout = Layout(body=[hero, img(src="/b.png")], above_fold=1)
+    html = layout.render()
+    assert html.count('as="image" rel="preload"') == 1
+    assert '<img src="/b.png" loading="lazy" decoding="async"/>' in html
+    assert html.index('as="image"') < html.index("</head>")
+
+    # Documents apply the pass to a copy, shared elements are left alone
+    shared = img(src="/shared.png")
+    first = HTML5Document(body=[div[shared]], above_fold=1).render()
+    assert '<img src="/shared.png" loading="eager" fetchpriority="high"/>' in (
+        first
+    )
+    assert shared.render() == '<img src="/shared.png"/>'
+    second = HTML5Document(body=[shared], above_fold=0).render()
+    assert '<img src="/shared.png" loading="lazy" decoding="async"/>' in second
+
+
+def test_component_assets():
+    card_assets = component_assets(css=".card{}", js="x = '</script>'")
+    same = component_assets(css=".card{}", js="x = '</script>'")
+    extra = component_assets(css=".extra{}")
+
+    def card(text):
+        return div(class_="card")[card_assets, text]
+
+    rendered = "<style>.card{}</style><script>x = '<\\/script>'</script>"
+    page = [card("a"), card("b"), same]
+    # Rendered at once, the assets go in the head, once
+    html = document_generator(body=page)
+    assert html.count(rendered) == 1
+    assert html.index(rendered) < html.index("</head>")
+    # Streamed head first, at the end of the body
+    parts = list(document_streamer(body=[*page, extra], stream_mode="full"))
+    assert "<style>" not in parts[0]
+    assert parts[-4:-2] == [rendered + "<style>.extra{}</style>", "</body>"]
+    # Nothing is rendered in place
+    assert card("a").render() == '<div class="card">a</div>'
+
+    layout = Layout(body=[card("nav"), layout_slot("body")])
+    head, body_html = layout.stream(body=[card("x"), extra])
+    assert rendered in head
+    assert body_html.endswith("<style>.extra{}</style></body>\n</html>")
+    assert "<style>" not in list(layout.stream(body=card("y")))[1]
+
+
+def test_csp_nonce(monkeypatch):
+    fragment = static_fragment([p["intro"], script(nonce=NONCE)["go()"]])
+    page = div[fragment, script(nonce=NONCE)["later()"]]
+    chunks = list(apply_nonce(page.resolve(), "abc"))
+    assert "".join(chunks) == (
+        '<div><p>intro</p><script nonce="abc">go()</script>'
+        '<script nonce="abc">later()</script></div>'
+    )
+    # The cached parts around the placeholder are still fragments
+    sep = f' nonce="{NONCE}"'
+    assert fragment.split(sep)[0].html == "<p>intro</p><script"
+    assert fragment.split(sep)[0] is fragment.split(sep)[0]
+
+    # Only nonce attributes get the nonce, not text or other attributes
+    user = div[
+        p[f"my nick is {NONCE}"],
+        a({"data-nonce": NONCE}, href="/u/" + NONCE),
+        script(nonce=NONCE),
+    ]
+    for node in (user, static_fragment(user)):
+        html = "".join(apply_nonce(node.resolve(), "SECRET"))
+        assert html.count("SECRET") == 1
+        assert html.count(NONCE) == 3
+        assert '<script nonce="SECRET">' in html
+    assert (
+        gzip.decompress(
+            b"".join(compress_stream(apply_nonce(page.resolve(), "x"), "gzip"))
+        )
+        == "".join(apply_nonce(page.resolve(), "x")).encode()
+    )
+    with pytest.raises(ValueError):
+        apply_nonce([], '"><script>')
+
+    for key, value in generate_livereload_env("localhost", 1, None).items():
+        monkeypatch.setenv(key, value)
+    js = [resource.js_import("/app.js", name="app")]
+    assets = component_assets(js="init()")
+    doc = HTML5Document(js=js, body=[assets])
+    html = doc.render(nonce="n1")
+    assert NONCE not in html
+    # Import map, module script, livereload and component assets
+    assert html.count('nonce="n1"') == 4
+    assert 'nonce="n1"' not in doc.render()
+
+    layout = Layout(js=js, nonce=True)
+    first = layout.render(nonce="n1", body=[assets])
+    assert layout.render(nonce="n2", body=[assets]) == first.replace("n1", "n2")
+    assert first.count('nonce="n1"') == 4
+    with pytest.raises(ValueError):
+        layout.render()
+
+
+def test_icons(tmp_path):
+    (tmp_path / "check.svg").write_text(
+        '<?xml version="1.0"?>\n<svg xmlns="http://www.w3.org/2000/svg" '
+        'width="24" viewBox="0 0 24 24" fill="none"><path d="M1 2"/></svg>\n'
+    )
+    (tmp_path / "notes.txt").write_text("")
+    icons = IconRegistry()
+    assert icons.register_dir(str(tmp_path)) == 1
+    icons.register("dot", "<svg viewBox='0 0 8 8'><circle r='4'/></svg>")
+    with pytest.raises(ValueError):
+        icons.register("bad", "<svg><path></svg>")
+    with pytest.raises(KeyError):
+        icons.use("missing")
+
+    check = icons.use("check", class_="icon")
+    assert icons.use("check", class_="icon") is check
+    assert check.render() == (
+        '<svg class="icon" aria-hidden="true"><use href="#icon-check"/></svg>'
+    )
+    assert icons.use("dot", title="Dot").render() == (
+        '<svg role="img" aria-label="Dot"><use href="#icon-dot"/></svg>'
+    )
+
+    html = "".join(
+        document_streamer(
+            body=[[check, check], ul[li[check]]], stream_mode="full"
+        )
+    )
+    sprite = (
+        '<svg xmlns="http://www.w3.org/2000/svg" aria-hidden="true" '
+        'width="0" height="0" style="position:absolute">'
+        '<symbol id="icon-check" viewBox="0 0 24 24" '
+        'fill="none"><path d="M1 2"/></symbol></svg></body>'
+    )
+    assert html.count("<symbol") == 1
+    assert sprite in html
+    # In the body even when other assets go in the head
+    assert sprite in document_generator(body=check)
+
+    layout = Layout(body=[icons.use("dot"), layout_slot("body")])
+    html = layout.render(body=check)
+    assert html.index('id="icon-dot"') < html.index('id="icon-check"')
+    assert "<symbol" not in layout.render().split("position:absolute")[0]
+
+    # A self-closing svg is an empty symbol
+    icons.register("blank", '<svg viewBox="0 0 1 1"/>')
+    assert icons.symbols["blank"].html == (
+        '<symbol id="icon-blank" viewBox="0 0 1 1"></symbol>'
+    )
+
+
+def test_json_island():
+    data = {"html": "</script><!-- a & b \u2028", "n": [1, 2.5, None, True]}
+    island = json_island(data, id="state")
+    html = island.render()
+    start = '<script id="state" type="application/json">'
+    assert html.startswith(start) and html.endswith("</script>")
+    content = html[len(start) : -len("</script>")]
+    assert "<" not in content and "&" not in content
+    assert "\u2028" not in content
+    assert json.loads(content) == data
+    # Encoded again on each render
+    data["n"].append(3)
+    assert '"n":[1,2.5,null,true,3]' in island.render()
+
+    # A large payload is streamed in several chunks
+    big = json_island(list(range(BATCH_SIZE)))
+    chunks = list(big.resolve())
+    assert len(chunks) > 3
+    assert json.loads("".join(chunks[1:-1])) == list(range(BATCH_SIZE))
+
+    sets = json_island({"s": {1, 2}}, default=sorted)
+    assert '{"s":[1,2]}' in sets.render()
+    with pytest.raises(TypeError):
+        json_island({"s": {1}}).render()
+
+    keys = json_island({1: "a", False: "b", None: "c"})
+    assert '{"1":"a","false":"b","null":"c"}' in keys.render()
+
+    # JSON.parse rejects NaN and Infinity, they are never written
+    for value in (math.nan, math.inf, -math.inf):
+        with pytest.raises(ValueError):
+            json_island({"x": value}).render()
+
+    if _orjson is None:
+        with pytest.raises(ImportError):
+            json_island(data, use_orjson=True)
+
+
+@pytest.mark.skipif(_orjson is None, reason="orjson is not installed")
+def test_json_island_orjson():
+    @dataclasses.dataclass
+    class Point:
+        x: int
+        y: int
+
+    def default(obj):
+        if isinstance(obj, datetime.datetime):
+            return obj.date().isoformat()
+        if isinstance(obj, Point):
+            return [obj.x, obj.y]
+        return sorted(obj)
+
+    payload = {
+        "html": "</script><!-- a & b \u2028",
+        "n": [1, 2.5, None, True, "\u00e9"],
+        "when": datetime.datetime(2024, 5, 1, 12, 30),
+        "at": Point(1, 2),
+        "s": {3, 1},
+        1: "a",
+        False: "b",
+        None: "c",
+    }
+    # Both encoders write the same document
+    expected = json_island(payload, default=default).render()
+    assert json_island(payload, default=default, use_orjson=True).render() == (
+        expected
+    )
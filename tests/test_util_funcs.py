@@ -1,4 +1,14 @@
-from html_compose.util_funcs import flatten_iterable, glob_matcher
+import inspect
+import threading
+from functools import partial, wraps
+
+from html_compose.util_funcs import (
+    BoundedCache,
+    flatten_iterable,
+    get_param_count,
+    glob_matcher,
+    is_iterable_but_not_str,
+)
 
 
 def test_iterator_flatten():
@@ -23,6 +33,23 @@ def test_iterator_flatten():
     assert list(flatten_iterable(bytes_demo)) == [1, 2, 3, bytes([1, 2, 3, 4])]
 
 
+def test_iterator_flatten_containers():
+    class Custom:
+        def __iter__(self):
+            return iter([7, [8]])
+
+    data = {"a": 1}
+    nested = [[[1]], (), [(2,)], range(3, 5), data.keys(), Custom(), [[]]]
+    assert list(flatten_iterable(nested)) == [1, 2, 3, 4, "a", 7, 8]
+    assert list(flatten_iterable(([x] for x in range(3)))) == [0, 1, 2]
+
+    assert is_iterable_but_not_str(Custom())
+    assert is_iterable_but_not_str(data.values())
+    assert not is_iterable_but_not_str("abc")
+    assert not is_iterable_but_not_str(b"abc")
+    assert not is_iterable_but_not_str(1)
+
+
 def test_glob_func():
     test_cases = [
         # Basic matching
@@ -120,3 +147,72 @@ def test_glob_func():
         assert glob_matcher(pattern, target) == expected, (
             f"Test failed for pattern {pattern} and target {target}"
         )
+
+
+def test_get_param_count():
+    class Demo:
+        def method(self, a, b=None):
+            pass
+
+        def __call__(self, a):
+            pass
+
+    def varargs(a, *args, b=1, **kwargs):
+        pass
+
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            return func(*args, **kwargs)
+
+        return wrapper
+
+    @decorator
+    def decorated():
+        pass
+
+    cases = [
+        lambda: None,
+        lambda a: None,
+        lambda a, b=None: None,
+        varargs,
+        Demo().method,
+        Demo(),
+        partial(lambda a, b: None, 1),
+        partial(Demo().method, 1),
+        partial(lambda a, b: None, b=1),
+        len,
+        decorated,
+        decorator(Demo().method),
+    ]
+    for func in cases:
+        expected = len(inspect.signature(func).parameters)
+        assert get_param_count(func) == expected, func
+
+    # Per-request lambdas share a code object and hit the same entry
+    lambdas = [lambda x, y: (x, y) for _ in range(3)]
+    assert len({id(f) for f in lambdas}) == 3
+    assert all(get_param_count(f) == 2 for f in lambdas)
+
+
+def test_bounded_cache():
+    cache: BoundedCache[int, int] = BoundedCache()
+    for i in range(5):
+        cache.put(i, i, cap=3)
+    assert list(cache) == [2, 3, 4]
+    # Replacing an existing key does not evict
+    cache.put(3, 30, cap=3)
+    assert cache == {2: 2, 3: 30, 4: 4}
+
+    def writer(offset):
+        for i in range(2000):
+            cache.put(offset + i, i, cap=64)
+
+    threads = [
+        threading.Thread(target=writer, args=(n * 10000,)) for n in range(8)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(cache) <= 64
@@ -177,6 +177,8 @@ def generate_attrs(attr_class, attr_list) -> list[processed_attr]:  # -> list:
         # StrLike as a fallback
         if "StrLike" not in param_types:
             param_types.append("StrLike")
+        # Any attribute may be computed at render time
+        param_types.append("AttrResolver")
         # Hardcode override for class and style, which uniquely are intended
         # for multiple types
         if attrdef.name == "style":
@@ -350,7 +352,7 @@ def gen_elements():
 from ..attributes import GlobalAttrs, {", ".join(attr_imports)}
 from ..base_attribute import BaseAttribute
 from ..base_element import BaseElement
-from ..base_types import Resolvable, StrLike
+from ..base_types import AttrResolver, Resolvable, StrLike
 
 # This file is generated by tools/generate_elements.py
 """